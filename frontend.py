@@ -1,9 +1,10 @@
 import streamlit as st
 import requests
-import time
+import json
 
 # --- AYARLAR ---
 API_URL = "http://127.0.0.1:8000/chat"
+STREAM_URL = f"{API_URL}/stream"
 st.set_page_config(
     page_title="Hukuk Asistanı",
     page_icon="⚖️",
@@ -33,6 +34,23 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# --- SSE OKUYUCU ---
+def read_sse(response):
+    """/chat/stream yanıtını (olay, veri) çiftlerine ayırır."""
+    response.encoding = "utf-8"
+    event, data_lines = None, []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if event and data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = None, []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
 # --- SESSION STATE (Sohbet Geçmişi) ---
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -67,48 +85,63 @@ if prompt := st.chat_input("Hukuki sorunuzu buraya yazın..."):
         message_placeholder = st.empty()
         status_placeholder = st.empty()
         
-        # "Düşünüyor..." efekti
+        # "Düşünüyor..." efekti: düğüm ilerlemeleri durum kutusuna, token'lar cevaba akar
         with st.status("🔍 Sistem analiz yapıyor...", expanded=True) as status:
             try:
-                start_time = time.time()
-                
-                # API'ye istek at
-                response = requests.post(API_URL, json={"question": prompt})
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    answer = data.get("response", "Cevap yok.")
-                    route = data.get("route", "Bilinmiyor")
-                    rag_decision = data.get("rag_decision")
-                    elapsed = data.get("elapsed_time", 0)
-                    
+                answer = ""
+                done = None
+                error_msg = None
+
+                # API'ye akış isteği at (Server-Sent Events)
+                with requests.post(STREAM_URL, json={"question": prompt}, stream=True) as response:
+                    if response.status_code != 200:
+                        error_msg = f"API Hatası: {response.status_code}"
+                    else:
+                        for event, data in read_sse(response):
+                            if event == "progress":
+                                st.write(data["label"])
+                            elif event == "token":
+                                if not answer:
+                                    status.update(label="✍️ Cevap yazılıyor...")
+                                answer += data["text"]
+                                message_placeholder.markdown(answer + "▌")
+                            elif event == "done":
+                                done = data
+                            elif event == "error":
+                                error_msg = f"API Hatası: {data.get('detail')}"
+
+                if error_msg or done is None:
+                    status.update(label="❌ Hata oluştu", state="error")
+                    message_placeholder.error(error_msg or "Akış yarıda kesildi.")
+                else:
+                    route = done.get("route", "Bilinmiyor")
+                    rag_decision = done.get("rag_decision")
+                    elapsed = done.get("elapsed_time", 0)
+                    answer = answer or done.get("response") or "Cevap yok."
+
                     # Durum çubuğunu güncelle
                     status.update(label=f"✅ İşlem Tamamlandı (Rota: {route})", state="complete", expanded=False)
-                    
-                    # Cevabı yazdır
+
+                    # Cevabı yazdır (imleç olmadan)
                     message_placeholder.markdown(answer)
-                    
+
                     # Altına teknik bilgi kutucuğu ekle
                     detail_text = f"🧭 **Rota:** `{route}`"
                     if rag_decision:
                         detail_text += f" | 🔍 **Analiz:** `{rag_decision}`"
                     detail_text += f" | ⏱️ **Süre:** `{elapsed} sn`"
-                    
+                    if done.get("cache_hit"):
+                        detail_text += " | ⚡ **Önbellek**"
+
                     st.caption(detail_text)
-                    
+
                     # 3. Asistan mesajını geçmişe kaydet
                     st.session_state.messages.append({
                         "role": "assistant", 
                         "content": answer,
                         "metadata": {"route": route, "time": elapsed}
                     })
-                    
-                else:
-                    status.update(label="❌ Hata oluştu", state="error")
-                    error_msg = f"API Hatası: {response.status_code}"
-                    message_placeholder.error(error_msg)
             
             except Exception as e:
                 status.update(label="❌ Bağlantı Hatası", state="error")
-                message_placeholder.error(f"Backend'e bağlanılamadı. API çalışıyor mu? \n\nHata: {e}")
\ No newline at end of file
+                message_placeholder.error(f"Backend'e bağlanılamadı. API çalışıyor mu? \n\nHata: {e}")
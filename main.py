@@ -1,7 +1,10 @@
 import sys
 import os
 import time
+import json
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 
@@ -11,15 +14,27 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
     # Senin Supervisor yapını barındıran graph'ı çekiyoruz
-    from src.main_graph import app as graph_app
+    from src.main_graph import app as graph_app, stream_events
+    from src import registry
+    from src.cache.semantic_cache import get_semantic_cache
+    from src.cache.response_cache import get_response_cache
 except ImportError as e:
     raise RuntimeError(f"❌ HATA: Modüller yüklenemedi. 'src.main_graph' bulunamadı. Detay: {e}")
 
 # --- 2. FASTAPI KURULUMU ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Embedding modeli, reranker ve iki Chroma deposu süreç başına bir kez yüklenir;
+    # böylece ilk istekler model yükleme süresini beklemez.
+    registry.startup()
+    yield
+    registry.shutdown()
+
 app = FastAPI(
     title="Hukuk Asistanı API",
     description="Supervisor mimarili (Router -> Summarizer | RAG Agent) AI Asistanı",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # --- 3. VERİ MODELLERİ (Pydantic) ---
@@ -33,8 +48,28 @@ class ChatResponse(BaseModel):
     route: Optional[str]    # Hangi yola gitti? (RAG veya Summarizer vb.)
     rag_decision: Optional[str] = None # Eğer RAG ise analiz türü
     elapsed_time: float     # Süre
+    cache_hit: bool = False # Cevap semantik önbellekten mi geldi?
+
+# --- 4. ÖNBELLEK YARDIMCILARI ---
+# 1. Tam eşleşme (normalize soru + indeks sürümü): embedding bile hesaplanmaz
+# 2. Semantik: benzer bir soru daha önce cevaplandıysa graph (ve LLM) hiç çalışmaz
+def lookup_cached_answer(question):
+    response_cache = get_response_cache()
+    answer_cache = get_semantic_cache()
+    cached = response_cache.get("chat", question) if response_cache is not None else None
+    if cached is None and answer_cache is not None:
+        cached = answer_cache.lookup(question)
+    return cached
 
-# --- 4. ENDPOINT ---
+def store_answer(question, payload):
+    response_cache = get_response_cache()
+    answer_cache = get_semantic_cache()
+    if response_cache is not None:
+        response_cache.put("chat", payload, question)
+    if answer_cache is not None:
+        answer_cache.store(question, payload)
+
+# --- 5. ENDPOINT ---
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     """
@@ -48,6 +83,19 @@ async def chat_endpoint(request: ChatRequest):
 
     print(f"📩 Yeni İstek Geldi: {request.question}")
 
+    # --- ÖNBELLEKLER ---
+    cached = lookup_cached_answer(request.question)
+    if cached is not None:
+        elapsed = time.time() - start_time
+        print(f"⚡ Önbellekten cevaplandı ({elapsed * 1000:.1f}ms)")
+        return ChatResponse(
+            response=cached["response"],
+            route=cached["route"],
+            rag_decision=cached["rag_decision"],
+            elapsed_time=round(elapsed, 2),
+            cache_hit=True
+        )
+
     # --- LANGGRAPH / LANGCHAIN INVOKE ---
     # Senin CLI'daki mantığın aynısı:
     initial_state = {
@@ -71,6 +119,14 @@ async def chat_endpoint(request: ChatRequest):
         print(f"🧭 Rota: {route_decision}")
         print(f"✅ Cevap üretildi ({elapsed:.2f}sn)")
 
+        # Arama kanatlarından biri düştüyse (kısmi bağlam) cevap önbelleğe yazılmaz
+        if result.get("response") and not result.get("degraded"):
+            store_answer(request.question, {
+                "response": final_response,
+                "route": route_decision,
+                "rag_decision": rag_details,
+            })
+
         return ChatResponse(
             response=final_response,
             route=route_decision,
@@ -82,7 +138,89 @@ async def chat_endpoint(request: ChatRequest):
         print(f"❌ HATA: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# --- 5. SAĞLIK KONTROLÜ (Opsiyonel) ---
+# --- 6. AKAN CEVAP (SSE) ---
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def chat_event_stream(question):
+    """
+    Server-Sent Events: "progress" (biten düğüm) -> "token" (cevap parçaları) -> "done"
+    (son cevap, rota, analiz türü, süre). Hata olursa "error" olayı gönderilir ve akış kapanır.
+    """
+    start_time = time.time()
+
+    cached = lookup_cached_answer(question)
+    if cached is not None:
+        print(f"⚡ Önbellekten cevaplandı ({(time.time() - start_time) * 1000:.1f}ms)")
+        yield sse_event("token", {"text": cached["response"]})
+        yield sse_event("done", {
+            "response": cached["response"],
+            "route": cached["route"],
+            "rag_decision": cached["rag_decision"],
+            "elapsed_time": round(time.time() - start_time, 2),
+            "cache_hit": True,
+        })
+        return
+
+    try:
+        for event, data in stream_events(question):
+            if event != "done":
+                yield sse_event(event, data)
+                continue
+
+            elapsed = time.time() - start_time
+            route_decision = data.get("next_step", "Bilinmiyor")
+            rag_details = data.get("decision", None)
+            print(f"🧭 Rota: {route_decision}")
+            print(f"✅ Cevap akıtıldı ({elapsed:.2f}sn)")
+
+            if data.get("response") and not data.get("degraded"):
+                store_answer(question, {
+                    "response": data["response"],
+                    "route": route_decision,
+                    "rag_decision": rag_details,
+                })
+            # Token akmadıysa (boş parça, callback'siz çağrı) arayüz cevabı buradan alır
+            yield sse_event("done", {
+                "response": data.get("response"),
+                "route": route_decision,
+                "rag_decision": rag_details,
+                "elapsed_time": round(elapsed, 2),
+                "cache_hit": False,
+            })
+    except Exception as e:
+        print(f"❌ HATA: {e}")
+        yield sse_event("error", {"detail": str(e)})
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    /chat ile aynı akış; cevap tamamlanmayı beklemeden SSE olarak akıtılır.
+    Kullanıcı ilk token'ı graph'ın tamamı yerine responder başladığında görür.
+    """
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Soru boş olamaz.")
+
+    print(f"📩 Yeni Akış İsteği: {request.question}")
+    # Senkron üretici: Starlette her adımı thread havuzunda çalıştırır, event loop bloklanmaz
+    return StreamingResponse(
+        chat_event_stream(request.question),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- 7. ÖNBELLEK İSTATİSTİKLERİ ---
+@app.get("/cache/stats")
+async def cache_stats():
+    """Tam eşleşme ve semantik önbelleklerin isabet / kaçırma / tahliye sayaçları."""
+    response_cache = get_response_cache()
+    answer_cache = get_semantic_cache()
+    return {
+        "response_cache": response_cache.stats() if response_cache is not None else None,
+        "semantic_cache": answer_cache.stats() if answer_cache is not None else None,
+    }
+
+# --- 8. SAĞLIK KONTROLÜ (Opsiyonel) ---
 @app.get("/")
 async def root():
     return {"status": "active", "message": "Hukuk Asistanı API Hazır 🚀"}
\ No newline at end of file
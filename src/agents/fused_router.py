@@ -0,0 +1,101 @@
+import logging
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+from src.agents.supervisor_agent import llm, ROUTE_GUIDE
+from src.agents.rag_agent import ANALYSIS_GUIDE
+from src.tools.source_resolver import get_source_resolver
+from src.agents.intent_router import get_intent_router, ROUTER_CONFIDENCE_THRESHOLD
+from src.tools.article_lookup import get_article_lookup
+
+logger = logging.getLogger(__name__)
+
+# --- BİRLEŞİK YÖNLENDİRME + ANALİZ ---
+# Klasik akışta bir RAG sorusu üç ardışık LLM çağrısı yapar: supervisor (Q3/RAG),
+# analizer (Q1/Q2 + target_source) ve responder. Bu modda rota, arama stratejisi ve
+# hedef kaynak TEK bir structured çağrıyla belirlenir; RAG alt grafı analizer'sız
+# çalışır (rag_retrieval_agent). Mod seçimi: main_graph.GRAPH_MODE ("classic" | "fused").
+
+class FusedDecision(BaseModel):
+    route: Literal["Q3", "RAG"] = Field(description="Q3: Özet/Genel Bakış, RAG: Doküman Analizi/Detay")
+    decision: Literal["Q1", "Q2"] = Field(
+        description="Sadece RAG için: 'Q1' (Nokta Atışı) veya 'Q2' (Geniş Arama)",
+        default="Q1"
+    )
+    target_source: Optional[str] = Field(
+        description="Eğer kullanıcı belirli bir belgeyi kastediyorsa tam dosya adı (Listeden seç), yoksa None",
+        default=None
+    )
+
+fused_chain = llm.with_structured_output(FusedDecision)
+
+def fused_router_node(state: dict):
+    """
+    Rota + strateji + hedef kaynak tek LLM çağrısıyla (Q3 / doğrudan madde yerelde kesinse hiç çağrı yok).
+    Yerel yönlendirici eminse rota her zaman onun kararıdır.
+    """
+    logger.info("👑 [FUSED ROUTER] Rota ve arama stratejisi birlikte belirleniyor...")
+    question = state["question"]
+
+    # Yerel yönlendirici eminse rota onundur (klasik moddaki supervisor_node ile aynı karar):
+    #   - Özet soruları için analiz gerekmez (Q3), LLM'e gidilmez
+    #   - Doğrudan madde sorusu (RAG + indekste karşılığı var) article_lookup düğümünde cevaplanır
+    #   - Diğer RAG sorularında birleşik çağrı sadece strateji ve hedef kaynak için kullanılır
+    local_route = None
+    router = get_intent_router()
+    if router is not None:
+        route = router.route(question)
+        if route.confidence >= ROUTER_CONFIDENCE_THRESHOLD:
+            local_route = route.label
+            if route.label == "Q3":
+                logger.info(f"⚡ Karar (yerel {route.source}): Q3 (güven: {route.confidence:.2f})")
+                return {"next_step": "Q3"}
+            lookup = get_article_lookup() if route.label == "RAG" else None
+            reference = lookup.parse(question) if lookup is not None else None
+            if reference is not None:
+                logger.info(f"⚡ Karar (yerel {route.source}): RAG | doğrudan madde {reference[0]} | MADDE {reference[1]}")
+                # Chunk'lar okunamazsa article_lookup düğümü bu kaynakta nokta atışı aramaya düşer
+                return {
+                    "next_step": "RAG",
+                    "decision": "Q1",
+                    "target_source": reference[0],
+                    "search_query": question,
+                }
+
+    resolver = get_source_resolver()
+    resolved_source, candidate_files = resolver.prompt_sources(question)
+    files_str = ", ".join(candidate_files) if candidate_files else f"{resolved_source} (kesin)"
+    prompt = f"""Sen bir Hukuk Asistanının hem yöneticisi hem de arama planlayıcısısın.
+
+    ### MEVCUT KAYNAKLAR (DOSYALAR):
+    [{files_str}]
+
+    Görevin kullanıcı sorusu için TEK seferde üç çıktı üretmektir:
+
+    A. ROTA (route):
+    {ROUTE_GUIDE}
+
+    B. Rota RAG ise arama planı:
+    {ANALYSIS_GUIDE}
+
+    SORU: {question}"""
+
+    try:
+        result = fused_chain.invoke(prompt)
+    except Exception as e:
+        if local_route == "RAG":
+            logger.error(f"Hata: {e}, yerel rota RAG, geniş arama seçiliyor.")
+            return {"next_step": "RAG", "decision": "Q2", "target_source": resolved_source, "search_query": question}
+        logger.error(f"Hata: {e}, Q3 seçiliyor.")
+        return {"next_step": "Q3"}
+
+    next_step = local_route or result.route
+    target_source = resolved_source or resolver.validate(result.target_source)
+    source_log = target_source if target_source else "TÜMÜ"
+    route_log = f"{next_step} (yerel)" if local_route else next_step
+    logger.info(f"➡️ Karar: {route_log} | STRATEJİ: {result.decision} | KAYNAK: {source_log}")
+    return {
+        "next_step": next_step,
+        "decision": result.decision,
+        "target_source": target_source,
+        "search_query": question,
+    }
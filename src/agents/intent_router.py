@@ -0,0 +1,184 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+import numpy as np
+from src import registry
+from src.vectordb.embedding import get_embedding_model_id
+from src.vectordb.embedding_cache import embed_query
+from src.tools.article_lookup import article_references, alias_text
+
+logger = logging.getLogger(__name__)
+
+# --- YEREL NİYET YÖNLENDİRİCİ (Supervisor hızlı yolu) ---
+# Q3 (özet/genel) / RAG (analiz/detay) kararı önce yerelde verilir:
+#   1. Kurallar: selamlaşma -> Q3, açık "Madde N" atfı -> RAG (güven 1.0)
+#   2. Soru embedding'i (MiniLM, sorgu önbelleğinden) üzerinde lojistik regresyon
+# Güven ROUTER_CONFIDENCE_THRESHOLD'un altındaysa supervisor LLM'e sorar ve LLM'in
+# kararı ROUTER_LOG_PATH'e yazılır; sonraki eğitimlerde örnek olarak kullanılır.
+#   Yeniden eğitim: python -m src.agents.intent_router --train
+#   Değerlendirme : python tests/eval_intent_router.py
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "1") == "1"
+ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", 0.8))
+ROUTER_MODEL_PATH = os.getenv("ROUTER_MODEL_PATH", "./models/intent_router.npz")
+ROUTER_LOG_PATH = os.getenv("ROUTER_LOG_PATH", "./logs/router_decisions.jsonl")
+LABELS = ("Q3", "RAG")
+
+# Etiketli senaryolar (tests/test_sv_agent.py senaryoları ve türevleri)
+SEED_EXAMPLES = [
+    # Q3: özet, genel bakış, belge envanteri, belirsiz kısa sorular
+    ("Elimizdeki belgeleri kısaca özetle.", "Q3"),
+    ("KVKK kanununda genel olarak neler var?", "Q3"),
+    ("Bana bir genel bakış sun.", "Q3"),
+    ("KVKK nedir?", "Q3"),
+    ("Veri güvenliği ile ilgili neler var?", "Q3"),
+    ("Hangi belgeler yüklü?", "Q3"),
+    ("Sistemde hangi kanun ve yönetmelikler var?", "Q3"),
+    ("Silme yönetmeliğini özetler misin?", "Q3"),
+    ("Yurt dışına aktarım yönetmeliği ne hakkında?", "Q3"),
+    ("Bu belgeler neyi düzenliyor?", "Q3"),
+    ("Kısaca KVKK'dan bahseder misin?", "Q3"),
+    ("Genel bir özet verir misin?", "Q3"),
+    ("Kişisel verilerin korunması kanunu neyi amaçlar, kısaca anlat.", "Q3"),
+    ("Belgelerin ana başlıkları neler?", "Q3"),
+    ("Neler sorabilirim?", "Q3"),
+    ("Bu sistem ne işe yarıyor?", "Q3"),
+    ("Yönetmelik genel olarak ne anlatıyor?", "Q3"),
+    ("Tüm dokümanların kısa bir özetini istiyorum.", "Q3"),
+    # RAG: madde, tanım, süre/limit, yükümlülük, senaryo analizi
+    ("Madde 11 kapsamında ilgili kişinin hakları nelerdir?", "RAG"),
+    ("Açık rıza aranmayan haller hangileridir?", "RAG"),
+    ("Veri sorumlusunun teknik yükümlülükleri hakkında analiz yap.", "RAG"),
+    ("kvkk madde 11i özetler misin", "RAG"),
+    ("Açık rızanın tanımı nedir?", "RAG"),
+    ("Veri ihlali kaç saat içinde Kurula bildirilmelidir?", "RAG"),
+    ("Kişisel verilerin silinmesi için azami süre ne kadardır?", "RAG"),
+    ("Özel nitelikli kişisel veriler hangi şartlarda işlenebilir?", "RAG"),
+    ("Yurt dışına veri aktarımında yeterlilik kararı yoksa ne yapılmalı?", "RAG"),
+    ("Veri sorumluları siciline kayıt yükümlülüğü kimleri kapsar?", "RAG"),
+    ("Aydınlatma yükümlülüğü kapsamında hangi bilgiler verilmelidir?", "RAG"),
+    ("İlgili kişinin başvurusuna kaç gün içinde cevap verilir?", "RAG"),
+    ("Bir çalışanın sağlık verisini işverenin işlemesi hukuka uygun mu?", "RAG"),
+    ("Kamera kayıtlarının saklanması hangi hükümlere tabidir?", "RAG"),
+    ("Periyodik imha süresi en fazla ne kadar olabilir?", "RAG"),
+    ("Anonim hale getirme ile silme arasındaki fark nedir?", "RAG"),
+    ("İdari para cezalarının alt ve üst sınırları nelerdir?", "RAG"),
+    ("Veri işleyen ile veri sorumlusu arasındaki sorumluluk paylaşımı nasıldır?", "RAG"),
+    ("Kişisel veri işleme şartları nelerdir?", "RAG"),
+    ("Bir müşteri verilerinin silinmesini isterse şirket ne yapmalı?", "RAG"),
+]
+
+_GREETING = re.compile(
+    r"^\W*(selam(lar)?|merhaba(lar)?|gunaydin|iyi (gunler|aksamlar|geceler)|"
+    r"hey|nasilsin|tesekkur(ler)?|tesekkur ederim|sag ol|kolay gelsin)\b"
+)
+_CONTENT_WORDS = re.compile(r"\b(madde|kanun|kvkk|yonetmelik|veri|riza|hak|sure|ceza|belge)")
+
+class RouteDecision:
+    def __init__(self, label, confidence, source):
+        self.label = label
+        self.confidence = confidence
+        self.source = source   # "rule" | "classifier"
+
+    def __repr__(self):
+        return f"RouteDecision({self.label}, {self.confidence:.2f}, {self.source})"
+
+def rule_route(question):
+    """Kesin kurallar: sadece selamlaşma -> Q3, "Madde N" atfı -> RAG. Eşleşme yoksa None."""
+    if article_references(question):
+        return RouteDecision("RAG", 1.0, "rule")
+    text = alias_text(question)
+    if _GREETING.search(text) and not _CONTENT_WORDS.search(text):
+        return RouteDecision("Q3", 1.0, "rule")
+    return None
+
+def load_logged_examples(path=ROUTER_LOG_PATH):
+    """Supervisor LLM'in loglanmış kararları -> [(soru, etiket)] (son karar geçerli)."""
+    if not os.path.exists(path):
+        return []
+    examples = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("decision") in LABELS:
+                examples[record["question"]] = record["decision"]
+    return list(examples.items())
+
+_log_lock = threading.Lock()
+
+def log_decision(question, decision, source="llm"):
+    os.makedirs(os.path.dirname(ROUTER_LOG_PATH) or ".", exist_ok=True)
+    record = {"question": question, "decision": decision, "source": source, "time": time.time()}
+    with _log_lock, open(ROUTER_LOG_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+class IntentRouter:
+    """Normalize soru embedding'i üzerinde ikili lojistik regresyon (P(RAG))."""
+    def __init__(self, coef, intercept, model_id, num_examples=0):
+        self.coef = np.asarray(coef, dtype=np.float32)
+        self.intercept = float(intercept)
+        self.model_id = model_id
+        self.num_examples = num_examples
+
+    @classmethod
+    def train(cls, examples, embed=embed_query, model_id=None):
+        from sklearn.linear_model import LogisticRegression
+
+        vectors = np.asarray([embed(q) for q, _ in examples], dtype=np.float32)
+        labels = np.asarray([LABELS.index(label) for _, label in examples])
+        classifier = LogisticRegression(C=10.0, class_weight="balanced", max_iter=1000)
+        classifier.fit(vectors, labels)
+        return cls(classifier.coef_[0], classifier.intercept_[0], model_id or get_embedding_model_id(), len(examples))
+
+    def save(self, path=ROUTER_MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(path, coef=self.coef, intercept=self.intercept, model_id=self.model_id, num_examples=self.num_examples)
+
+    @classmethod
+    def load(cls, path=ROUTER_MODEL_PATH):
+        """Kayıtlı model; yoksa veya farklı embedding modeliyle eğitildiyse None."""
+        if not os.path.exists(path):
+            return None
+        data = np.load(path)
+        if str(data["model_id"]) != get_embedding_model_id():
+            logger.warning("⚠️ Niyet yönlendirici farklı bir embedding modeliyle eğitilmiş, yeniden eğitilecek.")
+            return None
+        return cls(data["coef"], data["intercept"], str(data["model_id"]), int(data["num_examples"]))
+
+    def predict(self, question, embed=embed_query):
+        vector = np.asarray(embed(question), dtype=np.float32)
+        p_rag = 1.0 / (1.0 + np.exp(-(float(vector @ self.coef) + self.intercept)))
+        label = "RAG" if p_rag >= 0.5 else "Q3"
+        return RouteDecision(label, max(p_rag, 1.0 - p_rag), "classifier")
+
+    def route(self, question):
+        return rule_route(question) or self.predict(question)
+
+def train_intent_router(save=True):
+    examples = SEED_EXAMPLES + load_logged_examples()
+    router = IntentRouter.train(examples)
+    if save:
+        router.save()
+    logger.info(f"🧭 Niyet yönlendirici eğitildi ({len(examples)} örnek).")
+    return router
+
+def create_intent_router():
+    return IntentRouter.load() or train_intent_router()
+
+def get_intent_router():
+    """Süreç genelinde paylaşılan niyet yönlendirici (kapalıysa None)."""
+    if not INTENT_ROUTER_ENABLED:
+        return None
+    return registry.get_or_create("intent_router", create_intent_router)
+
+registry.register_loader("intent_router", get_intent_router)
+
+if __name__ == "__main__":
+    import sys
+    if "--train" in sys.argv:
+        train_intent_router()
@@ -24,7 +24,9 @@ logger.info("🚀 Rag Agent modülü yüklenmeye başladı...")
 try:
     logger.info("📦 Search Tool'lar (point/broad) içe aktarılıyor...")
     # Tools dosyanızın yeri src/tools/search_tools.py varsayılmıştır
-    from src.tools.search_tools import point_search_tool, broad_search_tool
+    from src.tools.search_tools import run_search, format_point_context
+    from src.tools.article_lookup import lookup_article
+    from src.tools.source_resolver import get_source_resolver
     logger.info("✅ Tool'lar başarıyla yüklendi.")
 except Exception as e:
     logger.error(f"❌ Tool'lar yüklenirken hata oluştu: {e}")
@@ -65,15 +67,6 @@ llm1 = ChatGoogleGenerativeAI(
     google_api_key=google_api_key 
 )
 
-# --- 3. DİNAMİK DOSYA LİSTESİ ALUCU ---
-def get_available_files(data_path="./data"):
-    """Data klasöründeki PDF dosyalarının listesini çeker."""
-    try:
-        files = [f for f in os.listdir(data_path) if f.endswith('.pdf')]
-        return files if files else ["Veritabanında dosya bulunamadı."]
-    except Exception:
-        return ["Veri klasörü okunamadı."]
-
 # --- 4. STATE VE ŞEMA ---
 class RagAgentState(TypedDict):
     question: str
@@ -81,6 +74,7 @@ class RagAgentState(TypedDict):
     target_source: Optional[str] # <--- YENİ: Hedef Dosya Adı
     search_query: str
     retrieved_context: str
+    degraded: Optional[bool]     # Arama kanatlarından biri düştü (kısmi bağlam, önbelleğe yazılmaz)
     response: str
 
 class AnalysisResult(BaseModel):
@@ -90,25 +84,9 @@ class AnalysisResult(BaseModel):
         default=None
     )
 
-# --- 5. DÜĞÜMLER (NODES) ---
-
-def analyzer_node(state: RagAgentState):
-    logger.info("🧠 [ANALIZER] Soru ve Hedef Kaynak analiz ediliyor...")
-    
-    # Mevcut dosyaları çekip prompta gömüyoruz
-    available_files = get_available_files()
-    files_str = ", ".join(available_files)
-    
-    structured_llm = llm1.with_structured_output(AnalysisResult)
-    
-    prompt = f"""Sen uzman bir Hukuk Bilgi Mimarı ve Arama Yöneticisisin.
-    
-    ### MEVCUT KAYNAKLAR (DOSYALAR):
-    [{files_str}]
-    
-    Görevin kullanıcı sorusunu analiz ederek 3 çıktı üretmektir:
-    
-    1. STRATEJİ SEÇİMİ (decision) - KRİTİK ADIM
+# Arama stratejisi ve hedef kaynak tanımları (birleşik modda da aynı metin kullanılır,
+# bkz. src/agents/fused_router.py)
+ANALYSIS_GUIDE = """1. STRATEJİ SEÇİMİ (decision) - KRİTİK ADIM
     
     **Q1 (ODAKLI ARAMA - "Bul ve Getir"):**
         - Belirli bir belge ile ilgili soru soruluyorsa.
@@ -124,11 +102,58 @@ def analyzer_node(state: RagAgentState):
     2. **target_source (Hedef Kaynak):**
        - Kullanıcı sorusunda yukarıdaki dosya listesinden birine atıf yapıyor mu? (Örn: "KVKK'da", "Yönetmelikte").
        - EĞER YAPIYORSA: Listeden en uygun dosya adını TAM OLARAK kopyala (Örn: 'KVKK_Kanunu.pdf').
-       - EĞER YAPMIYORSA veya GENEL SORUYORSA: null (None) döndür.
+       - EĞER YAPMIYORSA veya GENEL SORUYORSA: null (None) döndür."""
+
+# --- 5. DÜĞÜMLER (NODES) ---
+
+def article_lookup_node(state: RagAgentState):
+    """
+    "KVKK madde 5 ne diyor?" gibi doğrudan madde soruları (kaynak, madde no) indeksinden
+    cevaplanır: analizer LLM çağrısı, vektör/BM25 araması ve reranker atlanır.
+    """
+    hit = lookup_article(state["question"])
+    if hit is None:
+        return {}
+
+    (source, number), docs = hit
+    logger.info(f"📑 [LOOKUP] Doğrudan madde erişimi -> {source} | MADDE {number} ({len(docs)} chunk)")
+    return {
+        "decision": "LOOKUP",
+        "target_source": source,
+        "search_query": state["question"],
+        "retrieved_context": format_point_context(docs),
+    }
+
+def route_after_lookup(state: RagAgentState):
+    return "quality_control" if state.get("decision") == "LOOKUP" else "analizer"
+
+def route_after_lookup_analyzed(state: RagAgentState):
+    """Strateji ve hedef kaynak önceden belirlendiyse (birleşik mod) doğrudan aramaya geçilir."""
+    return "quality_control" if state.get("decision") == "LOOKUP" else "search"
+
+def analyzer_node(state: RagAgentState):
+    logger.info("🧠 [ANALIZER] Soru ve Hedef Kaynak analiz ediliyor...")
+    
+    # Tüm dosya listesi yerine yerel çözücünün aday kaynakları (açık atıf varsa hiç liste yok)
+    resolver = get_source_resolver()
+    resolved_source, candidate_files = resolver.prompt_sources(state['question'])
+    files_str = ", ".join(candidate_files) if candidate_files else f"{resolved_source} (kesin)"
+    
+    structured_llm = llm1.with_structured_output(AnalysisResult)
+    
+    prompt = f"""Sen uzman bir Hukuk Bilgi Mimarı ve Arama Yöneticisisin.
+    
+    ### MEVCUT KAYNAKLAR (DOSYALAR):
+    [{files_str}]
+    
+    Görevin kullanıcı sorusunu analiz ederek 3 çıktı üretmektir:
+    
+    {ANALYSIS_GUIDE}
     
     HAM SORU: {state['question']}"""
     
     result = structured_llm.invoke(prompt)
+    result.target_source = resolved_source or resolver.validate(result.target_source)
     
     source_log = result.target_source if result.target_source else "TÜMÜ"
     logger.info(f"⚖️ KARAR: {result.decision} | KAYNAK: {source_log} | SORGU: {state['question']}")
@@ -144,18 +169,16 @@ def search_node(state: RagAgentState):
     query = state["search_query"]
     target = state["target_source"] # State'den oku
     
-    # Tool'lara parametreleri sözlük (dict) olarak geçiyoruz
-    tool_args = {"query": query, "target_source": target}
-    
+    # Tool'larla aynı önbellekli arama; kısmi sonuç bayrağı state'e taşınır
     if decision == "Q1":
         logger.info(f"🎯 [SEARCH] Nokta Atışı Tetiklendi -> Kaynak: {target if target else 'None'}")
-        context = point_search_tool.invoke(tool_args)
+        context, degraded = run_search("point_search", query, target)
     else:
         logger.info(f"🌐 [SEARCH] Geniş Arama Tetiklendi -> Kaynak: {target if target else 'None'}")
-        context = broad_search_tool.invoke(tool_args)
+        context, degraded = run_search("broad_search", query, target)
         
-    logger.info(f"📚 [SEARCH] Veri çekildi (Uzunluk: {len(context)} karakter)")
-    return {"retrieved_context": context}
+    logger.info(f"📚 [SEARCH] Veri çekildi (Uzunluk: {len(context)} karakter{', KISMİ' if degraded else ''})")
+    return {"retrieved_context": context, "degraded": degraded}
 
 def quality_control_node(state: RagAgentState):
     # İleride buraya "Context boşsa tekrar ara" mantığı eklenebilir
@@ -182,16 +205,33 @@ def responder_node(state: RagAgentState):
 
 # --- 6. WORKFLOW KURULUMU ---
 
-def create_rag_agent():
+def create_rag_agent(analyze=True):
+    """
+    analyze=True : article_lookup -> analizer (LLM) -> search -> quality_control -> responder
+    analyze=False: decision / target_source state'te hazır gelir (birleşik yönlendirici),
+                   analizer düğümü yoktur: article_lookup -> search -> ...
+    """
     workflow = StateGraph(RagAgentState)
 
-    workflow.add_node("analizer", analyzer_node)
+    workflow.add_node("article_lookup", article_lookup_node)
+    if analyze:
+        workflow.add_node("analizer", analyzer_node)
     workflow.add_node("search", search_node)
     workflow.add_node("quality_control", quality_control_node)
     workflow.add_node("responder", responder_node)
 
-    workflow.set_entry_point("analizer")
-    workflow.add_edge("analizer", "search")
+    workflow.set_entry_point("article_lookup")
+    if analyze:
+        workflow.add_conditional_edges("article_lookup", route_after_lookup, {
+            "quality_control": "quality_control",
+            "analizer": "analizer",
+        })
+        workflow.add_edge("analizer", "search")
+    else:
+        workflow.add_conditional_edges("article_lookup", route_after_lookup_analyzed, {
+            "quality_control": "quality_control",
+            "search": "search",
+        })
     workflow.add_edge("search", "quality_control")
     workflow.add_edge("quality_control", "responder")
     workflow.add_edge("responder", END)
@@ -199,6 +239,7 @@ def create_rag_agent():
     return workflow.compile()
 
 rag_agent = create_rag_agent()
+rag_retrieval_agent = create_rag_agent(analyze=False)
 
 # --- 7. TEST ---
 if __name__ == "__main__":
@@ -5,6 +5,8 @@ from langchain_ollama import ChatOllama, OllamaEmbeddings
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
 from src.vectordb.embedding import get_embedding_model
+from src.vectordb.embedding_cache import embed_query
+from src import registry
 from langchain_google_genai import ChatGoogleGenerativeAI
 import os 
 
@@ -44,7 +46,7 @@ llm = ChatGoogleGenerativeAI(
 )
 
 # --- 2. BAĞLANTI FONKSİYONLARI ---
-def get_summary_db():
+def create_summary_db_client():
     """Özet veritabanına bağlanır."""
     if not os.path.exists(DB_PATH):
         logger.warning("⚠️ Özet veritabanı bulunamadı! vectorize.py ile özet oluşturulmalı.")
@@ -59,6 +61,12 @@ def get_summary_db():
         collection_name=COLLECTION_NAME
     )
 
+def get_summary_db():
+    """Paylaşılan özet veritabanı bağlantısı (her Q3 isteğinde model yeniden yüklenmez)."""
+    return registry.get_or_create("summary_store", create_summary_db_client)
+
+registry.register_loader("summary_store", get_summary_db)
+
 # --- 3. SUMMARIZE NODE (DÜĞÜM) ---
 def summarize_node(state: dict):
     """
@@ -79,7 +87,8 @@ def summarize_node(state: dict):
         # Eğer kullanıcı "KVKK" dediyse KVKK özeti en üste gelir.
         # Eğer "Neler var?" dediyse genel başlıklar gelir.
         try:
-            results = db.similarity_search(question, k=3)
+            # Sorgu vektörü isteğin diğer aramalarıyla paylaşılır (süreç içi önbellek)
+            results = db.similarity_search_by_vector(embed_query(question), k=3)
             
             # Gelen dökümanları birleştir
             for i, doc in enumerate(results):
@@ -6,6 +6,7 @@ from langgraph.graph import StateGraph, END
 from dotenv import load_dotenv
 import os
 from langchain_google_genai import ChatGoogleGenerativeAI
+from src.agents.intent_router import get_intent_router, log_decision, ROUTER_CONFIDENCE_THRESHOLD
 
 # Logger
 logger = logging.getLogger(__name__)
@@ -42,10 +43,10 @@ class RagAgentState(TypedDict):
     # İleride eklenebilir: history: list, documents: list vb.
 
 class SupervisorDecision(BaseModel):
+    # Sadece karar istenir: kullanılmayan bir gerekçe metni üretmek çıktı token'ı ve gecikme demek
     decision: Literal["Q3", "RAG"] = Field(
         description="Q3: Özet/Genel Bakış, RAG: Doküman Analizi/Detay"
     )
-    reasoning: str = Field(description="Kararın gerekçesi")
 
 # --- 2. LLM SETUP ---
 #llm = ChatOllama(model="gemma3:4b-it-qat", temperature=0)
@@ -55,25 +56,46 @@ supervisor_chain = llm.with_structured_output(SupervisorDecision)
 def supervisor_node(state: RagAgentState):
     """Niyet okuyan ve rotayı belirleyen düğüm."""
     logger.info("👑 [SUPERVISOR] Rota belirleniyor...")
-    
-    prompt = f"""Hukuk Asistanı Yöneticisisin. Kullanıcının niyetine göre rotayı belirle:
 
-    1. Q3 (Özet/Genel): 
+    # Hızlı yol: yerel yönlendirici (kurallar + embedding sınıflandırıcı) yeterince eminse LLM çağrılmaz
+    router = get_intent_router()
+    if router is not None:
+        route = router.route(state['question'])
+        if route.confidence >= ROUTER_CONFIDENCE_THRESHOLD:
+            logger.info(f"⚡ Karar (yerel {route.source}): {route.label} (güven: {route.confidence:.2f})")
+            return {"next_step": route.label}
+        logger.info(f"🤔 Yerel yönlendirici emin değil ({route.label}, {route.confidence:.2f}), LLM'e soruluyor.")
+
+    return {"next_step": llm_route(state['question'])}
+
+# Rota tanımları (birleşik modda da aynı metin kullanılır, bkz. src/agents/fused_router.py)
+ROUTE_GUIDE = """1. Q3 (Özet/Genel): 
        - Genel özet, belge sorgusu ("neler var?", "bu nedir?" vb.), selamlaşma ("Merhaba") veya detay belirtilmeyen her türlü query. 
        - Niyet net değilse DEFAULT olarak bunu seç.
 
     2. RAG (Analiz/Detay): 
-       - Spesifik madde ("Madde 11"), hukuki tanım, senaryo analizi veya detaylı mevzuat sorgusu.
+       - Spesifik madde ("Madde 11"), hukuki tanım, senaryo analizi veya detaylı mevzuat sorgusu."""
+
+def llm_route(question, log=True):
+    """
+    Supervisor LLM kararı. Karar, yönlendiricinin sonraki eğitimleri için loglanır
+    (log=False: değerlendirme gibi eğitim verisine karışmaması gereken çağrılar).
+    """
+    prompt = f"""Hukuk Asistanı Yöneticisisin. Kullanıcının niyetine göre rotayı belirle:
+
+    {ROUTE_GUIDE}
 
-    SORU: {state['question']}"""
+    SORU: {question}"""
     
     try:
         result = supervisor_chain.invoke(prompt)
-        logger.info(f"➡️ Karar: {result.decision} ({result.reasoning})")
-        return {"next_step": result.decision}
+        logger.info(f"➡️ Karar: {result.decision}")
+        if log:
+            log_decision(question, result.decision)
+        return result.decision
     except Exception as e:
         logger.error(f"Hata: {e}, Q3 seçiliyor.")
-        return {"next_step": "Q3"}
+        return "Q3"
 
 # --- 4. WORKFLOW KURULUMU (Senin İstediğin Format) ---
 def create_supervisor_agent():
@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from src import registry
+from src.vectordb.embedding_cache import normalize_text
+from src.vectordb.index_version import current_index_version
+
+logger = logging.getLogger(__name__)
+
+# --- TAM EŞLEŞME ÖNBELLEĞİ (cevaplar + araç çıktıları) ---
+# Normalize edilmiş aynı soru (/chat) veya aynı (query, target_source) ile çağrılan
+# point_search_tool / broad_search_tool sonuçları saklanır. Anahtar indeks sürümünü
+# içerir (src/vectordb/index_version.py); ingestion sürümü değiştirince eski kayıtlar
+# hiç eşleşmez ve ilk erişimde temizlenir. Kanatlardan biri zaman aşımı/hata verdiyse
+# (kısmi sonuç) veya hiç sonuç bulunamadıysa araç çıktısı ve o /chat cevabı yazılmaz.
+# Backend:
+#   "memory": süreç içi LRU (varsayılan)
+#   "sqlite": yerel SQLite dosyası; aynı makinedeki tüm uvicorn worker'ları paylaşır
+#   "off"   : kapalı
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "./cache/response_cache.sqlite3")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 5000))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 24 * 3600))   # saniye
+# SQLite okumaları yazma kilidi almaz: last_used ve sayaç güncellemeleri bellekte
+# biriktirilip bu kadar okumada / sürede bir tek işlemde yazılır
+SQLITE_FLUSH_EVERY = int(os.getenv("RESPONSE_CACHE_FLUSH_EVERY", 50))
+SQLITE_FLUSH_INTERVAL = float(os.getenv("RESPONSE_CACHE_FLUSH_INTERVAL", 5.0))   # saniye
+
+def normalize_key_part(value):
+    """Anahtar parçası: metinler NFC + boşluk sadeleştirme + küçük harf, sondaki noktalama atılır."""
+    if isinstance(value, str):
+        return normalize_text(value).casefold().rstrip(" ?!.")
+    return value
+
+class MemoryBackend:
+    """Thread-safe LRU + TTL (süreç içi)."""
+    name = "memory"
+
+    def __init__(self, max_size=RESPONSE_CACHE_SIZE):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()   # anahtar -> (sürüm, değer, son geçerlilik)
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key, now):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[2] < now:
+                if entry is not None:
+                    del self.entries[key]
+                self.counters["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry[1]
+
+    def put(self, key, version, value, expires):
+        with self.lock:
+            self.entries[key] = (version, value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def purge(self, version):
+        """Bu sürüme ait olmayan kayıtları siler."""
+        with self.lock:
+            for key in [k for k, entry in self.entries.items() if entry[0] != version]:
+                del self.entries[key]
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, entries=len(self.entries))
+
+class SqliteBackend:
+    """
+    SQLite (WAL) üzerinde LRU + TTL. Kayıtlar ve sayaçlar dosyadadır; böylece aynı
+    makinedeki tüm worker süreçleri hem önbelleği hem istatistikleri paylaşır.
+    Her thread kendi bağlantısını kullanır. get() sadece SELECT yapar; LRU dokunuşları
+    ve isabet/kaçırma sayaçları toplu yazılır (flush), okuyucular yazma kilidinde sıraya girmez.
+    """
+    name = "sqlite"
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, max_size=RESPONSE_CACHE_SIZE,
+                 flush_every=SQLITE_FLUSH_EVERY, flush_interval=SQLITE_FLUSH_INTERVAL):
+        self.path = path
+        self.max_size = max_size
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.local = threading.local()
+        self.pending_lock = threading.Lock()
+        self.pending_touches = {}   # anahtar -> son kullanım
+        self.pending_counts = {"hits": 0, "misses": 0}
+        self.pending_reads = 0
+        self.last_flush = time.time()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, version TEXT, value TEXT, expires REAL, last_used REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+            conn.executemany(
+                "INSERT OR IGNORE INTO counters VALUES (?, 0)", [("hits",), ("misses",), ("evictions",)]
+            )
+
+    def _connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _count(self, conn, name, amount=1):
+        conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def get(self, key, now):
+        row = self._connect().execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+        hit = row is not None and row[1] >= now
+        with self.pending_lock:
+            self.pending_counts["hits" if hit else "misses"] += 1
+            if hit:
+                self.pending_touches[key] = now
+            self.pending_reads += 1
+            due = self.pending_reads >= self.flush_every or now - self.last_flush >= self.flush_interval
+        if due:
+            self.flush()
+        return json.loads(row[0]) if hit else None
+
+    def flush(self):
+        """Biriken LRU dokunuşlarını ve sayaçları tek işlemde yazar; süresi dolanları siler."""
+        with self.pending_lock:
+            touches, counts = self.pending_touches, self.pending_counts
+            self.pending_touches, self.pending_counts = {}, {"hits": 0, "misses": 0}
+            self.pending_reads = 0
+            self.last_flush = time.time()
+        conn = self._connect()
+        with conn:
+            if touches:
+                conn.executemany(
+                    "UPDATE entries SET last_used = MAX(last_used, ?) WHERE key = ?",
+                    [(used, key) for key, used in touches.items()],
+                )
+            for name, amount in counts.items():
+                if amount:
+                    self._count(conn, name, amount)
+            conn.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+
+    def put(self, key, version, value, expires):
+        # Tahliye sırası güncel LRU bilgisiyle yapılsın
+        self.flush()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, version, json.dumps(value, ensure_ascii=False), expires, time.time()),
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_size
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_used LIMIT ?)",
+                    (overflow,),
+                )
+                self._count(conn, "evictions", overflow)
+
+    def purge(self, version):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE version != ?", (version,))
+
+    def stats(self):
+        self.flush()
+        conn = self._connect()
+        counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        counters["entries"] = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return counters
+
+class ResponseCache:
+    """
+    (ad alanı, argümanlar, indeks sürümü) -> JSON'a çevrilebilir değer.
+    Süreler time.time() ile tutulur; SQLite'ta TTL süreçler arası karşılaştırılabilir.
+    """
+    def __init__(self, backend, ttl=RESPONSE_CACHE_TTL, version=current_index_version):
+        self.backend = backend
+        self.ttl = ttl
+        self.version = version
+        self.index_version = version()
+        # Paylaşılan (SQLite) depoda önceki sürümlerden kalan kayıtlar
+        self.backend.purge(self.index_version)
+
+    def _current_version(self):
+        version = self.version()
+        if version != self.index_version:
+            logger.info(f"♻️ [RESPONSE CACHE] İndeks sürümü değişti ({self.index_version} -> {version}), eski kayıtlar siliniyor.")
+            self.index_version = version
+            self.backend.purge(version)
+        return version
+
+    def make_key(self, namespace, args, version):
+        payload = json.dumps([namespace, version, [normalize_key_part(a) for a in args]], ensure_ascii=False)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get(self, namespace, *args):
+        key = self.make_key(namespace, args, self._current_version())
+        return self.backend.get(key, time.time())
+
+    def put(self, namespace, value, *args):
+        version = self._current_version()
+        self.backend.put(self.make_key(namespace, args, version), version, value, time.time() + self.ttl)
+
+    def get_or_compute(self, namespace, func, *args, cacheable=None):
+        """cacheable(değer) False dönerse (ör. kısmi/bozuk sonuç) değer önbelleğe yazılmaz."""
+        value = self.get(namespace, *args)
+        if value is None:
+            value = func(*args)
+            if value is not None and (cacheable is None or cacheable(value)):
+                self.put(namespace, value, *args)
+        return value
+
+    def stats(self):
+        stats = self.backend.stats()
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / total, 4) if total else 0.0
+        stats["backend"] = self.backend.name
+        stats["index_version"] = self.index_version
+        return stats
+
+def create_response_cache():
+    if RESPONSE_CACHE_BACKEND == "off":
+        return None
+    if RESPONSE_CACHE_BACKEND == "sqlite":
+        backend = SqliteBackend()
+    else:
+        backend = MemoryBackend()
+    logger.info(f"🗃️ Yanıt önbelleği: {backend.name}")
+    return ResponseCache(backend)
+
+def get_response_cache():
+    """Süreç genelinde paylaşılan tam eşleşme önbelleği (kapalıysa None)."""
+    return registry.get_or_create("response_cache", create_response_cache, cache_none=True)
+
+def cached_call(namespace, func, *args, cacheable=None):
+    """Önbellek açıksa func(*args) sonucunu önbellekten okur/yazar, kapalıysa doğrudan çağırır."""
+    cache = get_response_cache()
+    if cache is None:
+        return func(*args)
+    return cache.get_or_compute(namespace, func, *args, cacheable=cacheable)
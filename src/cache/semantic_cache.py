@@ -0,0 +1,157 @@
+import os
+import re
+import time
+import logging
+import threading
+import numpy as np
+from src import registry
+from src.vectordb.embedding_cache import embed_query, normalize_text
+from src.vectordb.index_version import current_index_version
+
+logger = logging.getLogger(__name__)
+
+# --- SEMANTİK CEVAP ÖNBELLEĞİ ---
+# /chat cevapları soru embedding'iyle saklanır. Yeni soru, önbellekteki bir soruya
+# kosinüs benzerliği SEMANTIC_CACHE_THRESHOLD'u geçecek kadar yakınsa ("açık rıza
+# nedir" ~ "açık rıza ne demek") graph hiç çalışmadan kayıtlı cevap döner.
+# - Kayıtlar SEMANTIC_CACHE_TTL saniye geçerlidir.
+# - Kapasite dolunca en uzun süredir kullanılmayan kayıt atılır (LRU).
+# - İndeks sürümü (src/vectordb/index_version.py) değişince önbellek boşaltılır.
+# - Sorudaki sayılar (madde no, süre, tutar) birebir aynı olmalıdır: "madde 5" ile
+#   "madde 6" embedding'de çok yakın olsa da farklı sorulardır.
+# - Sorunun atıf yaptığı kaynaklar (takma ad / dosya adı) da aynı olmalıdır: "silme
+#   yönetmeliğinde süre" ile "KVKK'da süre" farklı belgelerin cevabıdır.
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", 24 * 3600))   # saniye
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", 2000))
+
+_NUMBERS = re.compile(r"\d+")
+
+def question_numbers(text):
+    return frozenset(_NUMBERS.findall(text))
+
+def question_sources(text):
+    """Sorunun takma ad / dosya adıyla atıf yaptığı kaynaklar (src/tools/source_resolver.py)."""
+    from src.tools.source_resolver import get_source_resolver
+    return get_source_resolver().referenced_sources(text)
+
+class SemanticCache:
+    """
+    Thread-safe semantik önbellek. Vektörler sabit kapasiteli bir NumPy matrisinde
+    tutulur; arama tek bir (kapasite x boyut) @ (boyut) çarpımıdır.
+    """
+    def __init__(self, embed=embed_query, threshold=SEMANTIC_CACHE_THRESHOLD,
+                 ttl=SEMANTIC_CACHE_TTL, max_size=SEMANTIC_CACHE_SIZE, version=current_index_version,
+                 sources=question_sources):
+        self.embed = embed
+        self.sources = sources
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self.version = version
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._reset(self.version())
+
+    def _reset(self, version):
+        self.index_version = version
+        self.vectors = None                                   # (max_size, boyut), ilk kayıtta ayrılır
+        self.live = np.zeros(self.max_size, dtype=bool)
+        self.expires = np.zeros(self.max_size, dtype=np.float64)
+        self.last_used = np.zeros(self.max_size, dtype=np.float64)
+        self.entries = [None] * self.max_size                 # slot -> (normalize soru, (sayılar, kaynaklar), payload)
+        self.slots = {}                                       # normalize soru -> slot
+
+    def _vector(self, question):
+        vector = np.asarray(self.embed(question), dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _guard(self, question):
+        """Benzerlikten bağımsız birebir eşleşmesi gereken kısım: sayılar + atıf yapılan kaynaklar."""
+        return question_numbers(question), self.sources(question)
+
+    def _check_version(self):
+        version = self.version()
+        if version != self.index_version:
+            if self.live.any():
+                logger.info(f"♻️ [SEMANTIC CACHE] İndeks sürümü değişti, {int(self.live.sum())} kayıt geçersiz.")
+            self._reset(version)
+
+    def lookup(self, question):
+        """Yeterince benzer, süresi geçmemiş bir kayıt varsa payload'ını döner; yoksa None."""
+        vector = self._vector(question)
+        guard = self._guard(question)
+        now = time.monotonic()
+        with self.lock:
+            self._check_version()
+            expired = self.live & (self.expires < now)
+            self.live &= ~expired
+            if self.vectors is None or not self.live.any():
+                self.misses += 1
+                return None
+
+            similarity = self.vectors @ vector
+            similarity[~self.live] = -np.inf
+            for slot in np.argsort(-similarity):
+                if similarity[slot] < self.threshold:
+                    break
+                _, slot_guard, payload = self.entries[slot]
+                if slot_guard == guard:
+                    self.last_used[slot] = now
+                    self.hits += 1
+                    logger.info(f"⚡ [SEMANTIC CACHE] İsabet (benzerlik: {similarity[slot]:.3f})")
+                    return dict(payload, cache_similarity=float(similarity[slot]))
+            self.misses += 1
+            return None
+
+    def store(self, question, payload):
+        vector = self._vector(question)
+        guard = self._guard(question)
+        key = normalize_text(question)
+        now = time.monotonic()
+        with self.lock:
+            self._check_version()
+            if self.vectors is None:
+                self.vectors = np.zeros((self.max_size, len(vector)), dtype=np.float32)
+
+            # Aynı soru zaten varsa üzerine yazılır; yoksa boş slot, o da yoksa LRU kurbanı
+            slot = self.slots.get(key)
+            if slot is None:
+                if not self.live.all():
+                    slot = int(np.argmin(self.live))
+                else:
+                    slot = int(np.argmin(self.last_used))
+                    self.evictions += 1
+                if self.entries[slot] is not None:
+                    del self.slots[self.entries[slot][0]]
+                self.slots[key] = slot
+
+            self.vectors[slot] = vector
+            self.entries[slot] = (key, guard, dict(payload))
+            self.live[slot] = True
+            self.expires[slot] = now + self.ttl
+            self.last_used[slot] = now
+
+    def clear(self):
+        with self.lock:
+            self._reset(self.version())
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": int(self.live.sum()),
+            "index_version": self.index_version,
+        }
+
+def get_semantic_cache():
+    """Süreç genelinde paylaşılan semantik cevap önbelleği (kapalıysa None)."""
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    return registry.get_or_create("semantic_cache", SemanticCache)
@@ -1,3 +1,4 @@
+import os
 import logging
 from typing import TypedDict, Optional
 from langgraph.graph import StateGraph, END
@@ -14,6 +15,10 @@ try:
     
     # C. Summarizer (Bu tek bir node/tool olduğu için fonksiyon olarak kalabilir)
     from src.agents.summarize_node import summarize_node
+
+    # D. Birleşik mod: tek çağrıda rota + strateji + kaynak, analizer'sız RAG alt grafı
+    from src.agents.fused_router import fused_router_node
+    from src.agents.rag_agent import rag_retrieval_agent
     
 except ImportError as e:
     print(f"❌ Import hatası: {e}")
@@ -23,6 +28,11 @@ except ImportError as e:
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Graph modu (A/B karşılaştırması için ikisi de seçilebilir):
+#   "classic": supervisor LLM -> analizer LLM -> responder LLM (3 ardışık çağrı)
+#   "fused"  : birleşik yönlendirici (rota + Q1/Q2 + target_source tek çağrı) -> responder LLM
+GRAPH_MODE = os.getenv("GRAPH_MODE", "classic")
+
 # --- 2. ORTAK STATE (Hafıza) ---
 # Subgraph'lar arası veri kaybı olmaması için geniş bir state tutuyoruz.
 class MainAgentState(TypedDict):
@@ -31,15 +41,21 @@ class MainAgentState(TypedDict):
     
     # RAG Agent çıktıları
     decision: Optional[str]     
+    target_source: Optional[str]
     search_query: Optional[str]
     retrieved_context: Optional[str]
+    degraded: Optional[bool]    # Kısmi arama sonucu: cevap önbelleklere yazılmaz
     
     response: Optional[str]     # Nihai cevap
 
 # --- 3. ANA ORKESTRA (MAIN GRAPH) ---
 
-def create_main_graph():
-    
+def create_main_graph(mode=None):
+    mode = mode or GRAPH_MODE
+    if mode not in ("classic", "fused"):
+        raise ValueError(f"Bilinmeyen GRAPH_MODE: {mode} ('classic' veya 'fused')")
+    logger.info(f"🗺️ Main graph modu: {mode}")
+
     workflow = StateGraph(MainAgentState)
 
     # --- DÜĞÜMLERİ EKLE (SUBGRAPHS & NODES) ---
@@ -47,10 +63,14 @@ def create_main_graph():
     # 1. Supervisor SUBGRAPH
     # LangGraph, bir düğüm yerine başka bir 'Compiled Graph' koymana izin verir.
     # Supervisor işini bitirip END'e ulaştığında, çıktısını buraya bırakır.
-    workflow.add_node("supervisor_brain", supervisor_agent)
+    # Birleşik modda aynı düğüm adıyla tek çağrılık yönlendirici kullanılır.
+    if mode == "fused":
+        workflow.add_node("supervisor_brain", fused_router_node)
+    else:
+        workflow.add_node("supervisor_brain", supervisor_agent)
     
-    # 2. RAG SUBGRAPH (Mavi Kutu)
-    workflow.add_node("rag_machinery", rag_agent)
+    # 2. RAG SUBGRAPH (Mavi Kutu) - birleşik modda analizer düğümü yoktur
+    workflow.add_node("rag_machinery", rag_retrieval_agent if mode == "fused" else rag_agent)
     
     # 3. Summarizer NODE
     workflow.add_node("summarizer_tool", summarize_node)
@@ -81,4 +101,60 @@ def create_main_graph():
     return workflow.compile()
 
 # --- 4. APP ---
-app = create_main_graph()
\ No newline at end of file
+app = create_main_graph()
+
+# --- 5. AKIŞ (STREAMING) ---
+# /chat/stream için graph LangGraph stream API'siyle çalıştırılır:
+#   "updates"  (subgraphs dahil): biten her düğüm için ilerleme olayı
+#   "messages": cevap düğümlerindeki LLM'in token'ları (yönlendirme/analiz çağrılarının
+#               structured çıktıları kullanıcıya akıtılmaz)
+#   "values"  : ana graph'ın son durumu (rota, karar, nihai cevap)
+NODE_LABELS = {
+    "supervisor_brain": "🧭 Rota belirlendi",
+    "article_lookup": "📌 Madde atfı kontrol edildi",
+    "analizer": "🧠 Arama stratejisi ve hedef kaynak belirlendi",
+    "search": "🔎 Arama ve yeniden sıralama (rerank) tamamlandı",
+    "quality_control": "🛡️ Bağlam kontrol edildi",
+}
+ANSWER_NODES = ("responder", "summarizer_tool")
+
+def chunk_text(content):
+    """Mesaj parçasının içeriğini düz metne çevirir (str ya da parça listesi gelebilir)."""
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content or []:
+        if isinstance(part, str):
+            parts.append(part)
+        elif isinstance(part, dict) and isinstance(part.get("text"), str):
+            parts.append(part["text"])
+    return "".join(parts)
+
+def stream_events(question, graph=None):
+    """
+    Soruyu graph'ta çalıştırıp (olay, veri) çiftleri üretir:
+      ("progress", {"node", "label"}) -> bir düğüm bitti
+      ("token", {"text"})             -> cevap token'ı
+      ("done", final_state)           -> ana graph'ın son durumu
+    """
+    graph = graph or app
+    initial_state = {"question": question, "next_step": None, "response": None}
+    final_state = dict(initial_state)
+
+    for namespace, mode, data in graph.stream(
+        initial_state, stream_mode=["updates", "messages", "values"], subgraphs=True
+    ):
+        if mode == "messages":
+            chunk, metadata = data
+            if metadata.get("langgraph_node") in ANSWER_NODES:
+                text = chunk_text(chunk.content)
+                if text:
+                    yield "token", {"text": text}
+        elif mode == "updates":
+            for node in data:
+                if node in NODE_LABELS:
+                    yield "progress", {"node": node, "label": NODE_LABELS[node]}
+        elif not namespace:
+            final_state = data
+
+    yield "done", final_state
\ No newline at end of file
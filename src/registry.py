@@ -0,0 +1,64 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# --- SÜREÇ GENELİ MODEL / VERİTABANI KAYDI (REGISTRY) ---
+# Embedding modeli, reranker ve Chroma bağlantıları gibi pahalı nesneler süreç
+# başına BİR KEZ oluşturulur ve tüm düğümler (node) aynı örneği kullanır.
+# Modüller kendi yükleyicilerini register_loader ile kaydeder; startup() hepsini
+# önceden (FastAPI açılışında) yükler, shutdown() kayıtları boşaltır.
+
+_LOCK = threading.RLock()
+_INSTANCES = {}
+_LOADERS = {}
+_MISSING = object()
+
+def get_or_create(key, factory, cache_none=False):
+    """
+    key için kayıtlı örneği döner, yoksa factory() ile bir kez oluşturur.
+    factory None dönerse (örn. veritabanı henüz yok) sonuç varsayılan olarak
+    önbelleğe alınmaz; cache_none=True ise None da saklanır (tekrar denenmez).
+    """
+    instance = _INSTANCES.get(key, _MISSING)
+    if instance is not _MISSING:
+        return instance
+
+    with _LOCK:
+        instance = _INSTANCES.get(key, _MISSING)
+        if instance is not _MISSING:
+            return instance
+        start = time.time()
+        instance = factory()
+        if instance is not None or cache_none:
+            _INSTANCES[key] = instance
+            logger.info(f"📦 [REGISTRY] '{key}' yüklendi ({time.time() - start:.2f}sn)")
+    return instance
+
+def evict(key):
+    """Kayıtlı örneği bırakır (örn. veritabanı klasörü silindiğinde)."""
+    with _LOCK:
+        _INSTANCES.pop(key, None)
+
+def register_loader(key, loader):
+    """startup() sırasında çağrılacak yükleyiciyi kaydeder."""
+    _LOADERS[key] = loader
+
+def startup():
+    """Kayıtlı tüm modelleri ve veritabanlarını önceden yükler (lifecycle hook)."""
+    logger.info(f"🚀 [REGISTRY] Ön yükleme başlıyor: {list(_LOADERS)}")
+    for key, loader in _LOADERS.items():
+        try:
+            loader()
+        except Exception as e:
+            logger.error(f"❌ [REGISTRY] '{key}' yüklenemedi: {e}")
+
+def shutdown():
+    """Tüm kayıtlı örnekleri bırakır (lifecycle hook)."""
+    with _LOCK:
+        _INSTANCES.clear()
+    logger.info("🛑 [REGISTRY] Kayıtlı modeller bırakıldı.")
+
+def loaded_keys():
+    return sorted(_INSTANCES)
@@ -0,0 +1,205 @@
+import os
+import re
+import json
+import logging
+from langchain_core.documents import Document
+from src import registry
+from src.tools.keyword_index import turkish_lower
+
+logger = logging.getLogger(__name__)
+
+# --- DOĞRUDAN MADDE ERİŞİMİ ---
+# "KVKK madde 5 ne diyor?" gibi sorular için (kaynak, madde no) -> chunk ID'leri
+# tam eşleşme indeksi. İndeks ingestion sırasında (vectorize.py) dosya başına
+# çıkarılıp bu JSON'a yazılır; soru içindeki madde atfı ve kaynak takma adı
+# regex ile bulunur ve vektör/BM25/reranker zinciri tamamen atlanır.
+ARTICLE_INDEX_PATH = "./chromadb/article_index.json"
+ARTICLE_INDEX_VERSION = 1
+
+# Dosya adından türetilemeyen takma adlar (katlanmış/ASCII yazımla). Hedef dosya
+# veritabanında yoksa takma ad yok sayılır.
+SOURCE_ALIASES = {
+    "kvkk": "kvkk.pdf",
+    "6698": "kvkk.pdf",
+    "kisisel verilerin korunmasi kanunu": "kvkk.pdf",
+    "silme yonetmeligi": "kisisel-verilerin-silinmesi.pdf",
+    "imha yonetmeligi": "kisisel-verilerin-silinmesi.pdf",
+    "yurt disina aktarim yonetmeligi": "kisisel-verilerin-yurt-disina-aktarilmasi.pdf",
+}
+
+_TURKISH_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+_NON_WORD = re.compile(r"[^\w]+")
+
+# "madde 5", "md. 5", "m.5" | "5. madde", "5 inci madde", "3'üncü madde"
+# fold_text üzerinde aranır (noktalama korunur); "md"/"m" kısaltmalarında nokta zorunludur,
+# "m2", "m 3" gibi ifadeler madde atfı sayılmaz.
+ARTICLE_PATTERNS = [
+    re.compile(r"\bmadde\s*(\d+)(?!\d)"),                 # "madde 11i" gibi bitişik ek kabul
+    re.compile(r"(?<!\w)(?:md|m)\.\s*(\d+)(?!\d)"),
+    re.compile(r"\b(\d+)\s*(?:\.|'?\s*(?:i|u)?nc(?:i|u))?\s*madde"),
+]
+# Karşılaştırma soruları tek maddeden cevaplanamaz, normal aramaya gider
+COMPARATIVE = re.compile(r"\b(karsilastir\w*|kiyas\w*|fark\w*|arasindaki|vs|versus)\b")
+ARTICLE_NUMBER = re.compile(r"MADDE\s+(\d+)")
+
+def fold_text(text):
+    """Türkçe küçük harf + ASCII katlama ("Kişisel" -> "kisisel")."""
+    return turkish_lower(text).translate(_TURKISH_FOLD)
+
+def alias_text(text):
+    return " ".join(_NON_WORD.sub(" ", fold_text(text).replace("_", " ")).split())
+
+def article_references(question):
+    """Sorudaki madde atıflarının numaraları (tekrarsız, bulunma sırasıyla)."""
+    text = fold_text(question)
+    numbers = []
+    for pattern in ARTICLE_PATTERNS:
+        for match in pattern.finditer(text):
+            if match.group(1) not in numbers:
+                numbers.append(match.group(1))
+    return numbers
+
+def article_number(madde_no):
+    """'MADDE 5' / 'MADDE  5' -> '5'. Madde etiketi olmayan chunk'lar için None."""
+    match = ARTICLE_NUMBER.search(madde_no or "")
+    return match.group(1) if match else None
+
+def build_article_entries(documents, chunk_ids):
+    """Bir dosyanın chunk'larından madde no -> chunk ID'leri (sırasıyla) eşlemesi (ingestion)."""
+    articles = {}
+    for doc, chunk_id in zip(documents, chunk_ids):
+        number = article_number(doc.metadata.get("madde_no"))
+        if number is not None:
+            articles.setdefault(number, []).append(chunk_id)
+    return articles
+
+def save_article_index(files):
+    """Manifest'teki dosya kayıtlarından (articles alanı) indeks dosyasını atomik olarak yazar."""
+    index = {
+        "version": ARTICLE_INDEX_VERSION,
+        "sources": {source: entry.get("articles", {}) for source, entry in files.items()},
+    }
+    os.makedirs(os.path.dirname(ARTICLE_INDEX_PATH), exist_ok=True)
+    tmp_path = ARTICLE_INDEX_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, ARTICLE_INDEX_PATH)
+
+# Takma addan sonra gelebilecek Türkçe ekler (alias_text ile katlanmış hali):
+# "yonetmeliginde", "kvkkya", "kanununun". Başka bir devam ("b" -> "bir") eşleşmez.
+ALIAS_SUFFIXES = (
+    "a", "e", "i", "u", "n", "ya", "ye", "yi", "yu", "in", "un", "nin", "nun",
+    "da", "de", "ta", "te", "dan", "den", "tan", "ten", "daki", "deki", "taki", "teki",
+    "na", "ne", "ni", "nu", "nda", "nde", "ndan", "nden", "ndaki", "ndeki",
+    "la", "le", "yla", "yle", "ca", "ce",
+)
+MIN_ALIAS_LENGTH = 3   # "b.pdf" gibi kısa dosya adı kökleri takma ad olarak kullanılmaz
+_SUFFIX_GROUP = "(?:" + "|".join(sorted(ALIAS_SUFFIXES, key=len, reverse=True)) + ")?"
+
+class SourceAliases:
+    """Dosya adı kökleri + SOURCE_ALIASES tablosundan sorudaki kaynak atfını bulur."""
+    def __init__(self, sources):
+        self.aliases = {}
+        for source in sources:
+            stem = os.path.splitext(source)[0]
+            self.aliases[alias_text(stem)] = source
+            self.aliases[alias_text(source)] = source
+        for alias, source in SOURCE_ALIASES.items():
+            if source in sources:
+                self.aliases[alias] = source
+        self.aliases = {alias: source for alias, source in self.aliases.items() if len(alias) >= MIN_ALIAS_LENGTH}
+        # Uzun takma adlar önce denenir ("kisisel verilerin silinmesi" > "kvkk")
+        self._patterns = [
+            (re.compile(rf"(?<!\w){re.escape(alias)}{_SUFFIX_GROUP}(?!\w)"), self.aliases[alias])
+            for alias in sorted(self.aliases, key=len, reverse=True)
+        ]
+
+    def match(self, text):
+        """text: alias_text ile normalize edilmiş soru. İlk (en uzun) atıf yapılan kaynak ya da None."""
+        return next((source for pattern, source in self._patterns if pattern.search(text)), None)
+
+    def match_all(self, text):
+        """Soruda atıf yapılan tüm kaynaklar (frozenset)."""
+        return frozenset(source for pattern, source in self._patterns if pattern.search(text))
+
+class ArticleLookup:
+    """(kaynak, madde no) tam eşleşme indeksi + sorudaki madde atfı ayrıştırıcı."""
+    def __init__(self, sources, mtime=None):
+        self.sources = sources   # kaynak -> {madde no -> [chunk ID]}
+        self.mtime = mtime
+        self.aliases = SourceAliases(sources)
+
+    @classmethod
+    def load(cls, path=ARTICLE_INDEX_PATH):
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") != ARTICLE_INDEX_VERSION:
+            return None
+        return cls(index["sources"], os.path.getmtime(path))
+
+    def parse(self, question):
+        """
+        Sorudaki (kaynak, madde no) atfını bulur, yoksa None.
+        Kaynak belirtilmemişse ve o madde tek bir kaynakta varsa o kaynak kullanılır.
+        Birden fazla madde / kaynak atfı veya karşılaştırma sorusu normal aramaya bırakılır.
+        """
+        numbers = article_references(question)
+        if len(numbers) != 1:
+            return None
+        number = numbers[0]
+
+        text = alias_text(question)
+        if COMPARATIVE.search(text):
+            return None
+        sources = self.aliases.match_all(text)
+        if len(sources) > 1:
+            return None
+        source = next(iter(sources), None)
+        if source is None:
+            candidates = [s for s, articles in self.sources.items() if number in articles]
+            if len(candidates) != 1:
+                return None
+            source = candidates[0]
+        if number not in self.sources.get(source, {}):
+            return None
+        return source, number
+
+    def chunk_ids(self, source, number):
+        return self.sources.get(source, {}).get(number, [])
+
+def get_article_lookup():
+    """
+    Süreç genelinde paylaşılan madde indeksi (dosya yoksa None, sonra tekrar denenir).
+    Ingestion dosyayı güncellediyse yeniden okunur.
+    """
+    lookup = registry.get_or_create("article_lookup", ArticleLookup.load)
+    if lookup is not None and os.path.exists(ARTICLE_INDEX_PATH) and os.path.getmtime(ARTICLE_INDEX_PATH) != lookup.mtime:
+        registry.evict("article_lookup")
+        lookup = registry.get_or_create("article_lookup", ArticleLookup.load)
+    return lookup
+
+def lookup_article(question):
+    """
+    Soru doğrudan bir maddeyi soruyorsa [(kaynak, madde no), [Document...]] döner; değilse None.
+    Chunk metinleri Chroma'dan ID ile okunur (embedding/arama yapılmaz).
+    """
+    lookup = get_article_lookup()
+    if lookup is None:
+        return None
+    reference = lookup.parse(question)
+    if reference is None:
+        return None
+
+    # vectorize bu modülü içe aktardığı için istemci çağrı anında alınır (döngüsel import)
+    from src.vectordb.vectorize import get_chroma_client
+
+    ids = lookup.chunk_ids(*reference)
+    stored = get_chroma_client().get(ids=ids, include=["documents", "metadatas"])
+    by_id = {
+        chunk_id: Document(id=chunk_id, page_content=text, metadata=meta or {})
+        for chunk_id, text, meta in zip(stored["ids"], stored["documents"], stored["metadatas"])
+    }
+    documents = [by_id[chunk_id] for chunk_id in ids if chunk_id in by_id]
+    return (reference, documents) if documents else None
@@ -0,0 +1,98 @@
+import os
+import logging
+import numpy as np
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# --- ÇEŞİTLİLİK MOTORU (MMR + Kaynak Kotası) ---
+# Geniş aramada adaylar ve saklı embedding'leri Chroma'dan tek sorguda okunur;
+# MMR ve kaynak başına kota seçimi matris işlemleriyle yapılır. Her MMR adımı
+# tek bir (aday x boyut) @ (boyut) çarpımıdır, adaylar üzerinde Python döngüsü yoktur;
+# fetch_k yüzlerce olduğunda da maliyet O(k * fetch_k * boyut) kalır.
+MMR_K = int(os.getenv("BROAD_MMR_K", 20))
+MMR_FETCH_K = int(os.getenv("BROAD_MMR_FETCH_K", 30))
+MMR_LAMBDA = float(os.getenv("BROAD_MMR_LAMBDA", 0.5))   # 1: sadece alaka, 0: sadece çeşitlilik
+MAX_PER_SOURCE = int(os.getenv("BROAD_MAX_PER_SOURCE", 3))
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+def mmr_select(query_vector, doc_vectors, k=MMR_K, lambda_mult=MMR_LAMBDA):
+    """
+    Maximal Marginal Relevance. Dönüş: (seçilen indeksler, sorguya kosinüs benzerlikleri)
+    seçim sırasıyla. Seçilenlere olan en büyük benzerlik vektörü her adımda tek bir
+    matris-vektör çarpımıyla güncellenir.
+    """
+    doc_vectors = np.asarray(doc_vectors, dtype=np.float32)
+    n = len(doc_vectors)
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+    docs = _unit_rows(doc_vectors)
+    query = _unit_rows(np.asarray(query_vector, dtype=np.float32))
+    relevance = docs @ query
+
+    selected = np.empty(k, dtype=np.int64)
+    max_redundancy = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected[0] = int(np.argmax(relevance))
+    for step in range(1, k + 1):
+        last = selected[step - 1]
+        available[last] = False
+        if step == k:
+            break
+        np.maximum(max_redundancy, docs @ docs[last], out=max_redundancy)
+        objective = lambda_mult * relevance - (1 - lambda_mult) * max_redundancy
+        objective[~available] = -np.inf
+        selected[step] = int(np.argmax(objective))
+    return selected, relevance[selected]
+
+def quota_select(groups, limit=MAX_PER_SOURCE, k=None):
+    """
+    Kaynak başına kota ile round-robin seçim (sıralı aday listesi üzerinde).
+    groups: adayların kaynak etiketleri (en iyi aday önde). Her kaynaktan en fazla
+    limit aday alınır; sonuç önce kaynak içi sıraya, sonra kaynağın ilk görüldüğü
+    sıraya göre dizilir: 1. tur her kaynağın en iyisi, 2. tur ikincileri...
+    """
+    groups = np.asarray(groups)
+    if not len(groups):
+        return np.zeros(0, dtype=np.int64)
+    _, first_seen, codes = np.unique(groups, return_index=True, return_inverse=True)
+    codes = codes.reshape(-1)
+
+    # Kaynak içi sıra: kaynağa göre stabil sıralayıp her grubun başlangıcından uzaklık
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    group_start = np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    within = np.empty(len(groups), dtype=np.int64)
+    within[order] = np.arange(len(order)) - group_start
+
+    keep = np.flatnonzero(within < limit)
+    picked = keep[np.lexsort((first_seen[codes[keep]], within[keep]))]
+    return picked[:k] if k is not None else picked
+
+def diverse_search(collection, query_vector, k=MMR_K, fetch_k=MMR_FETCH_K, lambda_mult=MMR_LAMBDA, where=None):
+    """
+    chromadb koleksiyonundan (bkz. get_chroma_collection) fetch_k adayı belgeleri,
+    metadata'ları ve saklı embedding'leriyle tek sorguda okur ve MMR uygular.
+    Dönüş: [(Document, sorguya kosinüs benzerliği), ...] MMR seçim sırasıyla.
+    """
+    results = collection.query(
+        query_embeddings=[list(map(float, query_vector))],
+        n_results=fetch_k,
+        where=where,
+        include=["documents", "metadatas", "embeddings"],
+    )
+    ids = results["ids"][0]
+    if not ids:
+        return []
+    picked, scores = mmr_select(query_vector, results["embeddings"][0], k=k, lambda_mult=lambda_mult)
+    texts, metadatas = results["documents"][0], results["metadatas"][0]
+    return [
+        (Document(id=ids[i], page_content=texts[i], metadata=metadatas[i] or {}), float(score))
+        for i, score in zip(picked, scores)
+    ]
@@ -0,0 +1,91 @@
+import os
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --- HİBRİT FÜZYON (Vektör + Anahtar Kelime) ---
+# Kanatların (vektör, BM25) sonuçları chunk ID'sine göre birleştirilir; sıra ve skor
+# bilgisi kaybolmaz. İki yöntem:
+#   "rrf"     : Reciprocal Rank Fusion -> sum(w / (RRF_K + sıra))
+#   "weighted": Kanat içinde min-max normalize edilmiş skorların ağırlıklı toplamı
+#               (skoru olmayan kanatlarda sıradan türetilen skor kullanılır)
+FUSION_METHOD = os.getenv("FUSION_METHOD", "rrf")
+RRF_K = int(os.getenv("FUSION_RRF_K", 60))
+FUSION_WEIGHTS = {
+    "vector": float(os.getenv("FUSION_VECTOR_WEIGHT", 0.5)),
+    "keyword": float(os.getenv("FUSION_KEYWORD_WEIGHT", 0.5)),
+}
+
+# Füzyon güveni (bkz. fusion_confidence) bu değere ulaşırsa ilk sonuç reranker'a sokulmaz
+# (kalan adaylar yine cross-encoder ile sıralanır). 1.0: tüm kanatlar aynı ilk sonucu vermeli.
+# 1'den büyük bir değer atlamayı kapatır; değerlendirilene kadar varsayılan kapalı.
+SKIP_RERANK_CONFIDENCE = float(os.getenv("FUSION_SKIP_RERANK_CONFIDENCE", 1.1))
+# Ağırlıklı füzyonda ilk iki sonuç arasında aranan asgari normalize skor farkı
+CONFIDENCE_MARGIN = float(os.getenv("FUSION_CONFIDENCE_MARGIN", 0.15))
+
+def chunk_key(doc):
+    """Chunk ID'si; ID'si olmayan (eski) dokümanlar için içerik hash'i."""
+    return doc.id or hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+def _normalized_scores(results):
+    """Kanat skorlarını [0, 1] aralığına çeker. Skor yoksa sıradan türetir."""
+    scores = [score for _, score in results]
+    if not scores:
+        return []
+    if any(score is None for score in scores):
+        return [1.0 - rank / len(scores) for rank in range(len(scores))]
+    low, high = min(scores), max(scores)
+    if high == low:
+        return [1.0] * len(scores)
+    return [(score - low) / (high - low) for score in scores]
+
+def fuse_results(legs, method=None, weights=None):
+    """
+    legs: {"vector": [(Document, skor|None), ...], "keyword": [...]} (her kanat kendi sırasında)
+    Dönüş: [(Document, füzyon skoru), ...] büyükten küçüğe, chunk ID başına tek kayıt.
+    Skorlar, tüm kanatlarda 1. sıradaki bir dokümanın 1.0 alacağı şekilde normalize edilir.
+    """
+    method = method or FUSION_METHOD
+    weights = weights or FUSION_WEIGHTS
+    active = {name: results for name, results in legs.items() if results}
+    if not active:
+        return []
+    total_weight = sum(weights.get(name, 1.0) for name in active)
+
+    fused = {}
+    documents = {}
+    for name, results in active.items():
+        weight = weights.get(name, 1.0) / total_weight
+        if method == "weighted":
+            contributions = [weight * s for s in _normalized_scores(results)]
+        else:
+            contributions = [weight * (RRF_K + 1) / (RRF_K + rank + 1) for rank in range(len(results))]
+
+        seen = set()
+        for (doc, _), contribution in zip(results, contributions):
+            key = chunk_key(doc)
+            if key in seen:
+                continue
+            seen.add(key)
+            documents.setdefault(key, doc)
+            fused[key] = fused.get(key, 0.0) + contribution
+
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return [(documents[key], score) for key, score in ranked]
+
+def fusion_confidence(legs, fused, method=None):
+    """
+    0-1 arası füzyon güveni: füzyonun ilk sonucunu 1. sıraya koyan kanatların oranı.
+    Ağırlıklı füzyonda ilk iki sonuç arasındaki fark CONFIDENCE_MARGIN'in altındaysa
+    ilk sonuç belirgin sayılmaz ve güven yarıya düşer. Tek kanat varsa 0.
+    """
+    method = method or FUSION_METHOD
+    active = [results for results in legs.values() if results]
+    if len(active) < 2 or not fused:
+        return 0.0
+    top_key = chunk_key(fused[0][0])
+    agreement = sum(chunk_key(results[0][0]) == top_key for results in active) / len(active)
+    if method == "weighted" and len(fused) > 1 and fused[0][1] - fused[1][1] < CONFIDENCE_MARGIN:
+        agreement /= 2
+    return agreement
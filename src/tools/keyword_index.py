@@ -0,0 +1,686 @@
+import os
+import re
+import json
+import mmap
+import struct
+import logging
+import time
+import threading
+import numpy as np
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# --- TÜRKÇE ANAHTAR KELİME İNDEKSİ (BM25) ---
+# Terim -> (doküman id'leri, terim frekansları) NumPy posting dizileri.
+# Sorguda sadece sorgu terimlerinin posting listelerindeki adaylar skorlanır;
+# source / madde_no filtresi posting seviyesinde uygulanır (Python'da sonradan eleme yok).
+
+# Diskteki indeks, değişmez (immutable) segment dosyalarından oluşur (pickle DEĞİL):
+#   "KWIX" + (format sürümü, başlık uzunluğu) + JSON başlık + 64 bayt hizalı NumPy bölümleri
+# Bölümler: terim sözlüğü (sıralı UTF-8 terimler), posting'ler, doküman uzunlukları,
+# chunk ID'leri, metinler, metadata (JSON) ve filtre kodları.
+# Dosyalar mmap ile açılır; okuma sadece dokunulan sayfaları yükler ve aynı makinedeki
+# tüm uvicorn worker'ları sayfaları işletim sisteminin page cache'i üzerinden paylaşır.
+#
+# Artımlı güncelleme: eklenen chunk'lar yeni bir segment olarak yazılır, silinenler
+# state.json'da segment başına "silindi" (tombstone) olarak işaretlenir. Korpus
+# istatistikleri (canlı doküman sayısı, toplam uzunluk) her güncellemede artımlı
+# tutulur. Segment sayısı veya silinmiş oranı artınca segmentler arka planda
+# tek segmentte birleştirilir (compaction).
+#
+# Listeden çıkan segment dosyaları hemen silinmez: state.json'da "retired" olarak
+# tutulur ve en az bir nesil (generation) ve bekleme süresi geçtikten sonra silinir.
+# Böylece henüz refresh etmemiş okuyucular (ve Windows'ta mmap ile açık dosyalar) bozulmaz.
+KEYWORD_INDEX_DIR = "./chromadb/keyword_index"
+STATE_FILE = "state.json"
+STATE_FORMAT_VERSION = 1
+MAX_SEGMENTS = int(os.getenv("KEYWORD_MAX_SEGMENTS", 8))
+MAX_DELETED_RATIO = float(os.getenv("KEYWORD_MAX_DELETED_RATIO", 0.3))
+SEGMENT_RETENTION_SECONDS = float(os.getenv("KEYWORD_SEGMENT_RETENTION_SECONDS", 300))
+INDEX_MAGIC = b"KWIX"
+INDEX_FORMAT_VERSION = 1
+SECTION_ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<4sII")
+
+# BM25 parametreleri (rank_bm25 / BM25Retriever varsayılanları ile aynı)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Türkçe için basit ve etkili kök bulma: kelimenin ilk N harfi (F5 stemming).
+# 0 verilirse kelimeler olduğu gibi kullanılır.
+STEM_PREFIX_LENGTH = 5
+
+# Aday sayısı korpusun 1/8'inden azsa seyrek (np.unique), değilse yoğun (bincount) toplama
+DENSE_ACCUMULATE_RATIO = 8
+
+# Kesme işaretinden sonraki ekleri atar: "KVKK'ya" -> "kvkk", "Kurul’un" -> "kurul"
+TOKEN_PATTERN = re.compile(r"(\w+)(?:['’]\w+)?", re.UNICODE)
+
+def turkish_lower(text):
+    """Türkçe kurallarına göre küçük harfe çevirir (I -> ı, İ -> i)."""
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+def tokenize(text):
+    """Metni Türkçe'ye uygun şekilde küçük harfli ve kökü kısaltılmış terimlere böler."""
+    tokens = []
+    for word in TOKEN_PATTERN.findall(turkish_lower(text)):
+        if len(word) < 2 and not word.isdigit():
+            continue
+        if STEM_PREFIX_LENGTH and not word.isdigit():
+            word = word[:STEM_PREFIX_LENGTH]
+        tokens.append(word)
+    return tokens
+
+FILTER_FIELDS = ("source", "madde_no")
+
+class StringArray:
+    """UTF-8 blob + ofset dizisi üzerinde salt-okunur string listesi (mmap dostu)."""
+    def __init__(self, blob, offsets):
+        self.blob = blob          # np.uint8
+        self.offsets = offsets    # np.int64, uzunluk = eleman sayısı + 1
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get_bytes(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def __getitem__(self, i):
+        return self.get_bytes(i).decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+class KeywordIndex:
+    """
+    Ters indeks (inverted index) tabanlı BM25 arama motoru.
+    Dokümanlar 0..N-1 arası tamsayı id'lerle tutulur; chunk_ids[i] Chroma'daki ID'dir.
+    Tüm veriler düz NumPy dizileridir; bellekte kurulan ve diskten mmap ile açılan
+    indeks aynı sınıfı kullanır.
+    """
+    def __init__(self, arrays, meta):
+        self.terms = StringArray(arrays["term_blob"], arrays["term_offsets"])    # sıralı terimler
+        self.posting_offsets = arrays["posting_offsets"]  # terim id -> posting aralığı
+        self.posting_ids = arrays["posting_ids"]          # np.int32 doküman id'leri (terim içinde sıralı)
+        self.posting_tfs = arrays["posting_tfs"]          # np.float32 terim frekansları
+        self.doc_lens = arrays["doc_lens"]                # np.float32 doküman uzunlukları (terim sayısı)
+        self.chunk_ids = StringArray(arrays["chunk_id_blob"], arrays["chunk_id_offsets"])
+        self.texts = StringArray(arrays["text_blob"], arrays["text_offsets"])
+        self.metadata_json = StringArray(arrays["metadata_blob"], arrays["metadata_offsets"])
+        self.filter_codes = {field: arrays[f"{field}_codes"] for field in FILTER_FIELDS}
+        self.filter_values = {
+            field: {value: code for code, value in enumerate(meta["filter_values"][field])}
+            for field in FILTER_FIELDS
+        }
+        self.arrays = arrays
+        self.meta = meta
+        self.num_docs = meta["num_docs"]
+        self.avg_doc_len = meta["avg_doc_len"]
+
+    # --- KURULUM ---
+    @classmethod
+    def from_documents(cls, documents, chunk_ids=None):
+        """Document listesinden indeks kurar. chunk_ids verilmezse Document.id kullanılır."""
+        if chunk_ids is None:
+            chunk_ids = [doc.id or str(i) for i, doc in enumerate(documents)]
+
+        term_docs = {}   # terim -> ([doküman id'leri], [frekanslar])
+        doc_lens = np.zeros(len(documents), dtype=np.float32)
+
+        for doc_id, doc in enumerate(documents):
+            tokens = tokenize(doc.page_content)
+            doc_lens[doc_id] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                ids, tfs = term_docs.setdefault(token, ([], []))
+                ids.append(doc_id)
+                tfs.append(tf)
+
+        # Terimler UTF-8 bayt sırasına göre dizilir (diskte ikili arama için)
+        terms = sorted(term_docs, key=lambda t: t.encode("utf-8"))
+        posting_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(term_docs[t][0]) for t in terms], out=posting_offsets[1:])
+        posting_ids = np.fromiter(
+            (i for t in terms for i in term_docs[t][0]), dtype=np.int32, count=posting_offsets[-1]
+        )
+        posting_tfs = np.fromiter(
+            (tf for t in terms for tf in term_docs[t][1]), dtype=np.float32, count=posting_offsets[-1]
+        )
+
+        metadatas = [dict(doc.metadata) for doc in documents]
+        filter_values = {}
+        arrays = {}
+        for field in FILTER_FIELDS:
+            values = {}
+            codes = np.fromiter(
+                (values.setdefault(meta.get(field), len(values)) for meta in metadatas),
+                dtype=np.int32, count=len(metadatas)
+            )
+            arrays[f"{field}_codes"] = codes
+            filter_values[field] = list(values)
+
+        term_strings = StringArray.from_strings(terms)
+        chunk_id_strings = StringArray.from_strings(list(chunk_ids))
+        text_strings = StringArray.from_strings([doc.page_content for doc in documents])
+        metadata_strings = StringArray.from_strings(
+            [json.dumps(meta, ensure_ascii=False) for meta in metadatas]
+        )
+        arrays.update({
+            "term_blob": term_strings.blob, "term_offsets": term_strings.offsets,
+            "posting_offsets": posting_offsets, "posting_ids": posting_ids, "posting_tfs": posting_tfs,
+            "doc_lens": doc_lens,
+            "chunk_id_blob": chunk_id_strings.blob, "chunk_id_offsets": chunk_id_strings.offsets,
+            "text_blob": text_strings.blob, "text_offsets": text_strings.offsets,
+            "metadata_blob": metadata_strings.blob, "metadata_offsets": metadata_strings.offsets,
+        })
+        meta = {
+            "num_docs": len(documents),
+            "avg_doc_len": float(doc_lens.mean()) if len(documents) else 0.0,
+            "filter_values": filter_values,
+            "total_doc_len": float(doc_lens.sum()),
+            "tokenizer": tokenizer_signature(),
+        }
+        return cls(arrays, meta)
+
+    # --- ARAMA ---
+    def term_id(self, term):
+        """Sıralı terim sözlüğünde ikili arama. Terim yoksa None."""
+        key = term.encode("utf-8")
+        lo, hi = 0, len(self.terms)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.terms.get_bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.terms) and self.terms.get_bytes(lo) == key:
+            return lo
+        return None
+
+    def _filter_mask(self, filters):
+        """Filtreye uyan dokümanlar için bool maske. Filtre yoksa None, hiç eşleşme yoksa False."""
+        mask = None
+        for field, value in filters.items():
+            if value is None:
+                continue
+            code = self.filter_values[field].get(value)
+            if code is None:
+                return False
+            field_mask = self.filter_codes[field] == code
+            mask = field_mask if mask is None else (mask & field_mask)
+        return mask
+
+    def search(self, query, k=10, source=None, madde_no=None):
+        """
+        BM25 ile en iyi k dokümanı döner: [(Document, skor), ...]
+        source / madde_no verilirse SADECE o kaynağın/maddenin dokümanları skorlanır.
+        """
+        if not self.num_docs:
+            return []
+
+        mask = self._filter_mask({"source": source, "madde_no": madde_no})
+        if mask is False:
+            return []
+
+        candidate_ids = []
+        candidate_scores = []
+        for term in set(tokenize(query)):
+            term_id = self.term_id(term)
+            if term_id is None:
+                continue
+            start, end = self.posting_offsets[term_id], self.posting_offsets[term_id + 1]
+            ids = self.posting_ids[start:end]
+            tfs = self.posting_tfs[start:end]
+            df = len(ids)
+            if mask is not None:
+                keep = mask[ids]
+                ids, tfs = ids[keep], tfs[keep]
+                if not len(ids):
+                    continue
+
+            idf = np.log((self.num_docs - df + 0.5) / (df + 0.5) + 1.0)
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self.doc_lens[ids] / self.avg_doc_len)
+            candidate_ids.append(ids)
+            candidate_scores.append(idf * tfs * (BM25_K1 + 1.0) / (tfs + norm))
+
+        if not candidate_ids:
+            return []
+
+        # Aynı dokümana gelen terim skorlarını topla
+        all_ids = np.concatenate(candidate_ids)
+        all_scores = np.concatenate(candidate_scores)
+        if len(all_ids) * DENSE_ACCUMULATE_RATIO < self.num_docs:
+            # Az aday: sadece adaylar üzerinde sırala-topla
+            doc_ids, inverse = np.unique(all_ids, return_inverse=True)
+            scores = np.bincount(inverse, weights=all_scores)
+        else:
+            # Çok aday (sık geçen terimler): tüm korpus boyunda tek geçişte topla
+            scores = np.bincount(all_ids, weights=all_scores, minlength=self.num_docs)
+            doc_ids = np.flatnonzero(scores)
+            scores = scores[doc_ids]
+
+        k = min(k, len(doc_ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.get_document(int(doc_ids[i])), float(scores[i])) for i in top]
+
+    def get_document(self, doc_id):
+        return Document(
+            id=self.chunk_ids[doc_id],
+            page_content=self.texts[doc_id],
+            metadata=json.loads(self.metadata_json[doc_id]),
+        )
+
+    def invoke(self, query, k=10, source=None, madde_no=None):
+        """BM25Retriever ile uyumlu kullanım: sadece Document listesi döner."""
+        return [doc for doc, _ in self.search(query, k=k, source=source, madde_no=madde_no)]
+
+def tokenizer_signature():
+    """İndeksin kurulduğu tokenizer ayarları; farklıysa diskteki indeks kullanılamaz."""
+    return {"stem_prefix_length": STEM_PREFIX_LENGTH, "token_pattern": TOKEN_PATTERN.pattern}
+
+#region Kalıcılık
+def _align(offset):
+    return -(-offset // SECTION_ALIGNMENT) * SECTION_ALIGNMENT
+
+def save_keyword_index(index, path):
+    """Segmenti versiyonlu ikili formatta diske yazar (tmp + replace ile atomik)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    names = sorted(index.arrays)
+
+    # Başlık uzunluğu bölüm ofsetlerine bağlı olduğundan önce yer tutucu ile ölçülür
+    sections = {name: {"offset": 0, "dtype": index.arrays[name].dtype.str, "count": len(index.arrays[name])}
+                for name in names}
+    header = {"meta": index.meta, "sections": sections}
+    header_size = len(json.dumps(header).encode("utf-8")) + 32 * len(names)
+    offset = _align(_PREAMBLE.size + header_size)
+    for name in names:
+        sections[name]["offset"] = offset
+        offset = _align(offset + index.arrays[name].nbytes)
+    header_bytes = json.dumps(header).encode("utf-8").ljust(header_size)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(INDEX_MAGIC, INDEX_FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name in names:
+            f.seek(sections[name]["offset"])
+            f.write(np.ascontiguousarray(index.arrays[name]).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def load_keyword_index(path):
+    """
+    Diskteki segmenti mmap ile açar (kopyalama yok, kod çalıştırma yok).
+    Dosya yoksa, formatı/sürümü ya da tokenizer ayarları uyumsuzsa None döner.
+    """
+    try:
+        if os.path.getsize(path) < _PREAMBLE.size:
+            return None
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError:
+        # Dosya yok ya da kontrol ile açma arasında silindi
+        return None
+
+    magic, version, header_len = _PREAMBLE.unpack_from(buffer, 0)
+    if magic != INDEX_MAGIC or version != INDEX_FORMAT_VERSION:
+        logger.warning(f"⚠️ Anahtar kelime indeksi formatı uyumsuz (sürüm {version}), yok sayılıyor: {path}")
+        return None
+    header = json.loads(buffer[_PREAMBLE.size:_PREAMBLE.size + header_len])
+    if header["meta"].get("tokenizer") != tokenizer_signature():
+        logger.warning(f"⚠️ Anahtar kelime indeksi farklı tokenizer ayarlarıyla kurulmuş, yok sayılıyor: {path}")
+        return None
+
+    arrays = {
+        name: np.frombuffer(buffer, dtype=np.dtype(section["dtype"]), count=section["count"], offset=section["offset"])
+        for name, section in header["sections"].items()
+    }
+    return KeywordIndex(arrays, header["meta"])
+
+#region Segmentli (artımlı) indeks
+class _Segment:
+    """Açık bir segment dosyası ve silinmiş (tombstone) doküman maskesi."""
+    def __init__(self, name, index, deleted=()):
+        self.name = name
+        self.index = index
+        self.live = np.ones(index.num_docs, dtype=bool)
+        self.live[list(deleted)] = False
+
+    @property
+    def deleted(self):
+        return np.flatnonzero(~self.live).tolist()
+
+class SegmentedKeywordIndex:
+    """
+    Değişmez segmentler + tombstone'lar üzerinde artımlı BM25 indeksi.
+    - apply(): chunk ID ile upsert / silme; değişiklik boyutunda maliyet (tüm korpus yeniden kurulmaz).
+    - search(): tüm segmentlerde, korpus geneli istatistiklerle (N, ortalama uzunluk, df) skorlar.
+    - refresh(): başka bir süreç (vectorize) indeksi güncellediyse yeni durumu açar.
+    Yazıcı tek süreçtir (ingestion); API worker'ları sadece okur.
+    """
+    def __init__(self, path=KEYWORD_INDEX_DIR):
+        self.path = path
+        self.lock = threading.RLock()
+        self.needs_rebuild = True
+        self._state_stamp = False   # henüz okunmadı (None: state dosyası yok)
+        self._locations = None
+        self._compaction = None
+        self._state = {"generation": 0, "next_segment": 0, "segments": [], "retired": [],
+                       "num_docs": 0, "total_doc_len": 0.0}
+        # Okuyucular tutarlı bir görüntü için tek bir tuple'ı okur: (segmentler, N, toplam uzunluk)
+        self._view = ([], 0, 0.0)
+        self.refresh()
+
+    # --- DURUM (STATE) ---
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _stamp(self):
+        try:
+            st = os.stat(self._file(STATE_FILE))
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def refresh(self):
+        """
+        state.json değiştiyse segmentleri yeniden açar (açık segmentler yeniden kullanılır).
+        Bir segment açılamazsa durum kaydedilmez; sonraki çağrı tekrar dener.
+        """
+        stamp = self._stamp()
+        if stamp == self._state_stamp:
+            return
+        with self.lock:
+            stamp = self._stamp()
+            if stamp == self._state_stamp:
+                return
+            if stamp is None:
+                self._state_stamp = stamp
+                self.needs_rebuild = True
+                return
+            with open(self._file(STATE_FILE), "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") != STATE_FORMAT_VERSION:
+                logger.warning(f"⚠️ Anahtar kelime indeksi durumu uyumsuz, yeniden kurulmalı: {self.path}")
+                self._state_stamp = stamp
+                self.needs_rebuild = True
+                return
+
+            opened = {segment.name: segment.index for segment in self._view[0]}
+            segments = []
+            for entry in state["segments"]:
+                index = opened.get(entry["name"]) or load_keyword_index(self._file(entry["name"]))
+                if index is None:
+                    logger.warning(f"⚠️ Segment açılamadı, indeks yeniden kurulmalı: {entry['name']}")
+                    self.needs_rebuild = True
+                    return
+                segments.append(_Segment(entry["name"], index, entry["deleted"]))
+
+            state.setdefault("retired", [])
+            self._state = state
+            self._state_stamp = stamp
+            self._locations = None
+            self.needs_rebuild = False
+            self._view = (segments, state["num_docs"], state["total_doc_len"])
+
+    def _commit(self, segments, num_docs, total_doc_len):
+        """Yeni durumu atomik olarak yazar ve okuyuculara yayınlar."""
+        state = dict(self._state)
+        generation = state["generation"] + 1
+        names = {s.name for s in segments}
+        dropped = {s.name for s in self._view[0]} - names
+        # Çıkan segmentler emekliye ayrılır; süresi dolanlar listeden düşer ve silinir
+        now = time.time()
+        retired = [
+            entry for entry in state.get("retired", [])
+            if entry["name"] not in names and (
+                entry["generation"] >= generation - 1 or now - entry["time"] < SEGMENT_RETENTION_SECONDS)
+        ]
+        retired += [{"name": name, "generation": generation, "time": now} for name in sorted(dropped)]
+        state.update({
+            "version": STATE_FORMAT_VERSION,
+            "generation": generation,
+            "segments": [{"name": s.name, "deleted": s.deleted} for s in segments],
+            "retired": retired,
+            "num_docs": int(num_docs),
+            "total_doc_len": float(total_doc_len),
+        })
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = self._file(STATE_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._file(STATE_FILE))
+        self._state = state
+        self._state_stamp = self._stamp()
+        self._view = (segments, state["num_docs"], state["total_doc_len"])
+        self._remove_unreferenced_files()
+
+    def _new_segment(self, index):
+        """İndeksi yeni bir segment dosyası olarak yazar ve mmap ile açar."""
+        name = f"seg-{self._state['next_segment']:06d}.bin"
+        self._state["next_segment"] += 1
+        save_keyword_index(index, self._file(name))
+        return _Segment(name, load_keyword_index(self._file(name)))
+
+    def _remove_unreferenced_files(self):
+        """
+        State'te ne canlı ne emekli olarak geçen segment dosyalarını siler
+        (süresi dolmuş emekliler ve yarıda kalmış yazımlardan artakalanlar).
+        Silinemeyen dosya (Windows'ta hâlâ açık) bir sonraki geçişte tekrar denenir.
+        """
+        referenced = {s.name for s in self._view[0]} | {e["name"] for e in self._state.get("retired", [])}
+        for name in os.listdir(self.path):
+            if name not in referenced and name.startswith("seg-"):
+                try:
+                    os.remove(self._file(name))
+                except FileNotFoundError:
+                    pass
+                except PermissionError as e:
+                    logger.warning(f"⚠️ Segment dosyası silinemedi, sonra tekrar denenecek: {name} ({e})")
+
+    @property
+    def num_docs(self):
+        return self._view[1]
+
+    @property
+    def num_segments(self):
+        return len(self._view[0])
+
+    # --- YAZMA ---
+    def _chunk_locations(self):
+        """chunk ID -> (segment, yerel id) eşlemesi (sadece yazıcıda, ilk ihtiyaçta kurulur)."""
+        if self._locations is None:
+            self._locations = {}
+            for segment in self._view[0]:
+                for local_id in np.flatnonzero(segment.live):
+                    self._locations[segment.index.chunk_ids[local_id]] = (segment, int(local_id))
+        return self._locations
+
+    def rebuild(self, documents, chunk_ids=None):
+        """Tüm indeksi verilen dokümanlardan tek segment olarak yeniden kurar."""
+        self.wait_for_compaction()
+        with self.lock:
+            index = KeywordIndex.from_documents(documents, chunk_ids)
+            segment = self._new_segment(index)
+            self._commit([segment], index.num_docs, index.meta["total_doc_len"])
+            self._locations = None
+            self.needs_rebuild = False
+
+    def apply(self, documents=(), ids=(), delete_ids=()):
+        """
+        Tek bir güncellemeyi uygular: delete_ids silinir, documents (ids ile) upsert edilir.
+        Var olan chunk ID'leri önce silinir; yeni içerik tek bir yeni segment olarak eklenir.
+        Korpus istatistikleri tüm segmentler taranmadan artımlı güncellenir.
+        """
+        with self.lock:
+            segments, num_docs, total_doc_len = self._view
+            segments = list(segments)
+            locations = self._chunk_locations()
+
+            for chunk_id in set(delete_ids) | set(ids):
+                location = locations.pop(chunk_id, None)
+                if location is None:
+                    continue
+                segment, local_id = location
+                segment.live[local_id] = False
+                num_docs -= 1
+                total_doc_len -= float(segment.index.doc_lens[local_id])
+
+            if documents:
+                segment = self._new_segment(KeywordIndex.from_documents(list(documents), list(ids)))
+                segments.append(segment)
+                num_docs += segment.index.num_docs
+                total_doc_len += segment.index.meta["total_doc_len"]
+                for local_id, chunk_id in enumerate(ids):
+                    locations[chunk_id] = (segment, local_id)
+
+            # Tamamen silinmiş segmentler listeden çıkar
+            segments = [s for s in segments if s.live.any()]
+            self._commit(segments, num_docs, total_doc_len)
+
+        if self._should_compact():
+            self.compact_in_background()
+
+    # --- COMPACTION ---
+    def _should_compact(self):
+        segments = self._view[0]
+        total = sum(s.index.num_docs for s in segments)
+        deleted = total - self.num_docs
+        return len(segments) > MAX_SEGMENTS or (total and deleted / total > MAX_DELETED_RATIO)
+
+    def compact_in_background(self):
+        """Segmentleri arka plan thread'inde birleştirir (aynı anda tek compaction)."""
+        with self.lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return self._compaction
+            self._compaction = threading.Thread(target=self.compact, name="keyword-index-compaction")
+            self._compaction.start()
+            return self._compaction
+
+    def wait_for_compaction(self):
+        compaction = self._compaction
+        if compaction is not None and compaction is not threading.current_thread():
+            compaction.join()
+
+    def compact(self):
+        """
+        O anki segmentlerin canlı dokümanlarını tek segmentte birleştirir.
+        Ağır kısım (yeniden kurulum) kilitsiz yapılır; bu sırada gelen silmeler
+        ve yeni segmentler değiştirme anında korunur.
+        """
+        with self.lock:
+            snapshot = [(segment, segment.live.copy()) for segment in self._view[0]]
+        if len(snapshot) <= 1 and all(live.all() for _, live in snapshot):
+            return
+
+        documents, chunk_ids, origins = [], [], []
+        for segment, live in snapshot:
+            for local_id in np.flatnonzero(live):
+                doc = segment.index.get_document(int(local_id))
+                documents.append(doc)
+                chunk_ids.append(doc.id)
+                origins.append((segment, int(local_id)))
+        index = KeywordIndex.from_documents(documents, chunk_ids)
+
+        with self.lock:
+            merged = self._new_segment(index)
+            # Birleştirme sürerken silinen dokümanlar yeni segmentte de silinir
+            for merged_id, (segment, local_id) in enumerate(origins):
+                if not segment.live[local_id]:
+                    merged.live[merged_id] = False
+            compacted = {segment.name for segment, _ in snapshot}
+            remaining = [s for s in self._view[0] if s.name not in compacted]
+            self._commit([merged] + remaining, self.num_docs, self._view[2])
+            self._locations = None
+        logger.info(f"🧹 Anahtar kelime indeksi birleştirildi: {len(snapshot)} segment -> 1 ({merged.live.sum()} chunk)")
+
+    # --- ARAMA ---
+    def search(self, query, k=10, source=None, madde_no=None):
+        """
+        Tüm segmentlerde BM25 arama: [(Document, skor), ...]
+        N, ortalama doküman uzunluğu ve df korpus genelinde (silinmişler hariç) hesaplanır;
+        sonuçlar tek segmentli bir indeksle birebir aynıdır.
+        """
+        segments, num_docs, total_doc_len = self._view
+        if not num_docs:
+            return []
+        avg_doc_len = total_doc_len / num_docs
+        filters = {"source": source, "madde_no": madde_no}
+
+        # Segment başına filtre maskesi (canlı ve filtreye uyan dokümanlar) ve global id ofseti
+        masks, bases, base = [], [], 0
+        for segment in segments:
+            mask = segment.index._filter_mask(filters)
+            masks.append(None if mask is False else (segment.live if mask is None else segment.live & mask))
+            bases.append(base)
+            base += segment.index.num_docs
+
+        candidate_ids = []
+        candidate_scores = []
+        for term in set(tokenize(query)):
+            postings = []
+            df = 0
+            for segment, mask, seg_base in zip(segments, masks, bases):
+                term_id = segment.index.term_id(term)
+                if term_id is None:
+                    continue
+                start, end = segment.index.posting_offsets[term_id], segment.index.posting_offsets[term_id + 1]
+                ids = segment.index.posting_ids[start:end]
+                tfs = segment.index.posting_tfs[start:end]
+                df += int(segment.live[ids].sum())
+                if mask is None:
+                    continue
+                keep = mask[ids]
+                if keep.any():
+                    postings.append((ids[keep] + seg_base, tfs[keep], segment.index.doc_lens[ids[keep]]))
+            if not postings or not df:
+                continue
+
+            idf = np.log((num_docs - df + 0.5) / (df + 0.5) + 1.0)
+            for ids, tfs, lens in postings:
+                norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lens / avg_doc_len)
+                candidate_ids.append(ids)
+                candidate_scores.append(idf * tfs * (BM25_K1 + 1.0) / (tfs + norm))
+
+        if not candidate_ids:
+            return []
+
+        all_ids = np.concatenate(candidate_ids)
+        all_scores = np.concatenate(candidate_scores)
+        if len(all_ids) * DENSE_ACCUMULATE_RATIO < base:
+            doc_ids, inverse = np.unique(all_ids, return_inverse=True)
+            scores = np.bincount(inverse, weights=all_scores)
+        else:
+            scores = np.bincount(all_ids, weights=all_scores, minlength=base)
+            doc_ids = np.flatnonzero(scores)
+            scores = scores[doc_ids]
+
+        k = min(k, len(doc_ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for i in top:
+            position = int(np.searchsorted(bases, doc_ids[i], side="right")) - 1
+            local_id = int(doc_ids[i]) - bases[position]
+            results.append((segments[position].index.get_document(local_id), float(scores[i])))
+        return results
+
+    def invoke(self, query, k=10, source=None, madde_no=None):
+        """BM25Retriever ile uyumlu kullanım: sadece Document listesi döner."""
+        return [doc for doc, _ in self.search(query, k=k, source=source, madde_no=madde_no)]
+
+def open_keyword_index(path=KEYWORD_INDEX_DIR):
+    """Segmentli indeksi açar. Diskte yoksa boş (needs_rebuild=True) bir indeks döner."""
+    return SegmentedKeywordIndex(path)
@@ -0,0 +1,291 @@
+import os
+import time
+import queue
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
+from src import registry
+from src.vectordb.embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# --- RERANKING SERVİSİ ---
+# Cross-encoder skorları (normalize sorgu, chunk hash'i) anahtarıyla LRU/TTL önbellekte
+# tutulur; popüler sorular aynı chunk'lara tekrar tekrar geldiğinde model çalışmaz.
+# Önbellekte olmayan çiftler kısa bir zaman penceresi içinde gelen diğer isteklerin
+# çiftleriyle tek bir predict çağrısında birleştirilir (micro-batching).
+RERANKER_MODEL_NAME = 'cross-encoder/mmarco-mMiniLMv2-L12-H384-v1'
+
+# "torch": sentence-transformers CrossEncoder (varsayılan)
+# "onnx" : int8 kuantize edilmiş ONNX modeli (sadece CPU sunucular için daha hızlı)
+RERANKER_BACKEND = os.getenv("RERANKER_BACKEND", "torch")
+RERANKER_ONNX_DIR = os.getenv("RERANKER_ONNX_DIR", "./models/mmarco-mMiniLMv2-L12-H384-v1-onnx")
+RERANKER_ONNX_THREADS = int(os.getenv("RERANKER_ONNX_THREADS", os.cpu_count() or 1))
+RERANKER_MAX_LENGTH = 512
+
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", 20000))
+RERANK_CACHE_TTL = float(os.getenv("RERANK_CACHE_TTL", 3600))          # saniye
+RERANK_BATCH_WINDOW_MS = float(os.getenv("RERANK_BATCH_WINDOW_MS", 5))  # 0: batching kapalı
+RERANK_MAX_BATCH = int(os.getenv("RERANK_MAX_BATCH", 64))               # bu kadar çift toplanınca pencere beklenmez
+
+#region ONNX Backend
+def export_onnx_reranker(output_dir=RERANKER_ONNX_DIR, model_name=RERANKER_MODEL_NAME):
+    """
+    Cross-encoder'ı ONNX'e aktarır ve int8 dinamik kuantizasyon uygular.
+    Bir kez çalıştırılması yeterlidir: python -m src.tools.rerank_service --export-onnx
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+    logger.info(f"📤 ONNX'e aktarılıyor: {model_name} -> {output_dir}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["örnek soru"], ["örnek pasaj"], return_tensors="pt")
+    input_names = list(sample.keys())
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in input_names}, "logits": {0: "batch"}},
+            opset_version=17,
+            dynamo=False,
+        )
+
+    int8_path = os.path.join(output_dir, "model_int8.onnx")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(output_dir)
+    model.config.save_pretrained(output_dir)
+    logger.info(f"✅ ONNX int8 reranker hazır: {int8_path}")
+    return int8_path
+
+class OnnxCrossEncoder:
+    """
+    int8 ONNX cross-encoder. CrossEncoder.predict ile aynı arayüz ve aynı çıktı:
+    tek etiketli modellerde logit'e sigmoid uygulanır.
+    Çiftler uzunluğa göre sıralanıp batch'lenir (dinamik padding).
+    """
+    def __init__(self, model_dir=RERANKER_ONNX_DIR, threads=RERANKER_ONNX_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = os.path.join(model_dir, "model_int8.onnx")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} bulunamadı. Önce: python -m src.tools.rerank_service --export-onnx"
+            )
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    def predict(self, pairs, batch_size=32):
+        if not len(pairs):
+            return np.zeros(0, dtype=np.float32)
+        order = sorted(range(len(pairs)), key=lambda i: len(pairs[i][0]) + len(pairs[i][1]))
+        scores = np.zeros(len(pairs), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            batch_ids = order[start : start + batch_size]
+            encoded = self.tokenizer(
+                [pairs[i][0] for i in batch_ids],
+                [pairs[i][1] for i in batch_ids],
+                padding=True,
+                truncation=True,
+                max_length=RERANKER_MAX_LENGTH,
+                return_tensors="np",
+            )
+            feed = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            logits = self.session.run(None, feed)[0]
+            if logits.shape[1] == 1:
+                batch_scores = 1.0 / (1.0 + np.exp(-logits[:, 0]))
+            else:
+                batch_scores = logits[:, 0]
+            scores[batch_ids] = batch_scores
+        return scores
+
+#region Model Yükleme
+def load_reranker():
+    try:
+        logger.info(f"--- Multilingual Reranker Modeli Yükleniyor: {RERANKER_MODEL_NAME} (backend: {RERANKER_BACKEND}) ---")
+        if RERANKER_BACKEND == "onnx":
+            model = OnnxCrossEncoder()
+        else:
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(RERANKER_MODEL_NAME)
+        logger.info("✅ Multilingual Reranker Hazır.")
+        return model
+    except Exception as e:
+        logger.error(f"Reranker yüklenirken kritik hata: {e}")
+        return None
+
+def get_reranker():
+    """Süreç genelinde paylaşılan reranker modelini döner (yüklenemezse None, tekrar denenmez)."""
+    return registry.get_or_create("reranker", load_reranker, cache_none=True)
+
+registry.register_loader("reranker", get_reranker)
+
+#region Skor Önbelleği
+class ScoreCache:
+    """Thread-safe LRU + TTL önbellek: (normalize sorgu, chunk hash) -> skor."""
+    def __init__(self, max_size=RERANK_CACHE_SIZE, ttl=RERANK_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()   # anahtar -> (skor, son geçerlilik zamanı)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query, text):
+        return (normalize_text(query), hashlib.sha1(text.encode("utf-8")).digest())
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, score):
+        with self.lock:
+            self.entries[key] = (score, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self.entries),
+        }
+
+#region Micro-Batching
+class MicroBatcher:
+    """
+    Eşzamanlı isteklerin (sorgu, pasaj) çiftlerini tek bir arka plan thread'inde toplar:
+    ilk istekten sonra window saniye (veya max_batch çift dolana kadar) beklenir,
+    hepsi tek predict çağrısıyla skorlanır ve sonuçlar isteklere dağıtılır.
+    Model sadece bu thread'den çağrıldığı için thread güvenliği de sağlanmış olur.
+    """
+    def __init__(self, predict, window=RERANK_BATCH_WINDOW_MS / 1000, max_batch=RERANK_MAX_BATCH):
+        self.predict = predict
+        self.window = window
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.thread = threading.Thread(target=self._run, name="rerank-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, pairs):
+        future = Future()
+        self.queue.put((pairs, future))
+        return future
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.window
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            pairs = [pair for item_pairs, _ in batch for pair in item_pairs]
+            try:
+                scores = np.asarray(self.predict(pairs), dtype=np.float32)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            offset = 0
+            for item_pairs, future in batch:
+                future.set_result(scores[offset : offset + len(item_pairs)])
+                offset += len(item_pairs)
+
+class RerankService:
+    """Önbellekli ve batch'li cross-encoder skorlama servisi."""
+    def __init__(self, model, cache=None, window=RERANK_BATCH_WINDOW_MS / 1000, max_batch=RERANK_MAX_BATCH):
+        self.model = model
+        self.cache = cache or ScoreCache()
+        self.batcher = MicroBatcher(model.predict, window, max_batch) if window > 0 else None
+
+    def _predict(self, pairs):
+        if self.batcher is None:
+            return np.asarray(self.model.predict(pairs), dtype=np.float32)
+        return self.batcher.submit(pairs).result()
+
+    def score(self, query, texts):
+        """Her pasaj için cross-encoder skoru (np.float32). Sadece önbellekte olmayanlar modele gider."""
+        keys = [ScoreCache.make_key(query, text) for text in texts]
+        scores = np.zeros(len(texts), dtype=np.float32)
+
+        # Aynı istekteki tekrar eden pasajlar bir kez skorlanır
+        missing = {}
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                scores[i] = cached
+
+        if missing:
+            missing_keys = list(missing)
+            new_scores = self._predict([[query, texts[missing[key][0]]] for key in missing_keys])
+            for key, score in zip(missing_keys, new_scores):
+                self.cache.put(key, float(score))
+                scores[missing[key]] = score
+        return scores
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats["batches"] = self.batcher.batches if self.batcher else None
+        return stats
+
+def create_rerank_service():
+    model = get_reranker()
+    return RerankService(model) if model is not None else None
+
+def get_rerank_service():
+    """Süreç genelinde paylaşılan reranking servisi (model yüklenemediyse None)."""
+    return registry.get_or_create("rerank_service", create_rerank_service)
+
+registry.register_loader("rerank_service", get_rerank_service)
+
+if __name__ == "__main__":
+    import sys
+    if "--export-onnx" in sys.argv:
+        export_onnx_reranker()
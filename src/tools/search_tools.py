@@ -1,12 +1,18 @@
 import logging
 import sys
 import os
-import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from langchain.tools import tool
-from src.vectordb.vectorize import get_chroma_client
+from src import registry
+from src.vectordb.vectorize import get_chroma_client, get_chroma_collection, load_store_documents
+from src.vectordb.embedding_cache import embed_query
 from src.tools.utils import rerank_documents
-from langchain_community.retrievers import BM25Retriever
+from src.tools.fusion import fuse_results, fusion_confidence, SKIP_RERANK_CONFIDENCE
+from src.tools.keyword_index import open_keyword_index, KeywordIndex
+from src.tools.diversity import diverse_search, quota_select
+from src.cache.response_cache import cached_call
 
 # Logger Ayarları
 logging.basicConfig(
@@ -17,25 +23,122 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Veritabanı Bağlantısı
-vector_db = get_chroma_client()
-
-# BM25 Önbelleği (RAM'de tutarak hızı koruyoruz)
-_CACHED_BM25 = None
-
-def get_bm25_retriever():
-    """Pickle dosyasından hazır BM25 indeksini bir kez yükler."""
-    global _CACHED_BM25
-    if _CACHED_BM25 is None:
-        # Yolunu kendi yapına göre kontrol et (chromadb_bm25 klasörü demiştik)
-        pkl_path = "./chromadb/bm25_retriever.pkl"
-        if os.path.exists(pkl_path):
-            with open(pkl_path, "rb") as f:
-                _CACHED_BM25 = pickle.load(f)
-            logger.info("✅ BM25 Hazır Paket RAM'e yüklendi.")
-        else:
-            logger.error("❌ BM25 pkl bulunamadı! Hibrit arama tam kapasite çalışamayabilir.")
-    return _CACHED_BM25
+# Veritabanı Bağlantısı: süreç genelinde paylaşılan örnek (src/registry.py)
+
+# Anahtar Kelime İndeksi (süreç başına bir kez açılır, src/registry.py)
+def create_keyword_index():
+    """Segmentli anahtar kelime indeksini mmap ile açar (kopyalama yok, neredeyse sıfır maliyet)."""
+    index = open_keyword_index()
+    if index.needs_rebuild:
+        logger.warning("⚠️ Segmentli anahtar kelime indeksi bulunamadı (eski format olabilir), Chroma'dan bellekte kurulacak.")
+    else:
+        logger.info(f"✅ Anahtar kelime indeksi açıldı ({index.num_docs} chunk, {index.num_segments} segment).")
+    return index
+
+def create_fallback_keyword_index():
+    """
+    Segmentli indeks yokken (ör. sadece eski pickle'ı olan kurulum) Chroma'daki chunk'lardan
+    bellekte kurulan indeks. Diske yazılmaz: yazıcı tek süreçtir (ingestion).
+    """
+    documents = load_store_documents(get_chroma_client())
+    if not documents:
+        logger.error("❌ Anahtar kelime indeksi kurulamadı: Chroma boş. Önce: python -m src.vectordb.vectorize")
+        return None
+    index = KeywordIndex.from_documents(documents)
+    logger.warning(
+        f"⚠️ Anahtar kelime indeksi Chroma'dan bellekte kuruldu ({index.num_docs} chunk). "
+        "Kalıcı hale getirmek için: python -m src.vectordb.vectorize"
+    )
+    return index
+
+def get_keyword_index():
+    index = registry.get_or_create("keyword_index", create_keyword_index)
+    # Ingestion indeksi güncellediyse yeni segmentler açılır (state.json için tek stat çağrısı)
+    index.refresh()
+    if index.needs_rebuild:
+        return registry.get_or_create("keyword_index_fallback", create_fallback_keyword_index)
+    # Segmentli indeks sonradan yazıldıysa bellekteki yedek bırakılır
+    registry.evict("keyword_index_fallback")
+    return index
+
+registry.register_loader("keyword_index", get_keyword_index)
+
+# İndeks import sırasında açılır: sayfalar ihtiyaç oldukça okunur ve tüm worker'lar
+# arasında işletim sisteminin page cache'i üzerinden paylaşılır.
+get_keyword_index()
+
+# --- EŞZAMANLI ARAMA KANATLARI ---
+# Vektör (sorgu embedding + HNSW) ve BM25 kanatları aynı anda çalışır. Her kanadın
+# kendi zaman aşımı vardır; süresi dolan kanat boş sonuç sayılır ve istek diğer
+# kanatların sonuçlarıyla devam eder (kısmi sonuç). Kısmi sonuçlar "degraded" olarak
+# işaretlenir ve önbelleğe yazılmaz (src/cache/response_cache.py).
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", 8))
+LEG_TIMEOUTS = {
+    "vector": float(os.getenv("VECTOR_LEG_TIMEOUT", 5.0)),    # saniye
+    "keyword": float(os.getenv("KEYWORD_LEG_TIMEOUT", 2.0)),
+}
+retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+def run_retrieval_legs(legs):
+    """
+    legs: {"vector": callable, "keyword": callable} -> ({kanat: sonuçlar}, {kanat: ms}, [düşen kanatlar])
+    Zaman aşımına uğrayan veya hata veren kanat [] döner ve düşen kanatlara eklenir; süreler loglanır.
+    """
+    start = time.perf_counter()
+    futures = {name: retrieval_executor.submit(_timed, func) for name, func in legs.items()}
+    results, timings, failed = {}, {}, []
+    for name, future in futures.items():
+        deadline = start + LEG_TIMEOUTS.get(name, 5.0)
+        try:
+            results[name], timings[name] = future.result(timeout=max(deadline - time.perf_counter(), 0))
+        except TimeoutError:
+            logger.warning(f"⏳ '{name}' kanadı {LEG_TIMEOUTS.get(name, 5.0)}sn içinde bitmedi, kısmi sonuçla devam ediliyor.")
+            results[name], timings[name] = [], None
+            failed.append(name)
+        except Exception as e:
+            logger.error(f"'{name}' kanadı hatası: {e}")
+            results[name], timings[name] = [], (time.perf_counter() - start) * 1000
+            failed.append(name)
+
+    report = " | ".join(
+        f"{name}: {'zaman aşımı' if ms is None else f'{ms:.1f}ms'}" for name, ms in timings.items()
+    )
+    logger.info(f"⏱️ Kanat süreleri -> {report} | toplam: {(time.perf_counter() - start) * 1000:.1f}ms")
+    return results, timings, failed
+
+def build_where(source=None, madde_no=None):
+    """Chroma 'where' filtresi: metadata filtresi aramanın içinde uygulanır (Python'da sonradan eleme yok)."""
+    conditions = [{field: value} for field, value in (("source", source), ("madde_no", madde_no)) if value]
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+def rerank_unless_confident(query, confidence, candidates, top_k):
+    """
+    Kanatlar aynı ilk sonuçta birleşiyorsa (yüksek füzyon güveni) füzyonun ilk sonucu
+    (candidates[0]) başta tutulur, sadece kalan adaylar cross-encoder ile sıralanır.
+    Füzyon güveni yalnızca ilk sonuç için geçerlidir; 2..k sırası yine reranker'ın.
+    """
+    if confidence >= SKIP_RERANK_CONFIDENCE and candidates:
+        logger.info(f"⚡ Füzyon güveni yüksek ({confidence:.2f}), ilk sonuç reranker'sız tutuldu.")
+        if top_k <= 1:
+            return candidates[:1]
+        return candidates[:1] + rerank_documents(query, candidates[1:], top_k=top_k - 1)
+    return rerank_documents(query, candidates, top_k=top_k)
+
+def format_point_context(docs):
+    """Nokta atışı sonuçlarını responder'ın beklediği bağlam formatına çevirir."""
+    context = ""
+    for i, doc in enumerate(docs):
+        src = doc.metadata.get("source", "Bilinmiyor")
+        madde = doc.metadata.get("madde_no", "-")
+        context += f"--- SONUÇ {i+1} (KAYNAK: {src} | {madde}) ---\n{doc.page_content}\n\n"
+    return context
 
 #region Point Search
 @tool
@@ -48,105 +151,78 @@ def point_search_tool(query: str, target_source: Optional[str] = None) -> str:
         query (str): Arama sorgusu.
         target_source (str, optional): Eğer belirli bir belge içinde aranacaksa dosya adı (örn: 'KVKK.pdf'). Yoksa None.
     """
+    return run_search("point_search", query, target_source)[0]
 
-    # 1. KANAT: Vektör Araması
-    try:
-        vector_results = vector_db.similarity_search(query, k=10)
-        #logger.info(f"vector search: {vector_results}")
-    except Exception as e:
-        logger.error(f"Vektör arama hatası: {e}")
-        vector_results = []
-    
-    # 2. KANAT: BM25 (Kelime bazlı)
-    bm25 = get_bm25_retriever()
-    bm25_results = []
-    
-    if bm25:
-        # Eğer hedef kaynak varsa, BM25'ten daha fazla veri çekip sonra filtreliyoruz
-        # (Çünkü BM25'te native filter yok, Python tarafında eliyoruz)
-        bm25.k = 10
-        raw_bm25 = bm25.invoke(query)
-        
-        if target_source:
-            bm25_results = [doc for doc in raw_bm25 if doc.metadata.get("source") == target_source]
-        else:
-            bm25_results = raw_bm25
-        
-        #logger.info(f"bm25: {bm25_results}")
+def point_search(query, target_source=None):
+    legs, _, failed = run_retrieval_legs({
+        # 1. KANAT: Vektör Araması (skorlarıyla birlikte; mesafe küçükse skor büyük olsun diye eksi işaretli)
+        "vector": lambda: [
+            (doc, -distance) for doc, distance in get_chroma_client().similarity_search_by_vector_with_relevance_scores(
+                embed_query(query), k=10, filter=build_where(source=target_source)
+            )
+        ],
+        # 2. KANAT: BM25 (Kelime bazlı)
+        # Hedef kaynak filtresi her iki kanatta da aramanın içinde uygulanır; k sonuç doğrudan o kaynaktan gelir
+        "keyword": lambda: get_keyword_index().search(query, k=10, source=target_source),
+    })
 
-    # 3. ADIM: Adayları birleştir
-    combined_results = {doc.page_content: doc for doc in (vector_results + bm25_results)}.values()
+    # 3. ADIM: Adayları chunk ID'ye göre birleştir (sıra/skor bilgisi korunur)
+    fused = fuse_results(legs)
+    combined_results = [doc for doc, _ in fused]
     
     # Eğer filtreleme sonucu eldeki veri sıfırsa erken dön
     if not combined_results:
         msg = f"'{target_source}' kaynağında aradığınız bilgi bulunamadı." if target_source else "Sonuç bulunamadı."
-        return msg
+        return search_result(msg, failed, found=False)
 
-    # 4. ADIM: Reranking
-    final_docs = rerank_documents(query, list(combined_results), top_k=3) # Point search olduğu için az ve öz
+    # 4. ADIM: Reranking (kanatlar hemfikirse atlanır)
+    final_docs = rerank_unless_confident(query, fusion_confidence(legs, fused), combined_results, top_k=3) # Point search olduğu için az ve öz
     
     # ADIM 5: Formatlama
-    context = ""
-    for i, doc in enumerate(final_docs):
-        src = doc.metadata.get("source", "Bilinmiyor")
-        madde = doc.metadata.get("madde_no", "-")
-        context += f"--- SONUÇ {i+1} (KAYNAK: {src} | {madde}) ---\n{doc.page_content}\n\n"
-        
-    return context if context else "Aradığınız kriterlere uygun net bir bilgi bulunamadı."
+    context = format_point_context(final_docs)
+    if not context:
+        return search_result("Aradığınız kriterlere uygun net bir bilgi bulunamadı.", failed, found=False)
+    return search_result(context, failed)
 
 #region Broad Search
 @tool
-def broad_search_tool(query: str) -> str:
+def broad_search_tool(query: str, target_source: Optional[str] = None) -> str:
     """
     GENİŞ ARAMA (Discovery Search):
     Konuyu anlamak için tüm kaynaklardan geniş kapsamlı ve çeşitli bilgi toplar.
     
     Args:
         query (str): Arama sorgusu.
+        target_source (str, optional): Verilirse geniş arama sadece bu belge içinde yapılır. Yoksa None.
     """
-    logger.info(f"🌐 GENİŞ ARAMA Başlatıldı: {query}")
-    
-    # ADIM 1: MMR Arama (Vektör Çeşitliliği - Filtresiz)
-    mmr_docs = vector_db.max_marginal_relevance_search(
-        query, 
-        k=20, 
-        fetch_k=30, 
-        lambda_mult=0.5
-    )
-    
-    # ADIM 2: BM25 (Anahtar kelime takviyesi)
-    bm25 = get_bm25_retriever()
-    bm25_docs = []
-    
-    if bm25:
-        bm25.k = 10 # Havuzu geniş tutuyoruz
-        bm25_docs = bm25.invoke(query)
+    return run_search("broad_search", query, target_source)[0]
+
+def broad_search(query, target_source=None):
+    logger.info(f"🌐 GENİŞ ARAMA Başlatıldı: {query} (Kaynak: {target_source or 'TÜMÜ'})")
     
-    # ADIM 3: Birleştirme & Gruplama
-    all_candidates = list({doc.page_content: doc for doc in (mmr_docs + bm25_docs)}.values())
+    legs, _, failed = run_retrieval_legs({
+        # ADIM 1: MMR Arama (Vektör Çeşitliliği - hedef kaynak varsa sadece o belgede)
+        # Adaylar saklı embedding'leriyle tek sorguda gelir, MMR NumPy ile yapılır (src/tools/diversity.py)
+        "vector": lambda: diverse_search(
+            get_chroma_collection(),
+            embed_query(query),
+            where=build_where(source=target_source),
+        ),
+        # ADIM 2: BM25 (Anahtar kelime takviyesi)
+        "keyword": lambda: get_keyword_index().search(query, k=10, source=target_source), # Havuzu geniş tutuyoruz
+    })
     
-    docs_by_source = {}
-    for doc in all_candidates:
-        source = doc.metadata.get("source", "Bilinmiyor")
-        if source not in docs_by_source:
-            docs_by_source[source] = []
-        
-        # İçerik tekrarını önle
-        if doc.page_content not in [d.page_content for d in docs_by_source[source]]:
-            docs_by_source[source].append(doc)
+    # ADIM 3: Füzyon (chunk ID ile tekilleştirme)
+    fused = fuse_results(legs)
+    all_candidates = [doc for doc, _ in fused]
 
     # ADIM 4: Round Robin (Sırayla Seçme - Adil Dağılım)
-    # Her kaynaktan eşit sayıda veri alarak çeşitliliği garanti ediyoruz
-    diverse_selection = []
-    max_items_per_source = 3 # Her kaynaktan en fazla 3 tane al
-    
-    for i in range(max_items_per_source):
-        for source in docs_by_source:
-            if i < len(docs_by_source[source]):
-                diverse_selection.append(docs_by_source[source][i])
-                    
+    # Her kaynaktan en fazla MAX_PER_SOURCE aday, kaynaklar sırayla
+    picked = quota_select([doc.metadata.get("source", "Bilinmiyor") for doc in all_candidates])
+    diverse_selection = [all_candidates[i] for i in picked]
+
     # ADIM 5: Reranking (Final Kalite Kontrol)
-    final_docs = rerank_documents(query, diverse_selection, top_k=6)
+    final_docs = rerank_unless_confident(query, fusion_confidence(legs, fused), diverse_selection, top_k=6)
     
     context = ""
     for i, doc in enumerate(final_docs):
@@ -154,4 +230,23 @@ def broad_search_tool(query: str) -> str:
         madde = doc.metadata.get("madde_no", "-")
         context += f"--- DOKÜMAN {i+1} (KAYNAK: {src} | {madde}) ---\n{doc.page_content}\n\n"
         
-    return context if context else "Bulunamadı."
\ No newline at end of file
+    if not context:
+        return search_result("Bulunamadı.", failed, found=False)
+    return search_result(context, failed)
+
+# --- ÖNBELLEKLİ ARAMA ---
+# Aynı (sorgu, kaynak) için indeks sürümü değişmediyse önceki çıktı döner. Sadece tam
+# (hiçbir kanadı düşmemiş) ve sonuç bulmuş aramalar önbelleğe yazılır; bir kanadın
+# anlık yavaşlığı bozuk bağlamı TTL boyunca sabitlemez.
+SEARCHES = {"point_search": point_search, "broad_search": broad_search}
+
+def search_result(context, failed, found=True):
+    return {"context": context, "degraded": bool(failed), "found": found}
+
+def is_cacheable(result):
+    return result["found"] and not result["degraded"]
+
+def run_search(namespace, query, target_source=None):
+    """(bağlam, degraded): degraded=True ise bir kanat zaman aşımı/hata verdi (kısmi sonuç)."""
+    result = cached_call(namespace, SEARCHES[namespace], query, target_source, cacheable=is_cacheable)
+    return result["context"], result["degraded"]
\ No newline at end of file
@@ -0,0 +1,97 @@
+import os
+import logging
+import numpy as np
+from src import registry
+from src.vectordb.embedding_cache import embed_query
+from src.vectordb.index_version import current_index_version
+from src.tools.article_lookup import SourceAliases, alias_text
+from src.agents.summarize_node import get_summary_db
+
+logger = logging.getLogger(__name__)
+
+# --- HEDEF KAYNAK ÇÖZÜCÜ ---
+# Analizer prompt'una tüm dosya listesini koymak yerine aday kaynaklar yerelde bulunur:
+#   1. Takma ad / dosya adı atfı ("KVKK'da", "silme yönetmeliğinde") -> hedef kaynak
+#      doğrudan belirlenir, prompt'a liste konmaz. Kesin karar SADECE bu yoldan çıkar.
+#   2. Soru embedding'i ile legal_summaries koleksiyonundaki belge özeti
+#      embedding'lerinin benzerliği -> en iyi SOURCE_CANDIDATES kaynak. Benzerlik yalnızca
+#      listeyi kısaltır; hedef kaynağı (veya "tümü") yine LLM seçer.
+# Özet veritabanı yoksa aday listesi data klasöründeki tüm dosyalardır (eski davranış).
+DATA_PATH = "./data"
+SOURCE_CANDIDATES = int(os.getenv("SOURCE_RESOLVER_CANDIDATES", 3))
+
+def list_data_sources(data_path=DATA_PATH):
+    try:
+        return sorted(f for f in os.listdir(data_path) if f.endswith('.pdf'))
+    except OSError:
+        return []
+
+class SourceResolver:
+    """Kaynak adları + (varsa) normalize özet embedding matrisi."""
+    def __init__(self, sources, summary_sources=(), summary_vectors=None, index_version=None, embed=embed_query):
+        self.embed = embed
+        self.sources = sorted(set(sources) | set(summary_sources))
+        self.aliases = SourceAliases(self.sources)
+        self.summary_sources = list(summary_sources)
+        self.summary_vectors = summary_vectors
+        self.index_version = index_version
+
+    @classmethod
+    def from_summary_store(cls, db, sources):
+        """Özet koleksiyonundaki saklı embedding'leri tek sorguda okur (model çalışmaz)."""
+        if db is None:
+            return cls(sources, index_version=current_index_version())
+        stored = db.get(include=["embeddings", "metadatas"])
+        summary_sources = [(meta or {}).get("source", doc_id) for doc_id, meta in zip(stored["ids"], stored["metadatas"])]
+        vectors = np.asarray(stored["embeddings"], dtype=np.float32)
+        if len(vectors):
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        logger.info(f"🧭 Kaynak çözücü: {len(summary_sources)} özet embedding'i yüklendi.")
+        return cls(sources, summary_sources, vectors if len(vectors) else None, current_index_version())
+
+    def explicit_source(self, question):
+        """Soruda takma ad / dosya adıyla atıf yapılan kaynak, yoksa None."""
+        return self.aliases.match(alias_text(question))
+
+    def referenced_sources(self, question):
+        """Soruda takma ad / dosya adıyla atıf yapılan tüm kaynaklar (frozenset)."""
+        return self.aliases.match_all(alias_text(question))
+
+    def rank(self, question, k=SOURCE_CANDIDATES):
+        """[(kaynak, kosinüs benzerliği), ...] özet benzerliğine göre en yakın k kaynak."""
+        if self.summary_vectors is None:
+            return []
+        query = np.asarray(self.embed(question), dtype=np.float32)
+        similarity = self.summary_vectors @ (query / max(float(np.linalg.norm(query)), 1e-12))
+        top = np.argsort(-similarity)[:k]
+        return [(self.summary_sources[i], float(similarity[i])) for i in top]
+
+    def prompt_sources(self, question):
+        """
+        Analizer için (kesin hedef kaynak | None, prompt'a konacak kaynak listesi).
+        Kesin kaynak yalnızca açık atıfta döner; benzerlik sadece listeyi kısaltır.
+        """
+        explicit = self.explicit_source(question)
+        if explicit is not None:
+            return explicit, []
+        ranked = self.rank(question)
+        if not ranked:
+            return None, self.sources
+        return None, [source for source, _ in ranked]
+
+    def validate(self, source):
+        """LLM'in döndürdüğü dosya adı gerçekten var mı? Yoksa None."""
+        return source if source in self.sources else None
+
+def create_source_resolver():
+    return SourceResolver.from_summary_store(get_summary_db(), list_data_sources())
+
+def get_source_resolver():
+    """Süreç genelinde paylaşılan kaynak çözücü; özetler değişince (indeks sürümü) yeniden kurulur."""
+    resolver = registry.get_or_create("source_resolver", create_source_resolver)
+    if resolver.index_version != current_index_version():
+        registry.evict("source_resolver")
+        resolver = registry.get_or_create("source_resolver", create_source_resolver)
+    return resolver
+
+registry.register_loader("source_resolver", get_source_resolver)
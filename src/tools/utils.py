@@ -1,8 +1,10 @@
 import os
 import logging
 from typing import List
-from sentence_transformers import CrossEncoder
 import sys
+import numpy as np
+from src.tools.rerank_service import get_rerank_service
+from src.vectordb.embedding_cache import embed_query
 
 # Logger
 logging.basicConfig(
@@ -15,35 +17,85 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# RERANKER: Cross-Encoder (MULTILINGUAL)
-RERANKER_MODEL_NAME = 'cross-encoder/mmarco-mMiniLMv2-L12-H384-v1'
-RERANKER_MODEL = None
+# RERANKER: Cross-Encoder (MULTILINGUAL) -> model yükleme, skor önbelleği ve
+# micro-batching src/tools/rerank_service.py içindedir
 
-try:
-    logger.info(f"--- Multilingual Reranker Modeli Yükleniyor: {RERANKER_MODEL_NAME} ---")
-    RERANKER_MODEL = CrossEncoder(RERANKER_MODEL_NAME)
-    logger.info("✅ Multilingual Reranker Hazır.")
-except Exception as e:
-    logger.error(f"Reranker yüklenirken kritik hata: {e}")
+# --- KADEMELİ (CASCADE) RERANKING ---
+# "full"   : tüm adaylar cross-encoder'dan geçer (varsayılan)
+# "cascade": adaylar önce elimizdeki embedding'lerle (bi-encoder) ucuzca sıralanır,
+#            sadece ilk CASCADE_TOP_N aday CASCADE_STAGE_SIZE'lık kademelerle
+#            cross-encoder'a gider; en iyi iki skor arasındaki fark
+#            EARLY_EXIT_MARGIN'i geçerse kalan kademeler atlanır.
+RERANK_MODE = os.getenv("RERANK_MODE", "full")
+CASCADE_TOP_N = int(os.getenv("RERANK_CASCADE_TOP_N", 10))
+CASCADE_STAGE_SIZE = int(os.getenv("RERANK_CASCADE_STAGE_SIZE", 5))
+EARLY_EXIT_MARGIN = float(os.getenv("RERANK_EARLY_EXIT_MARGIN", 0.3))
+
+def bi_encoder_scores(query, docs):
+    """
+    Sorgu ile chunk'ların kosinüs benzerliği. Chunk vektörleri Chroma'da saklı
+    embedding'lerden tek get() ile okunur; istek yolunda model çalışmaz ve embedding
+    önbelleğine yazılmaz. Saklı vektörü bulunamayan aday (ID'siz / silinmiş) ön
+    elemede tarafsız kalır: bilinen skorların medyanını alır.
+    """
+    from src.vectordb.vectorize import get_chroma_client
+
+    query_vector = np.asarray(embed_query(query), dtype=np.float32)
+    query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+
+    ids = list(dict.fromkeys(doc.id for doc in docs if doc.id))
+    stored = get_chroma_client().get(ids=ids, include=["embeddings"]) if ids else {"ids": [], "embeddings": []}
+    vectors = dict(zip(stored["ids"], stored["embeddings"]))
+
+    scores = np.full(len(docs), np.nan, dtype=np.float32)
+    known = [i for i, doc in enumerate(docs) if doc.id in vectors]
+    if known:
+        doc_vectors = np.asarray([vectors[docs[i].id] for i in known], dtype=np.float32)
+        doc_vectors /= np.clip(np.linalg.norm(doc_vectors, axis=1, keepdims=True), 1e-12, None)
+        scores[known] = doc_vectors @ query_vector
+    if len(known) < len(docs):
+        scores[np.isnan(scores)] = float(np.median(scores[known])) if known else 0.0
+    return scores
+
+def cascade_rerank(reranker, query, docs, top_k):
+    """Bi-encoder ön eleme + kademeli cross-encoder + skor farkıyla erken çıkış."""
+    order = np.argsort(-bi_encoder_scores(query, docs), kind="stable")[:max(CASCADE_TOP_N, top_k)]
+    stage_size = max(CASCADE_STAGE_SIZE, top_k)
+
+    scored = []
+    for start in range(0, len(order), stage_size):
+        stage = [docs[i] for i in order[start : start + stage_size]]
+        scored.extend(zip(stage, reranker.score(query, [doc.page_content for doc in stage])))
+        scored.sort(key=lambda x: x[1], reverse=True)
+        if len(scored) > 1 and scored[0][1] - scored[1][1] >= EARLY_EXIT_MARGIN:
+            break
+
+    logger.info(f"Cascade: {len(docs)} adaydan {len(scored)} tanesi cross-encoder'dan geçti.")
+    return scored
 
 #region ReRanker
-def rerank_documents(query: str, docs, top_k=5):
+def rerank_documents(query: str, docs, top_k=5, mode=None):
     """
     Multi-Stage Retrieval - Aşama 2: Reranking (Yeniden Sıralama)
+    mode: "full" veya "cascade" (verilmezse RERANK_MODE)
     """
+    mode = mode or RERANK_MODE
     if not docs:
         return []
-    if RERANKER_MODEL is None:
+    reranker = get_rerank_service()
+    if reranker is None:
         logger.warning("Reranker modeli yüklü değil, ham vektör sonuçları dönülüyor.")
         return docs[:top_k]
 
     logger.info(f"Reranking işlemi {len(docs)} doküman üzerinde yapılıyor...")
     
-    pairs = [[query, doc.page_content] for doc in docs]
-    
     try:
-        scores = RERANKER_MODEL.predict(pairs)
-        scored_docs = sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)
+        # Önbellekte olan (sorgu, chunk) skorları tekrar hesaplanmaz
+        if mode == "cascade" and len(docs) > top_k:
+            scored_docs = cascade_rerank(reranker, query, docs, top_k)
+        else:
+            scores = reranker.score(query, [doc.page_content for doc in docs])
+            scored_docs = sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)
         
         if scored_docs:
             logger.info(f"En iyi eşleşme skoru: {scored_docs[0][1]:.4f}")
@@ -1,13 +1,21 @@
 import os
+import json
+import time
+import random
+import hashlib
 import logging
-import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_chroma import Chroma
 from langchain_ollama import ChatOllama, OllamaEmbeddings
 from langchain_core.documents import Document
 from langchain_core.prompts import PromptTemplate
 from dotenv import load_dotenv
-from src.vectordb.embedding import get_embedding_model
+from src.vectordb.embedding_cache import get_cached_embedding_model
+from src.vectordb.vectorize import load_pdf_text, parse_pdf_file, file_sha256
+from src.vectordb.parallel import parallel_map
+from src.vectordb.index_version import bump_index_version
 import os
 
 
@@ -21,6 +29,30 @@ COLLECTION_NAME = "legal_summaries"
 
 # Model ayarları (RTX 5060 gücüyle)
 LLM_MODEL = "gemma3:12b"
+SUMMARY_MODEL_NAME = "gemini-2.0-flash"
+
+# --- EŞZAMANLILIK, HIZ LİMİTİ VE ÖNBELLEK AYARLARI ---
+# Aynı anda en fazla kaç özet isteği uçuşta olabilir
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", 4))
+# Dakikada en fazla kaç LLM isteği atılabilir (token bucket dolum hızı)
+SUMMARY_RPM = float(os.getenv("SUMMARY_RPM", 30))
+# 429 / kota hatalarında en fazla kaç kez yeniden denenir
+SUMMARY_MAX_RETRIES = int(os.getenv("SUMMARY_MAX_RETRIES", 5))
+# Prompt veya özetleme mantığı değişirse artırılmalı; eski önbellek kayıtları bayatlar
+SUMMARY_PROMPT_VERSION = "v1"
+# Önbellek, reset'te silinen özet DB klasörünün DIŞINDA (git'e girmeyen ./cache altında) tutulur
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "./cache/summary_cache.json")
+LEGACY_SUMMARY_CACHE_PATH = "./summary_cache.json"   # eski konum: varsa bir kez okunur
+
+# --- HİYERARŞİK (MAP-REDUCE) ÖZETLEME AYARLARI ---
+# "map_reduce": madde grupları ayrı ayrı özetlenip birleştirilir (tüm belge kapsanır)
+# "truncate"  : eski davranış, sadece ilk 25.000 karakter özetlenir
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "map_reduce")
+MAP_PROMPT_VERSION = "v1"
+# Tek bir LLM çağrısına giden metin üst sınırı (map ve reduce adımları için)
+MAP_GROUP_CHARS = int(os.getenv("SUMMARY_GROUP_CHARS", 12000))
+# Ara özetler bu kadar reduce seviyesinden sonra hâlâ sığmıyorsa kırpılır
+MAX_REDUCE_LEVELS = int(os.getenv("SUMMARY_MAX_REDUCE_LEVELS", 5))
 
 
 
@@ -44,11 +76,114 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 
 # ANALİZ İÇİN: Gemini 1.5 Flash (Çok hızlı, ucuz ve JSON çıktısı mükemmel)
 llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
+    model=SUMMARY_MODEL_NAME,
     temperature=0,
     max_retries=2,
 )
 
+#region Rate Limit
+class TokenBucket:
+    """
+    Thread-safe token bucket. Saniyede `rate` jeton dolar, en fazla `capacity`
+    jeton birikir. acquire() jeton yoksa bir sonraki jeton dolana kadar bekler.
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+rate_limiter = TokenBucket(rate=SUMMARY_RPM / 60.0, capacity=max(1, SUMMARY_CONCURRENCY))
+
+def is_rate_limit_error(error):
+    """Gemini'nin 429 / kota aşımı hatalarını tanır."""
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message or "quota" in message.lower()
+
+def call_with_rate_limit(func, *args):
+    """
+    func'ı token bucket'tan jeton alarak çağırır. 429 hatalarında üstel
+    geri çekilme (exponential backoff + jitter) ile yeniden dener.
+    """
+    for attempt in range(SUMMARY_MAX_RETRIES + 1):
+        rate_limiter.acquire()
+        try:
+            return func(*args)
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt == SUMMARY_MAX_RETRIES:
+                raise
+            delay = min(60.0, 2 ** attempt) + random.uniform(0, 1)
+            logger.warning(f"⏳ Hız limiti (429), {delay:.1f}sn sonra tekrar denenecek ({attempt + 1}/{SUMMARY_MAX_RETRIES})")
+            time.sleep(delay)
+
+#region Summary Cache
+class SummaryCache:
+    """
+    Dosya içerik hash'i + prompt sürümü + model adına göre anahtarlanan,
+    diskte JSON olarak tutulan özet önbelleği. Değişmeyen belgeler tekrar özetlenmez.
+    """
+    def __init__(self, path=SUMMARY_CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if not os.path.exists(path) and os.path.exists(LEGACY_SUMMARY_CACHE_PATH):
+            logger.info(f"📦 Özet önbelleği eski konumdan okunuyor, {path} altına taşınacak.")
+            path = LEGACY_SUMMARY_CACHE_PATH
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                logger.error(f"❌ Özet önbelleği okunamadı, boş başlatılıyor: {e}")
+
+    @staticmethod
+    def make_key(sha256):
+        """Belge özeti anahtarı (özetleme modu da anahtara dahildir)."""
+        return f"{sha256}:{SUMMARY_MODE}:{SUMMARY_PROMPT_VERSION}:{SUMMARY_MODEL_NAME}"
+
+    @staticmethod
+    def make_partial_key(text):
+        """Madde grubu (map adımı) ara özet anahtarı: grubun metin hash'i."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"partial:{digest}:{MAP_PROMPT_VERSION}:{SUMMARY_MODEL_NAME}"
+
+    def get(self, sha256):
+        return self.entries.get(self.make_key(sha256))
+
+    def put(self, sha256, entry):
+        with self.lock:
+            self.entries[self.make_key(sha256)] = entry
+            self.flush()
+
+    def get_partial(self, text):
+        return self.entries.get(self.make_partial_key(text))
+
+    def put_partial(self, text, summary):
+        # Ara özet hemen diske yazılır: reduce başarısız olsa da ödenmiş map çağrıları kaybolmaz
+        with self.lock:
+            self.entries[self.make_partial_key(text)] = summary
+            self.flush()
+
+    def flush(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
 def get_files(directory):
     """Klasördeki PDF dosyalarını listeler."""
     return [f for f in os.listdir(directory) if f.endswith('.pdf')]
@@ -87,67 +222,240 @@ def generate_summary_with_llm(text, filename):
     
     return response.content
 
-def create_summary_db(reset=False):
-    """Özetleri oluşturur ve ChromaDB'ye kaydeder."""
-    
-    # 1. Eğer reset isteniyorsa eski DB'yi sil
-    if reset and os.path.exists(SUMMARY_DB_PATH):
-        logger.warning(f"🗑️ Eski özet veritabanı siliniyor: {SUMMARY_DB_PATH}")
-        shutil.rmtree(SUMMARY_DB_PATH)
+#region Map-Reduce
+# Map adımı çağrıları için ayrı havuz: belge seviyesindeki işçiler bu havuzu
+# beklerken kilitlenme (deadlock) olmasın diye ikisi ayrı tutulur.
+map_executor = ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY)
+
+def group_articles(docs, max_chars=MAP_GROUP_CHARS):
+    """
+    Ardışık madde Document'larını, her grup max_chars'ı aşmayacak şekilde paketler.
+    Tek başına sınırı aşan uzun maddeler parçalara bölünür.
+    Dönen liste: [(etiket, metin), ...]
+    """
+    groups = []
+    texts, labels, size = [], [], 0
+
+    def close_group():
+        if texts:
+            label = labels[0] if len(labels) == 1 else f"{labels[0]} - {labels[-1]}"
+            groups.append((label, "\n\n".join(texts)))
 
-    # 2. Dosyaları Bul
+    for doc in docs:
+        label = doc.metadata.get("madde_no", "Bölüm")
+        text = doc.page_content
+        pieces = [text[i : i + max_chars] for i in range(0, len(text), max_chars)] or [""]
+        for piece in pieces:
+            if texts and size + len(piece) > max_chars:
+                close_group()
+                texts, labels, size = [], [], 0
+            texts.append(piece)
+            labels.append(label)
+            size += len(piece)
+
+    close_group()
+    return groups
+
+def summarize_article_group(label, text, filename):
+    """Map adımı: tek bir madde grubunu kısaca özetler."""
+    prompt = PromptTemplate.from_template(
+        """Aşağıda bir hukuki belgenin ardışık maddeleri var. Bu maddeleri kısa ve net özetle.
+        Varsa TANIMLARI, YÜKÜMLÜLÜKLERİ, SÜRELERİ ve CEZAİ YAPTIRIMLARI mutlaka koru.
+        
+        BELGE ADI: {filename}
+        BÖLÜM: {label}
+        
+        METİN:
+        {text}
+        
+        KISA ÖZET:"""
+    )
+    chain = prompt | llm
+    response = chain.invoke({"text": text, "filename": filename, "label": label})
+    return response.content
+
+def reduce_summaries(partials, filename):
+    """Reduce adımı: ara özetleri tek bir belge özetinde birleştirir."""
+    prompt = PromptTemplate.from_template(
+        """Aşağıda bir hukuki belgenin bölüm bölüm çıkarılmış ara özetleri var.
+        Bunları birleştirerek belgenin tamamını kapsayan kapsamlı bir özet yaz.
+        
+        GÖREVLER:
+        1. Bu belgenin AMACI nedir?
+        2. KAPSADIĞI ana konular nelerdir?
+        3. Varsa önemli TANIMLAR veya CEZAİ YAPTIRIMLAR nelerdir?
+        4. Maddeler halinde, net ve anlaşılır bir Türkçe ile özetle.
+        
+        BELGE ADI: {filename}
+        
+        ARA ÖZETLER:
+        {text}
+        
+        ÖZET:"""
+    )
+    chain = prompt | llm
+    response = chain.invoke({"text": "\n\n".join(partials), "filename": filename})
+    return response.content
+
+def map_group(label, text, filename, cache):
+    """Ara özeti önbellekten okur, yoksa LLM ile üretip önbelleğe koyar."""
+    cached = cache.get_partial(text)
+    if cached is not None:
+        return cached
+    summary = call_with_rate_limit(summarize_article_group, label, text, filename)
+    cache.put_partial(text, summary)
+    return summary
+
+def batch_partials(partials, max_chars=MAP_GROUP_CHARS):
+    """Ardışık ara özetleri her paket max_chars'ı aşmayacak şekilde gruplar (tek başına büyük olan kendi paketidir)."""
+    batches, batch, size = [], [], 0
+    for partial in partials:
+        if batch and size + len(partial) > max_chars:
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(partial)
+        size += len(partial)
+    if batch:
+        batches.append(batch)
+    return batches
+
+def map_reduce_summary(docs, filename, cache):
+    """
+    Hiyerarşik özet: madde grupları paralel özetlenir (map), ara özetler
+    birleştirilir (reduce). Ara özetlerin toplamı tek çağrıya sığana kadar reduce
+    adımı paketler halinde tekrarlanır (tek başına sığmayan ara özet de kendi
+    başına yeniden özetlenir); böylece son çağrı dahil her girdi sınırlı kalır.
+    """
+    groups = group_articles(docs)
+    logger.info(f"🧩 {filename}: {len(groups)} madde grubu özetleniyor (map)...")
+    futures = [map_executor.submit(map_group, label, text, filename, cache) for label, text in groups]
+    partials = [f"[{label}]\n{future.result()}" for (label, _), future in zip(groups, futures)]
+
+    level = 1
+    while sum(len(p) for p in partials) > MAP_GROUP_CHARS:
+        if level > MAX_REDUCE_LEVELS:
+            logger.warning(f"⚠️ {filename}: ara özetler {MAX_REDUCE_LEVELS} seviyede küçülmedi, kırpılıyor.")
+            budget = MAP_GROUP_CHARS // len(partials)
+            partials = [p[:budget] for p in partials]
+            break
+        batches = batch_partials(partials)
+        logger.info(f"🔁 {filename}: {len(partials)} ara özet {len(batches)} pakette birleştiriliyor (reduce seviye {level})...")
+        futures = [map_executor.submit(call_with_rate_limit, reduce_summaries, b, filename) for b in batches]
+        partials = [future.result() for future in futures]
+        level += 1
+
+    logger.info(f"🤖 {filename} için nihai özet yazılıyor (reduce)...")
+    return call_with_rate_limit(reduce_summaries, partials, filename)
+
+def summarize_pdf(pdf_file, content, cache):
+    """
+    Thread pool işçisi: tek bir belgeyi hız limitine uyarak özetler.
+    content: map_reduce modunda madde Document listesi, truncate modunda düz metin.
+    """
+    logger.info(f"📄 İşleniyor: {pdf_file}")
+    if SUMMARY_MODE == "map_reduce":
+        summary_text = map_reduce_summary(content, pdf_file, cache)
+        original_length = sum(len(doc.page_content) for doc in content)
+    else:
+        summary_text = call_with_rate_limit(generate_summary_with_llm, content, pdf_file)
+        original_length = len(content)
+    return {"summary": summary_text, "original_length": original_length}
+
+def create_summary_db(reset=False, workers=None):
+    """
+    Özetleri oluşturur ve ChromaDB'ye kaydeder.
+    - Özetler içerik hash'ine göre önbellekten okunur; sadece yeni/değişen belgeler LLM'e gider.
+    - Eksik özetler SUMMARY_CONCURRENCY kadar paralel, SUMMARY_RPM hız limitiyle üretilir.
+    - SUMMARY_MODE=map_reduce (varsayılan) ise belge madde gruplarına bölünüp hiyerarşik özetlenir.
+    - PDF metinleri `workers` adet süreçte paralel çıkarılır.
+    reset=True ise vektör DB baştan kurulur, ama önbellek korunur (sadece bayat kayıtlar yenilenir).
+    """
+    
+    # 1. Dosyaları Bul
     pdf_files = get_files(DATA_PATH)
     if not pdf_files:
         logger.error("❌ Data klasöründe PDF bulunamadı!")
         return
 
     logger.info(f"📂 Bulunan Dosyalar: {pdf_files}")
-    
-    summary_docs = []
 
-    # 3. Her PDF için Döngü
+    # 2. Önbellek kontrolü
+    cache = SummaryCache()
+    hashes = {pdf_file: file_sha256(os.path.join(DATA_PATH, pdf_file)) for pdf_file in pdf_files}
+    missing_files = [f for f in pdf_files if cache.get(hashes[f]) is None]
+    logger.info(f"🗂️ Önbellek: {len(pdf_files) - len(missing_files)} hazır, {len(missing_files)} özetlenecek.")
+
+    # 3. Eksik özetler: metin çıkarma / madde bölme process pool'da, LLM çağrıları thread pool'da
+    if missing_files:
+        with ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY) as executor:
+            futures = {}
+            loader = parse_pdf_file if SUMMARY_MODE == "map_reduce" else load_pdf_text
+            for pdf_file, content, error in parallel_map(loader, missing_files, workers=workers):
+                if error is not None:
+                    logger.error(f"❌ {pdf_file} işlenirken hata: {error}")
+                    continue
+                futures[executor.submit(summarize_pdf, pdf_file, content, cache)] = pdf_file
+
+            for future in as_completed(futures):
+                pdf_file = futures[future]
+                try:
+                    cache.put(hashes[pdf_file], future.result())
+                    logger.info(f"✅ {pdf_file} özeti hazırlandı.")
+                except Exception as e:
+                    logger.error(f"❌ {pdf_file} işlenirken hata: {e}")
+
+    # Document objesi oluştur (Metadata çok önemli!)
+    # Metadata'ya 'source' ekliyoruz ki Supervisor "kvkk.pdf" diyerek bulabilsin.
+    summary_docs = []
     for pdf_file in pdf_files:
-        file_path = os.path.join(DATA_PATH, pdf_file)
-        logger.info(f"📄 İşleniyor: {pdf_file}")
-        
-        try:
-            # PDF'i yükle ve metni birleştir
-            loader = PyPDFLoader(file_path)
-            pages = loader.load()
-            full_text = " ".join([p.page_content for p in pages])
-            
-            # LLM ile Özetle
-            summary_text = generate_summary_with_llm(full_text, pdf_file)
-            
-            # Document objesi oluştur (Metadata çok önemli!)
-            # Metadata'ya 'source' ekliyoruz ki Supervisor "kvkk.pdf" diyerek bulabilsin.
-            doc = Document(
-                page_content=summary_text,
-                metadata={
-                    "source": pdf_file,       # Örn: kvkk.pdf
-                    "original_length": len(full_text),
-                    "type": "summary"
-                }
-            )
-            summary_docs.append(doc)
-            logger.info(f"✅ {pdf_file} özeti hazırlandı.")
-            
-        except Exception as e:
-            logger.error(f"❌ {pdf_file} işlenirken hata: {e}")
+        entry = cache.get(hashes[pdf_file])
+        if entry is None:
+            continue
+        summary_docs.append(Document(
+            page_content=entry["summary"],
+            metadata={
+                "source": pdf_file,       # Örn: kvkk.pdf
+                "original_length": entry["original_length"],
+                "type": "summary"
+            }
+        ))
 
-    # 4. ChromaDB'ye Kaydet
+    # 4. ChromaDB'ye Kaydet (kaynak adı = ID, böylece tekrar çalıştırmada kopya oluşmaz)
     if summary_docs:
         logger.info("💾 Özetler veritabanına yazılıyor...")
-        embedding_fn = get_embedding_model()
-         
+        embedding_fn = get_cached_embedding_model()
         
-        db = Chroma.from_documents(
-            documents=summary_docs,
-            embedding=embedding_fn,
+        db = Chroma(
             persist_directory=SUMMARY_DB_PATH,
+            embedding_function=embedding_fn,
             collection_name=COLLECTION_NAME
         )
-        logger.info(f"🎉 İşlem Tamam! {len(summary_docs)} belge özeti kaydedildi.")
+
+        # Kayıtlı özetler: sadece metni değişen / yeni özetler yazılır
+        stored = db.get(include=["documents"])
+        previous = dict(zip(stored["ids"], stored["documents"]))
+
+        # Eğer reset isteniyorsa eski koleksiyonu sil (önbellek korunur)
+        if reset:
+            logger.warning(f"🗑️ Eski özet koleksiyonu siliniyor: {COLLECTION_NAME}")
+            db.reset_collection()
+
+        changed = [doc for doc in summary_docs if previous.get(doc.metadata["source"]) != doc.page_content]
+        to_write = summary_docs if reset else changed
+        if to_write:
+            db.add_documents(to_write, ids=[doc.metadata["source"] for doc in to_write])
+
+        # Data klasöründen kaldırılmış belgelerin özetlerini sil
+        removed_ids = [doc_id for doc_id in db.get(include=[])["ids"] if doc_id not in hashes]
+        if removed_ids:
+            db.delete(ids=removed_ids)
+
+        logger.info(f"🎉 İşlem Tamam! {len(summary_docs)} belge özeti hazır ({len(changed)} değişti, {len(removed_ids)} silindi).")
+        # Cevap / araç / semantik önbellekler sadece kayıtlı özetler gerçekten değiştiyse geçersiz olur
+        stored = db.get(include=["documents"])
+        if dict(zip(stored["ids"], stored["documents"])) != previous:
+            bump_index_version(f"summaries: {len(changed)} değişti, {len(removed_ids)} silindi")
+        embedding_fn.log_stats()
     else:
         logger.warning("⚠️ Kaydedilecek özet bulunamadı.")
 
@@ -1,5 +1,9 @@
+import os
 import logging
+import numpy as np
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
+from src import registry
 
 # Logger Yapılandırması
 logging.basicConfig(
@@ -8,19 +12,151 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def get_embedding_model():
-    model_name = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-    
-    logger.info(f"Embedding modeli yükleniyor: {model_name}")
-    
-    try:
-        encode_kwargs = {'normalize_embeddings': True}
-        embeddings = HuggingFaceEmbeddings(
-            model_name=model_name,
-            encode_kwargs=encode_kwargs
+EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# --- BACKEND SEÇİMİ ---
+# "torch": HuggingFaceEmbeddings (PyTorch, varsayılan)
+# "onnx" : int8 kuantize edilmiş ONNX modeli (sadece CPU sunucular için daha hızlı)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("EMBEDDING_ONNX_DIR", "./models/paraphrase-multilingual-MiniLM-L12-v2-onnx")
+ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", os.cpu_count() or 1))
+ONNX_BATCH_SIZE = int(os.getenv("EMBEDDING_ONNX_BATCH_SIZE", 32))
+# Modelin eğitimde kullandığı azami token uzunluğu (sentence-transformers ayarı ile aynı)
+MAX_SEQ_LENGTH = 128
+
+#region ONNX Backend
+def export_onnx_model(output_dir=ONNX_MODEL_DIR, model_name=EMBEDDING_MODEL_NAME):
+    """
+    PyTorch modelini ONNX'e aktarır ve int8 dinamik kuantizasyon uygular.
+    Çıktı: output_dir/model.onnx (fp32), output_dir/model_int8.onnx ve tokenizer dosyaları.
+    Bir kez çalıştırılması yeterlidir: python -m src.vectordb.embedding --export-onnx
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModel
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+    logger.info(f"📤 ONNX'e aktarılıyor: {model_name} -> {output_dir}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["örnek cümle"], return_tensors="pt")
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=17,
+            dynamo=False,
+        )
+
+    int8_path = os.path.join(output_dir, "model_int8.onnx")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(output_dir)
+    logger.info(f"✅ ONNX int8 modeli hazır: {int8_path}")
+    return int8_path
+
+class OnnxEmbeddings(Embeddings):
+    """
+    int8 ONNX modeliyle CPU üzerinde embedding üretir.
+    - Metinler uzunluğa göre sıralanıp batch'lenir; her batch sadece kendi en
+      uzun metnine kadar pad edilir (dinamik batch / dinamik padding).
+    - Mean pooling + L2 normalizasyon: HuggingFaceEmbeddings(normalize_embeddings=True) ile aynı.
+    """
+    def __init__(self, model_dir=ONNX_MODEL_DIR, threads=ONNX_THREADS, batch_size=ONNX_BATCH_SIZE):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = os.path.join(model_dir, "model_int8.onnx")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} bulunamadı. Önce: python -m src.vectordb.embedding --export-onnx"
+            )
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.batch_size = batch_size
+
+    def _encode_batch(self, texts):
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=MAX_SEQ_LENGTH,
+            return_tensors="np",
         )
+        input_ids = encoded["input_ids"].astype(np.int64)
+        attention_mask = encoded["attention_mask"].astype(np.int64)
+        hidden = self.session.run(None, {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch_ids = order[start : start + self.batch_size]
+            batch_vectors = self._encode_batch([texts[i] for i in batch_ids])
+            for i, vector in zip(batch_ids, batch_vectors):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+#region Model Yükleme
+def get_embedding_model_id():
+    """Önbellek anahtarları için backend'i de içeren model kimliği."""
+    if EMBEDDING_BACKEND == "onnx":
+        return f"{EMBEDDING_MODEL_NAME}+onnx-int8"
+    return EMBEDDING_MODEL_NAME
+
+def load_embedding_model():
+    """Embedding modelini diskten yükler (her çağrıda YENİ örnek)."""
+    model_name = EMBEDDING_MODEL_NAME
+
+    logger.info(f"Embedding modeli yükleniyor: {model_name} (backend: {EMBEDDING_BACKEND})")
+
+    try:
+        if EMBEDDING_BACKEND == "onnx":
+            embeddings = OnnxEmbeddings()
+        else:
+            encode_kwargs = {'normalize_embeddings': True}
+            embeddings = HuggingFaceEmbeddings(
+                model_name=model_name,
+                encode_kwargs=encode_kwargs
+            )
         logger.info("Embedding modeli başarıyla yüklendi.")
         return embeddings
     except Exception as e:
         logger.error(f"Embedding modeli yüklenirken hata oluştu: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+def get_embedding_model():
+    """Süreç genelinde paylaşılan embedding modelini döner (sadece ilk çağrıda yüklenir)."""
+    return registry.get_or_create("embedding_model", load_embedding_model)
+
+registry.register_loader("embedding_model", get_embedding_model)
+
+if __name__ == "__main__":
+    import sys
+    if "--export-onnx" in sys.argv:
+        export_onnx_model()
@@ -0,0 +1,300 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+import unicodedata
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from src import registry
+from src.vectordb.embedding import get_embedding_model, get_embedding_model_id
+
+try:
+    import fcntl
+except ImportError:   # Windows: dosya kilidi yok, tek yazıcı süreç varsayılır
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# --- KALICI EMBEDDING ÖNBELLEĞİ ---
+# Aynı metin (model adı + normalize edilmiş metin hash'i) bir kez gömülür.
+# Diskte model başına bir klasör tutulur:
+#   vectors.f32 : satır satır float32 vektörler (np.memmap ile okunur)
+#   keys.bin    : her satırın 20 baytlık SHA-1 anahtarı (satır sırası = ofset indeksi)
+#   meta.json   : model adı, boyut ve format sürümü
+#   append.lock : ekleme kilidi (fcntl.flock). Birden çok uvicorn worker'ı ve ingestion
+#                 aynı klasöre yazar; satır numarası her eklemede diskteki keys.bin
+#                 uzunluğundan okunur, dosyalar sadece sona eklenir.
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache")
+CACHE_FORMAT_VERSION = 1
+KEY_SIZE = 20
+
+# --- SORGU EMBEDDING ÖNBELLEĞİ (süreç içi LRU) ---
+# Bir /chat isteği aynı soruyu birden çok yerde gömer (vektör kanalı, MMR, özet DB,
+# bi-encoder ön elemesi...). Sorgu vektörü normalize metin anahtarıyla bir kez
+# hesaplanır; Chroma'ya vektörle sorgu yapılır, popüler sorular modele hiç gitmez.
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 4096))
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text):
+    """Önbellek anahtarı için metni normalize eder (Unicode NFC + boşluk sadeleştirme)."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+class CachedEmbeddings(Embeddings):
+    """
+    Bir embedding modelinin önüne konan, içerik adresli (content-addressed)
+    kalıcı önbellek. embed_documents sadece önbellekte olmayan metinleri modele
+    gönderir; embed_query süreç içi sorgu önbelleğinden geçer (QueryEmbeddingCache).
+    Model ancak ilk kaçırmada yüklenir; tamamı önbellekten gelen bir yeniden
+    kurulum modeli hiç yüklemez.
+    """
+    def __init__(self, base_factory, model_name, cache_dir=EMBEDDING_CACHE_DIR):
+        self.base_factory = base_factory
+        self.model_name = model_name
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.path = os.path.join(cache_dir, slug)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._index = None
+        self._rows = 0
+        self._matrix = None
+        self._dim = None
+
+    # --- DİSK İŞLEMLERİ ---
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _file_lock(self):
+        """Süreçler arası özel kilit (aynı klasöre yazan worker'lar / ingestion)."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._file("append.lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_dim(self):
+        """meta.json bu model ve format sürümüne aitse vektör boyutu, değilse None."""
+        meta_path = self._file("meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != CACHE_FORMAT_VERSION or meta.get("model_name") != self.model_name:
+            return None
+        return meta["dim"]
+
+    def _load(self):
+        """Anahtar indeksini (bir kez) belleğe, vektörleri memmap olarak açar."""
+        if self._index is not None:
+            return
+        self._index = {}
+        self._rows = 0
+        if not os.path.exists(self._file("meta.json")):
+            return
+        self._dim = self._read_dim()
+        if self._dim is None:
+            logger.warning(f"⚠️ Embedding önbelleği uyumsuz, yok sayılıyor: {self.path}")
+            return
+        self._refresh()
+        logger.info(f"🗄️ Embedding önbelleği açıldı: {self._rows} vektör ({self.path})")
+
+    def _refresh(self):
+        """Diskte (başka süreçlerin) eklediği yeni satırları indekse katar."""
+        if self._dim is None or not os.path.exists(self._file("keys.bin")):
+            return
+        with open(self._file("keys.bin"), "rb") as f:
+            f.seek(self._rows * KEY_SIZE)
+            raw_keys = f.read()
+        # Yarım yazılmış son kayıt varsa (çökme) sayılmaz
+        new_rows = len(raw_keys) // KEY_SIZE
+        for i in range(new_rows):
+            self._index.setdefault(raw_keys[i * KEY_SIZE:(i + 1) * KEY_SIZE], self._rows + i)
+        self._rows += new_rows
+
+    def _matrix_view(self):
+        if self._matrix is None or self._matrix.shape[0] != self._rows:
+            self._matrix = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(self._rows, self._dim))
+        return self._matrix
+
+    def _reset(self, dim):
+        """Önbellek yok ya da uyumsuz: meta yazılır, eski dosyalar sıfırlanır (kilit altında)."""
+        tmp_path = self._file("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_FORMAT_VERSION, "model_name": self.model_name, "dim": dim}, f)
+        for name in ("vectors.f32", "keys.bin"):
+            open(self._file(name), "wb").close()
+        os.replace(tmp_path, self._file("meta.json"))
+        self._index, self._rows, self._matrix, self._dim = {}, 0, None, dim
+
+    def _append(self, keys, vectors):
+        """
+        Yeni vektörleri dosya sonlarına ekler (kilit altında). Başlangıç satırı diskteki
+        keys.bin uzunluğundan alınır; bu arada başka süreçlerin eklediği anahtarlar
+        tekrar yazılmaz. Önce vektörler, sonra anahtarlar yazılır: keys.bin'de görünen
+        her satırın vektörü diskte hazırdır.
+        """
+        with self._file_lock():
+            dim = self._read_dim()
+            if dim is None or dim != vectors.shape[1]:
+                self._reset(vectors.shape[1])
+            elif self._dim is None:
+                self._dim = dim
+            self._refresh()
+
+            fresh = [i for i, key in enumerate(keys) if key not in self._index]
+            if not fresh:
+                return
+            start_row = self._rows
+            payload = np.ascontiguousarray(vectors[fresh], dtype=np.float32).tobytes()
+            # Çökmüş bir yazımdan kalan, keys.bin'de karşılığı olmayan kuyruk üzerine yazılır
+            with open(self._file("vectors.f32"), "r+b") as f:
+                f.seek(start_row * self._dim * 4)
+                f.write(payload)
+            with open(self._file("keys.bin"), "r+b") as f:
+                f.seek(start_row * KEY_SIZE)
+                f.write(b"".join(keys[i] for i in fresh))
+            for offset, i in enumerate(fresh):
+                self._index[keys[i]] = start_row + offset
+            self._rows += len(fresh)
+
+    def make_key(self, text):
+        return hashlib.sha1(f"{self.model_name}\0{normalize_text(text)}".encode("utf-8")).digest()
+
+    # --- EMBEDDINGS ARAYÜZÜ ---
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        keys = [self.make_key(t) for t in texts]
+        with self.lock:
+            self._load()
+            results = [None] * len(texts)
+
+            # Aynı çağrı içindeki tekrarlar da tek sefer gömülür
+            missing = {key: i for i, key in enumerate(keys) if key not in self._index}
+            if missing:
+                # Başka bir süreç bu arada aynı metinleri eklemiş olabilir
+                self._refresh()
+                missing = {key: i for key, i in missing.items() if key not in self._index}
+
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+
+            if missing:
+                missing_keys = list(missing)
+                new_vectors = np.asarray(
+                    self.base_factory().embed_documents([texts[missing[k]] for k in missing_keys]),
+                    dtype=np.float32
+                )
+                self._append(missing_keys, new_vectors)
+
+            matrix = self._matrix_view()
+            for i, key in enumerate(keys):
+                results[i] = matrix[self._index[key]].tolist()
+        return results
+
+    def embed_query(self, text):
+        return embed_query(text)
+
+    # --- İSTATİSTİK ---
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "entries": len(self._index or {}),
+        }
+
+    def log_stats(self):
+        s = self.stats()
+        logger.info(
+            f"📈 Embedding önbelleği: {s['hits']} isabet / {s['misses']} kaçırma "
+            f"(hit-rate: %{s['hit_rate'] * 100:.1f}, toplam {s['entries']} kayıt)"
+        )
+
+def get_cached_embedding_model():
+    """Paylaşılan embedding modelinin önüne konmuş, süreç genelinde tek önbellekli sarmalayıcı."""
+    return registry.get_or_create(
+        "cached_embedding_model",
+        lambda: CachedEmbeddings(get_embedding_model, get_embedding_model_id()),
+    )
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU: normalize sorgu metni -> embedding. Aynı sorgu eşzamanlı
+    istenirse model bir kez çalışır, diğer istekler aynı sonucu bekler.
+    """
+    def __init__(self, base_factory, max_size=QUERY_CACHE_SIZE):
+        self.base_factory = base_factory
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()   # normalize metin -> np.float32 vektör
+        self.pending = {}              # normalize metin -> Future (hesaplanıyor)
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, text):
+        key = normalize_text(text)
+        with self.lock:
+            vector = self.entries.get(key)
+            if vector is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return vector.tolist()
+            future = self.pending.get(key)
+            owner = future is None
+            if owner:
+                future = self.pending[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            return future.result().tolist()
+
+        try:
+            vector = np.asarray(self.base_factory().embed_query(text), dtype=np.float32)
+        except Exception as e:
+            with self.lock:
+                del self.pending[key]
+            future.set_exception(e)
+            raise
+        vector.setflags(write=False)
+        with self.lock:
+            del self.pending[key]
+            self.entries[key] = vector
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        future.set_result(vector)
+        return vector.tolist()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self.entries),
+        }
+
+def get_query_embedding_cache():
+    return registry.get_or_create("query_embedding_cache", lambda: QueryEmbeddingCache(get_embedding_model))
+
+def embed_query(text):
+    """Sorgu embedding'i (süreç içi LRU önbellekten). Chroma'ya *_by_vector API'leriyle verilir."""
+    return get_query_embedding_cache().embed(text)
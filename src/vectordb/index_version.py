@@ -0,0 +1,51 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# --- İNDEKS SÜRÜMÜ ---
+# Ingestion (vectorize.py / create_save_summaries.py) korpusu değiştirdiğinde yeni
+# bir sürüm jetonu yazar. Cevap ve araç çıktısı önbellekleri bu jetonu anahtarlarına
+# katar; jeton değişince eski kayıtlar geçersiz olur. Sayaç yerine rastgele jeton
+# kullanılır: veritabanı sıfırlandığında eski bir sürüm numarası tekrar üretilmez.
+INDEX_VERSION_PATH = os.getenv("INDEX_VERSION_PATH", "./chromadb/index_version.json")
+NO_INDEX_VERSION = "none"
+
+_lock = threading.Lock()
+_cached = (None, NO_INDEX_VERSION)   # (dosya mtime_ns, sürüm)
+
+def bump_index_version(reason=""):
+    """Yeni sürüm jetonu yazar (atomik) ve döner."""
+    version = uuid.uuid4().hex[:16]
+    os.makedirs(os.path.dirname(INDEX_VERSION_PATH) or ".", exist_ok=True)
+    tmp_path = INDEX_VERSION_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "updated": time.time(), "reason": reason}, f)
+    os.replace(tmp_path, INDEX_VERSION_PATH)
+    logger.info(f"🔖 İndeks sürümü güncellendi: {version} ({reason or '-'})")
+    return version
+
+def current_index_version():
+    """
+    Geçerli sürüm jetonu. Dosya sadece mtime değiştiğinde yeniden okunur, böylece
+    başka bir süreçte çalışan ingestion da birkaç mikrosaniyelik stat ile fark edilir.
+    """
+    global _cached
+    try:
+        mtime = os.stat(INDEX_VERSION_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return NO_INDEX_VERSION
+    if _cached[0] == mtime:
+        return _cached[1]
+    with _lock:
+        try:
+            with open(INDEX_VERSION_PATH, "r", encoding="utf-8") as f:
+                version = json.load(f)["version"]
+        except (OSError, ValueError, KeyError):
+            return NO_INDEX_VERSION
+        _cached = (mtime, version)
+    return version
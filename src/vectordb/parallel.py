@@ -0,0 +1,62 @@
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+# Varsayılan işçi sayısı: INGEST_WORKERS ortam değişkeni, yoksa çekirdek sayısı
+DEFAULT_WORKERS = int(os.getenv("INGEST_WORKERS", os.cpu_count() or 1))
+
+_NO_ITEM = object()
+
+def resolve_workers(workers=None):
+    """None ise varsayılanı kullanır, en az 1 işçi döner."""
+    if workers is None:
+        workers = DEFAULT_WORKERS
+    return max(1, int(workers))
+
+def parallel_map(func, items, workers=None, max_in_flight=None):
+    """
+    func'ı items üzerinde bir process pool'da çalıştırır ve sonuçları
+    BİTTİKÇE (sırasız) üretir: (item, sonuç, hata).
+
+    - func modül seviyesinde tanımlı olmalı (pickle edilebilmesi için).
+    - Aynı anda en fazla max_in_flight iş kuyruğa alınır; böylece yavaş bir
+      tüketici (embedding + Chroma yazıcısı) varken bellek sınırlı kalır.
+    - workers=1 ise pool açılmaz, iş aynı süreçte sırayla yapılır.
+    """
+    items = list(items)
+    workers = min(resolve_workers(workers), max(1, len(items)))
+
+    if workers == 1 or len(items) <= 1:
+        for item in items:
+            try:
+                yield item, func(item), None
+            except Exception as e:
+                yield item, None, e
+        return
+
+    max_in_flight = max_in_flight or workers * 2
+    logger.info(f"⚙️ {len(items)} iş {workers} işçiye dağıtılıyor...")
+
+    pending_items = iter(items)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = {}
+
+        def submit_next():
+            item = next(pending_items, _NO_ITEM)
+            if item is not _NO_ITEM:
+                in_flight[executor.submit(func, item)] = item
+
+        for _ in range(max_in_flight):
+            submit_next()
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+                submit_next()
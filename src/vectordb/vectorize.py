@@ -5,14 +5,20 @@ import sys
 import stat
 import time
 import re
-from langchain_community.vectorstores import Chroma
+import json
+import hashlib
+import chromadb
+from langchain_chroma import Chroma
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.documents import Document
-from src.vectordb.embedding import get_embedding_model
+from src.vectordb.embedding_cache import get_cached_embedding_model
+from src.vectordb.parallel import parallel_map
+from src import registry
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from dotenv import load_dotenv
-import pickle
-from langchain_community.retrievers import BM25Retriever
+from src.tools.keyword_index import open_keyword_index
+from src.tools.article_lookup import ARTICLE_INDEX_PATH, build_article_entries, save_article_index
+from src.vectordb.index_version import bump_index_version
 
 load_dotenv()
 
@@ -26,20 +32,51 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 PERSIST_DIR = "./chromadb"
+COLLECTION_NAME = "legal_rag_collection"
+DATA_PATH = "./data"
 
-def get_chroma_client():
-    embedding_function = get_embedding_model()
+# --- ARTIMLI (INCREMENTAL) İNDEKSLEME AYARLARI ---
+# Manifest: her PDF için içerik hash'i, chunk ID'leri ve indeks sürümü tutulur.
+# Chunking veya embedding mantığı değişirse INDEX_VERSION artırılmalı; bu durumda
+# tüm dosyalar "değişmiş" sayılır ve yeniden gömülür.
+MANIFEST_PATH = os.path.join(PERSIST_DIR, "ingest_manifest.json")
+INDEX_VERSION = "madde-v2"
+BATCH_LIMIT = 100
+
+def get_persistent_client():
+    """Süreç genelinde paylaşılan chromadb istemcisi (langchain sarmalayıcısı da bunu kullanır)."""
+    return registry.get_or_create("chroma_client", lambda: chromadb.PersistentClient(path=PERSIST_DIR))
+
+def create_chroma_client():
+    # Belge gömme işlemleri kalıcı embedding önbelleğinden geçer (sorgular doğrudan modele gider)
+    embedding_function = get_cached_embedding_model()
     return Chroma(
-        persist_directory=PERSIST_DIR,
+        client=get_persistent_client(),
         embedding_function=embedding_function,
-        collection_name="legal_rag_collection"
+        collection_name=COLLECTION_NAME
     )
 
+def get_chroma_client():
+    """Süreç genelinde paylaşılan Chroma bağlantısını döner."""
+    return registry.get_or_create("vector_store", create_chroma_client)
+
+def get_chroma_collection():
+    """
+    Ham chromadb koleksiyonu (langchain'in sunmadığı sorgular için, örn. embedding'leriyle arama).
+    Koleksiyon yoksa önce langchain sarmalayıcısı aynı ayarlarla oluşturur.
+    """
+    get_chroma_client()
+    return get_persistent_client().get_collection(COLLECTION_NAME)
+
+registry.register_loader("vector_store", get_chroma_client)
+
 def remove_readonly(func, path, excinfo):
     os.chmod(path, stat.S_IWRITE)
     func(path)
 
 def clear_database():
+    registry.evict("vector_store")
+    registry.evict("chroma_client")
     if os.path.exists(PERSIST_DIR):
         try:
             shutil.rmtree(PERSIST_DIR, onexc=remove_readonly)
@@ -48,120 +85,389 @@ def clear_database():
         except Exception:
             pass
 
-def regex_madde_split(full_text, source_name):
+#region Manifest
+def file_sha256(file_path):
+    """Dosya içeriğinin SHA-256 özetini parça parça okuyarak hesaplar."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest():
+    """Diskteki manifest'i okur. Yoksa veya bozuksa boş manifest döner."""
+    if not os.path.exists(MANIFEST_PATH):
+        return {"index_version": INDEX_VERSION, "files": {}}
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest.setdefault("files", {})
+        return manifest
+    except Exception as e:
+        logger.error(f"❌ Manifest okunamadı, tam yeniden indeksleme yapılacak: {e}")
+        return {"index_version": INDEX_VERSION, "files": {}}
+
+def save_manifest(manifest):
+    """Manifest'i atomik olarak yazar (yarım kalmış dosya bırakmamak için tmp + replace)."""
+    os.makedirs(PERSIST_DIR, exist_ok=True)
+    manifest["index_version"] = INDEX_VERSION
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def make_chunk_id(source_name, ordinal):
+    """Kararlı chunk ID'si: aynı dosyanın aynı sıradaki parçası hep aynı ID'yi alır (upsert için)."""
+    return f"{source_name}::{ordinal:05d}"
+
+def file_fingerprint(file_path, previous=None):
     """
-    Metni 'MADDE X' ibarelerine göre böler.
+    Dosyanın hash'ini döner. Boyut ve mtime manifest'tekiyle aynıysa
+    dosyayı tekrar okumadan önceki hash'i kullanır.
+    """
+    st = os.stat(file_path)
+    if previous and previous.get("size") == st.st_size and previous.get("mtime") == st.st_mtime:
+        return previous["sha256"], st
+    return file_sha256(file_path), st
+
+def is_up_to_date(entry, sha256):
+    return (
+        entry is not None
+        and entry.get("sha256") == sha256
+        and entry.get("index_version") == INDEX_VERSION
+    )
+
+# --- REGEX DESENLERİ (modül yüklenirken bir kez derlenir) ---
+# \n : Yeni satır başındaki maddeleri arar (Cümle içindekileri almaz).
+# MADDE\s+\d+ : "MADDE" + Boşluk + Sayı (Örn: MADDE 1, MADDE 14)
+MADDE_SPLIT_PATTERN = re.compile(r"\nMADDE\s+\d+")
+MADDE_TAG_PATTERN = re.compile(r"MADDE\s+\d+")
+
+# Sayfa sonunda yarım kalmış bir "\nMADDE 1" ibaresinin, sonraki sayfa gelince
+# tekrar taranabilmesi için geriye dönük bakılan karakter sayısı.
+SPLIT_LOOKBACK = 32
+MIN_CHUNK_LENGTH = 20
+
+def _make_madde_document(clean_chunk, source_name, page_start, page_end):
+    """Temizlenmiş madde metninden etiketli Document üretir. Çok kısa parçalar için None döner."""
+    # Çok kısa parçaları (sayfa no, çöp karakter) atla
+    if len(clean_chunk) < MIN_CHUNK_LENGTH:
+        return None
+
+    # --- METADATA ZEKASI ---
+    # Chunk'ın hangi madde olduğunu bulup veritabanına etiket olarak ekleyelim.
+    # Bu, ileride "Bana sadece Madde 5'i getir" dediğinde hayat kurtarır.
+    madde_match = MADDE_TAG_PATTERN.search(clean_chunk)
+    madde_tag = madde_match.group(0) if madde_match else "Giriş/Diğer"
+
+    enriched_content = f" {source_name} |{madde_tag} \n---\n{clean_chunk}"
+
+    return Document(
+        page_content=enriched_content, # <--- Vektör artık bunu kullanacak!
+        metadata={
+            "source": source_name,
+            "madde_no": madde_tag,
+            "split_method": "regex_madde",
+            "page_start": page_start,
+            "page_end": page_end,
+        }
+    )
+
+def stream_madde_split(pages, source_name):
     """
-    logger.info(f"✂️ Regex ile Madde Madde bölünüyor... ({len(full_text)} karakter)")
-    
-    # --- REGEX DESENİ ---
-    # (?=...) : Lookahead. Yani "MADDE" kelimesini gördüğün yerden böl ama kelimeyi silme.
-    # \n : Yeni satır başındaki maddeleri arar (Cümle içindekileri almaz).
-    # MADDE\s+\d+ : "MADDE" + Boşluk + Sayı (Örn: MADDE 1, MADDE 14)
-    pattern = r"(?=\nMADDE\s+\d+)"
-    
-    chunks = re.split(pattern, full_text)
-    
+    Sayfaları (str) bir generator'dan okuyarak metni 'MADDE X' ibarelerine göre böler.
+    Yarım kalan madde bir sonraki sayfaya taşınır; her madde tamamlanır tamamlanmaz
+    Document olarak üretilir (yield). Bellekte en fazla bir madde + bir sayfa tutulur.
+    Sayfa aralığı metadata'ya 1'den başlayan sayfa numaraları olarak yazılır.
+    """
+    buffer = ""
+    # buffer içindeki her sayfanın başladığı konum: [(offset, sayfa_no), ...]
+    page_marks = []
+    scan_from = 0
+    found_madde = False
+    doc_count = 0
+    total_chars = 0
+
+    def page_at(offset):
+        page_no = page_marks[0][1]
+        for mark_offset, mark_page in page_marks:
+            if mark_offset > offset:
+                break
+            page_no = mark_page
+        return page_no
+
+    def make_doc(start, end):
+        # Sayfa aralığı, baştaki/sondaki boşluklar atıldıktan sonraki metne göre hesaplanır
+        chunk = buffer[start:end]
+        clean_chunk = chunk.strip()
+        if not clean_chunk:
+            return None
+        first = start + (len(chunk) - len(chunk.lstrip()))
+        last = start + len(chunk.rstrip()) - 1
+        return _make_madde_document(clean_chunk, source_name, page_at(first), page_at(last))
+
+    for page_no, page_text in enumerate(pages, start=1):
+        # Sayfalar arasına, eski "\n".join davranışıyla aynı şekilde yeni satır konur
+        if page_no > 1:
+            buffer += "\n"
+        page_marks.append((len(buffer), page_no))
+        buffer += page_text
+        total_chars += len(page_text)
+
+        # Yeni gelen kısım (+ sınırda yarım kalmış olabilecek ibare) taranır
+        cut = 0
+        for match in MADDE_SPLIT_PATTERN.finditer(buffer, scan_from):
+            split_at = match.start()
+            found_madde = True
+            if split_at > cut:
+                doc = make_doc(cut, split_at)
+                if doc is not None:
+                    doc_count += 1
+                    yield doc
+            cut = split_at
+
+        # Üretilen maddeleri buffer'dan at, sayfa işaretlerini kaydır
+        if cut:
+            page_marks = [(0, page_at(cut))] + [(o - cut, p) for o, p in page_marks if o > cut]
+            buffer = buffer[cut:]
+
+        # buffer başındaki (zaten bulunmuş) eşleşmeyi tekrar bulmamak için en az 1'den başla
+        scan_from = max(1 if found_madde else 0, len(buffer) - SPLIT_LOOKBACK)
+
+    if not page_marks:
+        return
+
     # Eğer hiç madde bulamazsa (Örn: Giriş kısmı, Önsöz veya Madde içermeyen belge)
-    if len(chunks) < 2:
+    if not found_madde:
         logger.warning("⚠️ Metinde 'MADDE' yapısı bulunamadı. Standart paragraf bölmeye geçiliyor.")
         splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000, 
             chunk_overlap=100,
             separators=["\n\n", "\n", ". ", " "]
         )
-        return splitter.create_documents([full_text], metadatas=[{"source": source_name, "split_method": "recursive"}])
+        yield from splitter.create_documents([buffer], metadatas=[{"source": source_name, "split_method": "recursive"}])
+        return
 
-    final_docs = []
-    
-    for chunk in chunks:
-        clean_chunk = chunk.strip()
-        
-        # Çok kısa parçaları (sayfa no, çöp karakter) atla
-        if len(clean_chunk) < 20:
-            continue
-            
-        # --- METADATA ZEKASI ---
-        # Chunk'ın hangi madde olduğunu bulup veritabanına etiket olarak ekleyelim.
-        # Bu, ileride "Bana sadece Madde 5'i getir" dediğinde hayat kurtarır.
-        madde_match = re.search(r"(MADDE\s+\d+)", clean_chunk)
-        madde_tag = madde_match.group(1) if madde_match else "Giriş/Diğer"
-        
-        enriched_content = f" {source_name} |{madde_tag} \n---\n{clean_chunk}"
-        
-        final_docs.append(Document(
-            page_content=enriched_content, # <--- Vektör artık bunu kullanacak!
-            metadata={
-                "source": source_name,
-                "madde_no": madde_tag,
-                "split_method": "regex_madde"
-            }
-        ))
-        
-    logger.info(f"✅ Başarılı: {len(final_docs)} adet madde tespit edildi.")
-    return final_docs
-
-def process_and_save_pdfs(reset_db=False):
+    doc = make_doc(0, len(buffer))
+    if doc is not None:
+        doc_count += 1
+        yield doc
+
+    logger.info(f"✅ Başarılı: {doc_count} adet madde tespit edildi ({total_chars} karakter).")
+
+def regex_madde_split(full_text, source_name):
+    """
+    Metni 'MADDE X' ibarelerine göre böler.
+    Tek parça metin için stream_madde_split üzerine ince bir sarmalayıcıdır.
+    """
+    return list(stream_madde_split([full_text], source_name))
+
+def load_and_split_pdf(file_path, source_name):
+    """PDF'i sayfa sayfa okur ve madde bazlı Document listesine böler."""
+    loader = PyPDFLoader(file_path)
+    pages = (page.page_content for page in loader.lazy_load())
+
+    logger.info(f"✂️ Regex ile Madde Madde bölünüyor... ({source_name})")
+    return list(stream_madde_split(pages, source_name=source_name))
+
+def parse_pdf_file(pdf_file):
+    """Process pool işçisi: data klasöründeki tek bir PDF'i parse edip böler."""
+    return load_and_split_pdf(os.path.join(DATA_PATH, pdf_file), source_name=pdf_file)
+
+def load_pdf_text(pdf_file):
+    """Process pool işçisi: PDF'in tüm sayfalarını tek metin olarak döner (özetleme için)."""
+    pages = PyPDFLoader(os.path.join(DATA_PATH, pdf_file)).load()
+    return " ".join([p.page_content for p in pages])
+
+def load_store_documents(db):
+    """Chroma'daki tüm chunk'lar (ID, metin, metadata) -> Document listesi (embedding okunmaz)."""
+    stored = db.get(include=["documents", "metadatas"])
+    return [
+        Document(id=chunk_id, page_content=text, metadata=meta or {})
+        for chunk_id, text, meta in zip(stored["ids"], stored["documents"], stored["metadatas"])
+    ]
+
+def rebuild_keyword_index(db, keyword_index):
+    """Anahtar kelime indeksini Chroma'daki güncel chunk'lardan yeniden kurar (embedding gerektirmez)."""
+    logger.info("🍳 Anahtar kelime (BM25) indeksi hesaplanıyor...")
+    keyword_index.rebuild(load_store_documents(db))
+    logger.info(f"✅ Anahtar kelime indeksi kaydedildi ({keyword_index.num_docs} chunk).")
+
+def rebuild_article_index(db, files):
+    """
+    (kaynak, madde no) indeksini manifest'ten yazar. Eski manifest kayıtlarında madde
+    eşlemesi yoksa Chroma'daki metadata'dan bir kez çıkarılır.
+    """
+    for source, entry in files.items():
+        if "articles" not in entry:
+            stored = db.get(ids=entry.get("chunk_ids", []), include=["metadatas"])
+            metadatas = {chunk_id: meta or {} for chunk_id, meta in zip(stored["ids"], stored["metadatas"])}
+            ids = [chunk_id for chunk_id in entry.get("chunk_ids", []) if chunk_id in metadatas]
+            entry["articles"] = build_article_entries(
+                [Document(page_content="", metadata=metadatas[chunk_id]) for chunk_id in ids], ids
+            )
+    save_article_index(files)
+    logger.info(f"📑 Madde indeksi yazıldı ({sum(len(e['articles']) for e in files.values())} madde).")
+
+class IngestionTransaction:
+    """
+    Bir dosyanın Chroma ve anahtar kelime indeksi değişikliklerini birlikte uygular.
+    Sıra: Chroma upsert/silme -> anahtar kelime indeksi (tek state yazımı) -> manifest.
+    Her iki taraf da chunk ID ile upsert/silme yaptığından yarıda kesilen bir işlem
+    manifest'e yazılmaz; bir sonraki çalıştırmada aynen tekrarlanır ve iki indeks
+    yine aynı duruma gelir. keyword_index None ise (tam yeniden kurulum bekleniyor)
+    sadece Chroma güncellenir.
+    """
+    def __init__(self, db, keyword_index=None):
+        self.db = db
+        self.keyword_index = keyword_index
+        self.documents = []
+        self.ids = []
+        self.delete_ids = []
+
+    def upsert(self, documents, ids):
+        self.documents.extend(documents)
+        self.ids.extend(ids)
+
+    def delete(self, ids):
+        self.delete_ids.extend(ids)
+
+    def commit(self):
+        # Batch Processing (Veri tabanı şişmesin diye 100'erli ekliyoruz)
+        for i in range(0, len(self.documents), BATCH_LIMIT):
+            self.db.add_documents(self.documents[i : i + BATCH_LIMIT], ids=self.ids[i : i + BATCH_LIMIT])
+        if self.delete_ids:
+            self.db.delete(ids=self.delete_ids)
+        if self.keyword_index is not None:
+            self.keyword_index.apply(self.documents, self.ids, self.delete_ids)
+
+def process_and_save_pdfs(reset_db=False, workers=None):
+    """
+    Data klasöründeki PDF'leri artımlı (incremental) olarak indeksler.
+    - Yeni / içeriği değişen dosyalar: parse edilir, gömülür ve kararlı ID'lerle upsert edilir.
+    - Klasörden silinen dosyalar: chunk'ları Chroma'dan silinir.
+    - Değişmeyen dosyalara dokunulmaz.
+    reset_db=True ise veritabanı silinir ve her şey baştan oluşturulur.
+
+    Parse + Madde bölme işi `workers` adet süreçte paralel yapılır (varsayılan:
+    INGEST_WORKERS / çekirdek sayısı). Biten dosyalar tek bir yazıcıya (bu süreç)
+    akar; embedding ve Chroma yazımı sadece burada yapılır.
+    """
     if reset_db:
         clear_database()
-        
-    data_path = "./data"
-    all_final_documents = []
 
-    if not os.path.exists(data_path):
+    if not os.path.exists(DATA_PATH):
         logger.error("Data klasörü yok!")
         return
 
-    pdf_files = [f for f in os.listdir(data_path) if f.endswith('.pdf')]
-    
+    manifest = load_manifest()
+    known_files = manifest["files"]
+    if manifest.get("index_version") != INDEX_VERSION and known_files:
+        logger.warning(
+            f"⚠️ İndeks sürümü değişti ({manifest.get('index_version')} -> {INDEX_VERSION}). "
+            "Tüm dosyalar yeniden indekslenecek."
+        )
+
+    pdf_files = sorted(f for f in os.listdir(DATA_PATH) if f.endswith('.pdf'))
+
+    # 1. ADIM: Değişiklik tespiti
+    fingerprints = {}
+    changed_files = []
     for pdf_file in pdf_files:
-        file_path = os.path.join(data_path, pdf_file)
-        logger.info(f"📂 Dosya Yükleniyor: {pdf_file}")
-        
-        try:
-            loader = PyPDFLoader(file_path)
-            pages = loader.load()
-            
-            # ÖNEMLİ: Regex'in sayfa geçişlerinde çalışabilmesi için
-            # tüm sayfaları tek bir dev metin (string) haline getiriyoruz.
-            full_text = "\n".join([p.page_content for p in pages])
-            
-            # Regex Splitter'ı çağır
-            file_docs = regex_madde_split(full_text, source_name=pdf_file)
-            
-            all_final_documents.extend(file_docs)
-                
-        except Exception as e:
-            logger.error(f"{pdf_file} hata: {e}")
-
-    if all_final_documents:
-        db = get_chroma_client()
-        
-        # Batch Processing (Veri tabanı şişmesin diye 100'erli ekliyoruz)
-        batch_limit = 100
-        for i in range(0, len(all_final_documents), batch_limit):
-            batch = all_final_documents[i : i + batch_limit]
-            db.add_documents(batch)
-            logger.info(f"💾 {len(batch)} kayıt veritabanına yazıldı...")
-            
-        logger.info(f"✅ TÜM İŞLEM TAMAM: Toplam {len(all_final_documents)} chunk hazır.")
+        entry = known_files.get(pdf_file)
+        sha256, st = file_fingerprint(os.path.join(DATA_PATH, pdf_file), entry)
+        fingerprints[pdf_file] = (sha256, st)
+        if not is_up_to_date(entry, sha256):
+            changed_files.append(pdf_file)
+
+    removed_files = [f for f in known_files if f not in fingerprints]
+
+    if not changed_files and not removed_files:
+        keyword_index = open_keyword_index()
+        if keyword_index.needs_rebuild:
+            rebuild_keyword_index(get_chroma_client(), keyword_index)
+        if not os.path.exists(ARTICLE_INDEX_PATH):
+            rebuild_article_index(get_chroma_client(), known_files)
+            save_manifest(manifest)
+        logger.info("✅ İndeks güncel, yapılacak iş yok.")
+        return
+
+    logger.info(
+        f"🔎 Değişiklik: {len(changed_files)} yeni/değişen, {len(removed_files)} silinen, "
+        f"{len(pdf_files) - len(changed_files)} değişmeyen dosya."
+    )
+
+    db = get_chroma_client()
+
+    # Anahtar kelime indeksi yoksa/uyumsuzsa değişiklikler sadece Chroma'ya yazılır,
+    # indeks sonda tüm korpus üzerinden tek seferde kurulur.
+    keyword_index = open_keyword_index()
+    incremental_keywords = not keyword_index.needs_rebuild
+
+    # 2. ADIM: Silinen dosyaların chunk'larını temizle
+    for pdf_file in removed_files:
+        old_ids = known_files[pdf_file].get("chunk_ids", [])
+        if old_ids:
+            transaction = IngestionTransaction(db, keyword_index if incremental_keywords else None)
+            transaction.delete(old_ids)
+            transaction.commit()
+        del known_files[pdf_file]
+        save_manifest(manifest)
+        logger.info(f"🗑️ {pdf_file} indeksten kaldırıldı ({len(old_ids)} chunk).")
+
+    # 3. ADIM: Yeni / değişen dosyaları paralel parse et, tek yazıcıda göm ve upsert et
+    total_chunks = 0
+    for pdf_file, file_docs, error in parallel_map(parse_pdf_file, changed_files, workers=workers):
+        if error is not None:
+            logger.error(f"{pdf_file} hata: {error}")
+            continue
+
+        chunk_ids = [make_chunk_id(pdf_file, i) for i in range(len(file_docs))]
+        old_entry = known_files.get(pdf_file)
+        transaction = IngestionTransaction(db, keyword_index if incremental_keywords else None)
+
+        # Manifest'te kaydı olmayan (eski, rastgele ID'li) chunk'ları kaynak adına göre sil
+        if old_entry is None:
+            legacy_ids = db.get(where={"source": pdf_file}, include=[])["ids"]
+            transaction.delete(sorted(set(legacy_ids) - set(chunk_ids)))
+
+        transaction.upsert(file_docs, chunk_ids)
+
+        # Dosya kısaldıysa artakalan eski chunk'ları sil
+        if old_entry:
+            transaction.delete(sorted(set(old_entry.get("chunk_ids", [])) - set(chunk_ids)))
+
+        transaction.commit()
+
+        sha256, st = fingerprints[pdf_file]
+        known_files[pdf_file] = {
+            "sha256": sha256,
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "chunk_ids": chunk_ids,
+            "articles": build_article_entries(file_docs, chunk_ids),
+            "index_version": INDEX_VERSION,
+        }
+        save_manifest(manifest)
+        total_chunks += len(file_docs)
+        logger.info(f"💾 {pdf_file}: {len(file_docs)} chunk upsert edildi.")
+
+    logger.info(f"✅ TÜM İŞLEM TAMAM: {total_chunks} chunk güncellendi.")
+    get_cached_embedding_model().log_stats()
+
+    # 4. ADIM: (kaynak, madde no) doğrudan erişim indeksi
+    rebuild_article_index(db, known_files)
+    save_manifest(manifest)
+
+    # 5. ADIM: Anahtar kelime indeksi artımlı güncellenmediyse tüm korpus üzerinden kurulur
+    if incremental_keywords:
+        keyword_index.wait_for_compaction()
     else:
-        logger.warning("Veri yok.")
-    
-    if all_final_documents:
-        # 1. ChromaDB (Vektörler) kaydediliyor
-        db = get_chroma_client()
-        db.add_documents(all_final_documents)
-        
-        # 2. BM25 Objesini Oluştur ve "Pişir"
-        logger.info("🍳 BM25 indeksi hesaplanıyor ve donduruluyor...")
-        bm25_retriever = BM25Retriever.from_documents(all_final_documents)
-        
-        # 3. Hazır objeyi diske yaz
-        with open("./chromadb/bm25_retriever.pkl", "wb") as f:
-            pickle.dump(bm25_retriever, f)
-            
-        logger.info("✅ BM25 'hazır paket' olarak kaydedildi.")
+        rebuild_keyword_index(db, keyword_index)
+
+    # 6. ADIM: Korpus değişti -> cevap/araç önbellekleri yeni sürümü görür
+    bump_index_version(f"vectorize: {len(changed_files)} değişen, {len(removed_files)} silinen dosya")
 
 if __name__ == "__main__":
-    process_and_save_pdfs(reset_db=True)
\ No newline at end of file
+    # Varsayılan: artımlı güncelleme. Sıfırdan kurmak için: python -m src.vectordb.vectorize --reset
+    process_and_save_pdfs(reset_db="--reset" in sys.argv)
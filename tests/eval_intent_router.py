@@ -0,0 +1,79 @@
+import sys
+import os
+import time
+
+# Proje ana dizinini path'e ekleyelim ki 'src' modülünü bulabilsin
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from src.agents.intent_router import IntentRouter, SEED_EXAMPLES, ROUTER_CONFIDENCE_THRESHOLD, load_logged_examples
+    from src.agents.supervisor_agent import llm_route
+except ImportError as e:
+    print("❌ HATA: Modül bulunamadı. Lütfen bu dosyayı projenin ana dizininde çalıştırın.")
+    print(f"Detay: {e}")
+    sys.exit(1)
+
+# Eğitimde kullanılmayan sorular (yönlendiricinin gerçek trafiğe genellemesini ölçer)
+HELD_OUT = [
+    "Selam",
+    "Merhaba kolay gelsin",
+    "Hangi dokümanlar var?",
+    "KVKK'yı genel hatlarıyla anlatır mısın?",
+    "Silme yönetmeliği neyi kapsar?",
+    "Yönetmeliklerin özetini çıkar.",
+    "Madde 7'de ne yazıyor?",
+    "Kişisel verilerin saklama süresi nasıl belirlenir?",
+    "Açık rıza hangi şekilde alınmalıdır?",
+    "Veri sorumlusu hangi durumlarda VERBİS'e kayıt olmak zorundadır?",
+    "Bir hastane hasta verilerini yurt dışındaki bulut sunucusuna aktarabilir mi?",
+    "Veri ihlali durumunda ilgili kişilere nasıl bildirim yapılır?",
+    "Kurulun görevleri nelerdir?",
+    "İmha politikası hazırlamak zorunlu mu?",
+]
+
+def run_eval():
+    print("📊 NİYET YÖNLENDİRİCİ DEĞERLENDİRMESİ (yerel vs supervisor LLM)")
+    print(f"Güven eşiği: {ROUTER_CONFIDENCE_THRESHOLD}")
+    print("-" * 60)
+
+    # Yönlendirici sadece etiketli senaryolarla eğitilir; loglanmış sorular da değerlendirmeye girer
+    # (tekrar edenler bir kez sayılır)
+    questions = list(dict.fromkeys(HELD_OUT + [q for q, _ in load_logged_examples()]))
+    router = IntentRouter.train([ex for ex in SEED_EXAMPLES if ex[0] not in questions])
+
+    agree_all = agree_local = local_count = 0
+    local_ms = llm_ms = saved_ms = 0.0
+    for question in questions:
+        start = time.perf_counter()
+        route = router.route(question)
+        local_elapsed = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        # Değerlendirme kararları loglanmaz: HELD_OUT soruları eğitim verisine sızmamalı
+        llm_label = llm_route(question, log=False)
+        llm_elapsed = (time.perf_counter() - start) * 1000
+
+        local_ms += local_elapsed
+        llm_ms += llm_elapsed
+        agree = route.label == llm_label
+        agree_all += agree
+        confident = route.confidence >= ROUTER_CONFIDENCE_THRESHOLD
+        if confident:
+            local_count += 1
+            agree_local += agree
+            saved_ms += llm_elapsed - local_elapsed
+        mark = "✅" if agree else "❌"
+        path = f"yerel/{route.source}" if confident else "LLM"
+        print(f"{mark} [{path:<16}] yerel={route.label:<3} ({route.confidence:.2f}) llm={llm_label:<3} | {question}")
+
+    n = len(questions)
+    print("-" * 60)
+    print(f"Tüm sorularda LLM ile uyum      : %{agree_all / n * 100:.1f} ({agree_all}/{n})")
+    if local_count:
+        print(f"Yerelde karar verilenlerde uyum : %{agree_local / local_count * 100:.1f} ({agree_local}/{local_count})")
+    print(f"Yerelde karar verilen oran      : %{local_count / n * 100:.1f}")
+    print(f"Ortalama gecikme                : yerel {local_ms / n:.1f} ms | LLM {llm_ms / n:.1f} ms")
+    print(f"Kazanılan toplam süre           : {saved_ms / 1000:.2f} sn ({saved_ms / n:.1f} ms/soru)")
+
+if __name__ == "__main__":
+    run_eval()
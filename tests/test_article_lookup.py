@@ -0,0 +1,65 @@
+import sys
+import os
+
+# Proje ana dizinini path'e ekleyelim ki 'src' modülünü bulabilsin
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from langchain_core.documents import Document
+    from src.tools.article_lookup import ArticleLookup, build_article_entries
+except ImportError as e:
+    print("❌ HATA: Modül bulunamadı. Lütfen bu dosyayı projenin ana dizininde çalıştırın.")
+    print(f"Detay: {e}")
+    sys.exit(1)
+
+SOURCES = {
+    "kvkk.pdf": {"5": ["kvkk.pdf::00004"], "11": ["kvkk.pdf::00012", "kvkk.pdf::00013"]},
+    "kisisel-verilerin-silinmesi.pdf": {"5": ["kisisel-verilerin-silinmesi.pdf::00006"], "7": ["kisisel-verilerin-silinmesi.pdf::00008"]},
+}
+
+# (soru, beklenen (kaynak, madde no) veya None)
+CASES = [
+    ("KVKK metninde madde 5 ne diyor?", ("kvkk.pdf", "5")),
+    ("KVKK'nın 11. maddesi nedir?", ("kvkk.pdf", "11")),
+    ("6698 sayılı kanunun 5 inci maddesi", ("kvkk.pdf", "5")),
+    ("Silme yönetmeliği md. 7", ("kisisel-verilerin-silinmesi.pdf", "7")),
+    ("Kişisel verilerin silinmesi m.5 ne der?", ("kisisel-verilerin-silinmesi.pdf", "5")),
+    ("madde 7 nedir?", ("kisisel-verilerin-silinmesi.pdf", "7")),  # madde tek kaynakta var
+    ("madde 5 nedir?", None),                                       # iki kaynakta var -> belirsiz
+    ("KVKK madde 99", None),
+    ("Açık rıza nedir?", None),
+    ("KVKK'ya göre 30 gün içinde cevap verilir mi?", None),
+    ("KVKK m2 ile ilgili", None),                                    # nokta yok -> madde atfı değil
+    ("KVKK m 11 nedir", None),
+    ("Madde 5 ile madde 11'i karşılaştır", None),                    # birden fazla madde
+    ("KVKK madde 11 ile silme yönetmeliği arasındaki fark", None),   # karşılaştırma
+    ("KVKK ve silme yönetmeliği madde 5", None),                     # birden fazla kaynak
+    ("KVKK'nın 3'üncü maddesi", None),                               # indekste yok
+    ("KVKK'nın 11'inci maddesi", ("kvkk.pdf", "11")),
+]
+
+def check(name, condition):
+    print(f"{'✅' if condition else '❌'} {name}")
+    return condition
+
+def run_tests():
+    print("🧪 DOĞRUDAN MADDE ERİŞİMİ TESTİ")
+    print("-" * 60)
+    results = []
+
+    lookup = ArticleLookup(SOURCES)
+    for question, expected in CASES:
+        results.append(check(f"{question!r} -> {expected}", lookup.parse(question) == expected))
+
+    documents = [
+        Document(page_content="", metadata={"madde_no": "MADDE 1"}),
+        Document(page_content="", metadata={"madde_no": "MADDE 1"}),
+        Document(page_content="", metadata={"madde_no": "GİRİŞ"}),
+        Document(page_content="", metadata={"madde_no": "MADDE 2"}),
+    ]
+    entries = build_article_entries(documents, ["a", "b", "c", "d"])
+    results.append(check("Ingestion eşlemesi", entries == {"1": ["a", "b"], "2": ["d"]}))
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if run_tests() else 1)
@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+import numpy as np
+
+# Proje ana dizinini path'e ekleyelim ki 'src' modülünü bulabilsin
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from langchain_chroma.vectorstores import maximal_marginal_relevance
+    from src.tools.diversity import mmr_select, quota_select
+except ImportError as e:
+    print("❌ HATA: Modül bulunamadı. Lütfen bu dosyayı projenin ana dizininde çalıştırın.")
+    print(f"Detay: {e}")
+    sys.exit(1)
+
+def check(name, condition):
+    print(f"{'✅' if condition else '❌'} {name}")
+    return condition
+
+def round_robin(groups, limit):
+    """Eski broad_search_tool gruplama + round-robin döngüsü (referans)."""
+    by_group = {}
+    for i, group in enumerate(groups):
+        by_group.setdefault(group, []).append(i)
+    return [by_group[g][r] for r in range(limit) for g in by_group if r < len(by_group[g])]
+
+def run_tests():
+    print("🧪 ÇEŞİTLİLİK MOTORU TESTİ")
+    print("-" * 60)
+    results = []
+    rng = np.random.default_rng(0)
+
+    same = True
+    for n, k, lam in [(30, 20, 0.5), (200, 20, 0.3), (50, 50, 0.7), (5, 10, 0.5)]:
+        query = rng.normal(size=384).astype(np.float32)
+        docs = rng.normal(size=(n, 384)).astype(np.float32)
+        picked, _ = mmr_select(query, docs, k=k, lambda_mult=lam)
+        same &= list(picked) == maximal_marginal_relevance(query, list(docs), k=k, lambda_mult=lam)
+    results.append(check("MMR seçimi langchain referansıyla aynı", same))
+
+    query = np.ones(4, dtype=np.float32)
+    docs = np.array([[1, 1, 1, 1], [1, 1, 1, 0.9], [1, -1, 1, -1]], dtype=np.float32)
+    picked, scores = mmr_select(query, docs, k=2, lambda_mult=0.3)
+    results.append(check("Yakın kopya yerine farklı aday seçilir", list(picked) == [0, 2] and abs(scores[0] - 1.0) < 1e-6))
+
+    same = True
+    for _ in range(20):
+        groups = list(rng.choice(["a.pdf", "b.pdf", "c.pdf", "d.pdf"], size=int(rng.integers(0, 40))))
+        same &= list(quota_select(groups, limit=3)) == round_robin(groups, 3)
+    results.append(check("Kaynak kotası eski round-robin ile aynı sırayı verir", same))
+    results.append(check("Kota + k sınırı", list(quota_select(["a", "a", "b", "a", "b"], limit=1, k=1)) == [0]))
+    return all(results)
+
+def run_benchmark(repeats=20):
+    print("\n⏱️  BENCHMARK: MMR (k=20)")
+    print("-" * 60)
+    rng = np.random.default_rng(1)
+    query = rng.normal(size=384).astype(np.float32)
+    for fetch_k in [30, 100, 500]:
+        docs = rng.normal(size=(fetch_k, 384)).astype(np.float32)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            mmr_select(query, docs, k=20)
+        numpy_ms = (time.perf_counter() - start) / repeats * 1000
+        start = time.perf_counter()
+        maximal_marginal_relevance(query, list(docs), k=20)
+        reference_ms = (time.perf_counter() - start) * 1000
+        print(f"fetch_k={fetch_k}: NumPy {numpy_ms:.2f} ms | langchain {reference_ms:.2f} ms")
+
+if __name__ == "__main__":
+    passed = run_tests()
+    run_benchmark()
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,85 @@
+import sys
+import os
+import time
+import numpy as np
+
+# Proje ana dizinini path'e ekleyelim ki 'src' modülünü bulabilsin
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from src.vectordb.embedding import OnnxEmbeddings, EMBEDDING_MODEL_NAME
+except ImportError as e:
+    print("❌ HATA: Modül bulunamadı. Lütfen bu dosyayı projenin ana dizininde çalıştırın.")
+    print(f"Detay: {e}")
+    sys.exit(1)
+
+# ONNX modelinin önceden aktarılmış olması gerekir:
+#   python -m src.vectordb.embedding --export-onnx
+
+# Parite kabul sınırları (int8 kuantizasyon küçük sapmalara yol açar)
+MIN_SELF_COSINE = 0.97      # Aynı cümlenin iki backend'deki vektörleri arası kosinüs
+MAX_SIMILARITY_DIFF = 0.05  # Cümle çiftleri arası benzerlik matrislerinin en büyük farkı
+
+SENTENCES = [
+    "Kişisel veriler ilgili kişinin açık rızası olmaksızın işlenemez.",
+    "Açık rıza nedir?",
+    "Veri sorumlusu, kişisel verilerin hukuka aykırı olarak işlenmesini önlemekle yükümlüdür.",
+    "Kişisel verilerin yurt dışına aktarılması hangi şartlara bağlıdır?",
+    "Kişisel verilerin silinmesi, yok edilmesi veya anonim hale getirilmesi.",
+    "İlgili kişinin hakları nelerdir?",
+    "Kurul, veri sorumluları siciline ilişkin usul ve esasları belirler.",
+    "Merhaba, nasılsın?",
+    "MADDE 11 – (1) Herkes, veri sorumlusuna başvurarak kendisiyle ilgili kişisel veri işlenip işlenmediğini öğrenme hakkına sahiptir.",
+    "İdari para cezaları Kurul tarafından verilir.",
+]
+
+def load_backends():
+    torch_model = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        encode_kwargs={"normalize_embeddings": True}
+    )
+    onnx_model = OnnxEmbeddings()
+    return torch_model, onnx_model
+
+def run_parity_test(torch_model, onnx_model):
+    print("🧪 PARİTE TESTİ: PyTorch vs ONNX int8")
+    print("-" * 60)
+
+    torch_vecs = np.array(torch_model.embed_documents(SENTENCES))
+    onnx_vecs = np.array(onnx_model.embed_documents(SENTENCES))
+
+    # 1. Aynı cümlenin iki backend'deki vektörleri ne kadar yakın?
+    self_cosine = (torch_vecs * onnx_vecs).sum(axis=1)
+    # 2. Cümleler arası benzerlik sıralaması korunuyor mu?
+    similarity_diff = np.abs(torch_vecs @ torch_vecs.T - onnx_vecs @ onnx_vecs.T)
+
+    print(f"En düşük öz-kosinüs : {self_cosine.min():.4f} (sınır: {MIN_SELF_COSINE})")
+    print(f"En büyük benzerlik farkı: {similarity_diff.max():.4f} (sınır: {MAX_SIMILARITY_DIFF})")
+
+    passed = self_cosine.min() >= MIN_SELF_COSINE and similarity_diff.max() <= MAX_SIMILARITY_DIFF
+    print("✅ PARİTE TESTİ GEÇTİ" if passed else "❌ PARİTE TESTİ BAŞARISIZ")
+    return passed
+
+def run_benchmark(torch_model, onnx_model, repeats=20):
+    print("\n⏱️  BENCHMARK: saniyedeki cümle sayısı")
+    print("-" * 60)
+    corpus = SENTENCES * repeats
+
+    for name, model in [("PyTorch", torch_model), ("ONNX int8", onnx_model)]:
+        model.embed_documents(SENTENCES)  # Isınma (warm-up)
+        start = time.time()
+        model.embed_documents(corpus)
+        elapsed = time.time() - start
+        print(f"{name:<10}: {len(corpus) / elapsed:8.1f} cümle/sn ({len(corpus)} cümle, {elapsed:.2f} sn)")
+
+        start = time.time()
+        for sentence in SENTENCES:
+            model.embed_query(sentence)
+        print(f"{'':<10}  tek sorgu gecikmesi: {(time.time() - start) / len(SENTENCES) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    torch_model, onnx_model = load_backends()
+    passed = run_parity_test(torch_model, onnx_model)
+    run_benchmark(torch_model, onnx_model)
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,71 @@
+import sys
+import os
+import hashlib
+import tempfile
+import multiprocessing
+import numpy as np
+
+# Proje ana dizinini path'e ekleyelim ki 'src' modülünü bulabilsin
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from src.vectordb.embedding_cache import CachedEmbeddings
+except ImportError as e:
+    print("❌ HATA: Modül bulunamadı. Lütfen bu dosyayı projenin ana dizininde çalıştırın.")
+    print(f"Detay: {e}")
+    sys.exit(1)
+
+# Modele gerek kalmadan: metnin hash'inden türeyen deterministik vektör
+DIM = 8
+
+class FakeModel:
+    def embed_documents(self, texts):
+        return [fake_vector(t) for t in texts]
+
+def fake_vector(text):
+    seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:4], "little")
+    return np.random.default_rng(seed).standard_normal(DIM).astype(np.float32).tolist()
+
+def worker(cache_dir, prefix, rounds):
+    """Ayrı bir süreç (uvicorn worker'ı / ingestion) gibi aynı klasöre küçük partilerle yazar."""
+    cache = CachedEmbeddings(FakeModel, "fake-model", cache_dir=cache_dir)
+    for i in range(rounds):
+        cache.embed_documents([f"{prefix}-{i}", f"ortak-{i}"])
+
+def check(name, condition):
+    print(f"{'✅' if condition else '❌'} {name}")
+    return condition
+
+def run_tests():
+    print("🧪 KALICI EMBEDDING ÖNBELLEĞİ TESTİ")
+    print("-" * 60)
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = CachedEmbeddings(FakeModel, "fake-model", cache_dir=cache_dir)
+        cache.embed_documents(["a", "b", "a"])
+        results.append(check("Aynı çağrıdaki tekrar tek sefer gömülür", cache.stats()["entries"] == 2))
+
+        processes = [multiprocessing.Process(target=worker, args=(cache_dir, f"p{n}", 40)) for n in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        results.append(check("Worker süreçleri hatasız bitti", all(p.exitcode == 0 for p in processes)))
+
+        # Yeni bir okuyucu: her anahtar kendi vektörünü döndürmeli
+        texts = ["a", "b"] + [f"p{n}-{i}" for n in range(4) for i in range(40)] + [f"ortak-{i}" for i in range(40)]
+        reader = CachedEmbeddings(FakeModel, "fake-model", cache_dir=cache_dir)
+        vectors = reader.embed_documents(texts)
+        results.append(check("Eşzamanlı eklemeler satırları ezmedi", reader.misses == 0 and all(
+            np.allclose(vector, fake_vector(text)) for text, vector in zip(texts, vectors)
+        )))
+        results.append(check("Ortak metinler tekrar yazılmadı", reader.stats()["entries"] == len(texts)))
+
+        # İlk örnek diğer süreçlerin eklediklerini modele gitmeden görür
+        before = cache.misses
+        cache.embed_documents(["p0-0", "ortak-5"])
+        results.append(check("Diskteki yeni satırlar yeniden okunur", cache.misses == before))
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if run_tests() else 1)
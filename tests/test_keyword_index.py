@@ -0,0 +1,140 @@
+import sys
+import os
+import time
+import random
+import tempfile
+
+# Proje ana dizinini path'e ekleyelim ki 'src' modülünü bulabilsin
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from langchain_core.documents import Document
+    from src.tools import keyword_index
+    from src.tools.keyword_index import KeywordIndex, SegmentedKeywordIndex, tokenize, save_keyword_index, load_keyword_index
+except ImportError as e:
+    print("❌ HATA: Modül bulunamadı. Lütfen bu dosyayı projenin ana dizininde çalıştırın.")
+    print(f"Detay: {e}")
+    sys.exit(1)
+
+DOCUMENTS = [
+    Document(id="kvkk.pdf::00000", page_content="MADDE 5 – Kişisel veriler ilgili kişinin açık rızası olmaksızın işlenemez.",
+             metadata={"source": "kvkk.pdf", "madde_no": "MADDE 5"}),
+    Document(id="kvkk.pdf::00001", page_content="MADDE 11 – Herkes, veri sorumlusuna başvurarak kişisel verilerinin işlenip işlenmediğini öğrenme hakkına sahiptir.",
+             metadata={"source": "kvkk.pdf", "madde_no": "MADDE 11"}),
+    Document(id="yonetmelik.pdf::00000", page_content="MADDE 7 – Kişisel verilerin silinmesi, yok edilmesi veya anonim hale getirilmesi.",
+             metadata={"source": "yonetmelik.pdf", "madde_no": "MADDE 7"}),
+    Document(id="yonetmelik.pdf::00001", page_content="MADDE 9 – Veri sorumlusu, KVKK'ya uygun imha politikası hazırlar.",
+             metadata={"source": "yonetmelik.pdf", "madde_no": "MADDE 9"}),
+]
+
+def check(name, condition):
+    print(f"{'✅' if condition else '❌'} {name}")
+    return condition
+
+def run_tests():
+    print("🧪 ANAHTAR KELİME İNDEKSİ TESTİ")
+    print("-" * 60)
+    results = []
+
+    results.append(check("Türkçe küçük harf + kesme işareti", tokenize("KVKK'ya İLGİLİ") == ["kvkk", "ilgil"]))
+
+    index = KeywordIndex.from_documents(DOCUMENTS)
+    top = index.invoke("kişisel verilerin silinmesi", k=1)
+    results.append(check("En alakalı doküman ilk sırada", top and top[0].id == "yonetmelik.pdf::00000"))
+
+    filtered = index.invoke("kişisel veri", k=10, source="kvkk.pdf")
+    results.append(check("source filtresi", filtered and all(d.metadata["source"] == "kvkk.pdf" for d in filtered)))
+    results.append(check("madde_no filtresi", [d.id for d in index.invoke("veri", madde_no="MADDE 9")] == ["yonetmelik.pdf::00001"]))
+    results.append(check("Bilinmeyen kaynak boş döner", index.invoke("veri", source="yok.pdf") == []))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "keyword_index.bin")
+        save_keyword_index(index, path)
+        loaded = load_keyword_index(path)
+        same = all(
+            [(d.id, round(s, 6), d.metadata) for d, s in index.search(q)] ==
+            [(d.id, round(s, 6), d.metadata) for d, s in loaded.search(q)]
+            for q in ["kişisel veri", "silinmesi imha", "madde 11"]
+        )
+        results.append(check("Diskten (mmap) açılan indeks aynı sonuçları verir", same))
+        del loaded
+
+    with tempfile.TemporaryDirectory() as tmp:
+        segmented = SegmentedKeywordIndex(tmp)
+        segmented.rebuild(DOCUMENTS[:2])
+        # yonetmelik.pdf eklenir, kvkk.pdf::00001 silinir -> tek seferde kurulan indeksle aynı olmalı
+        segmented.apply(DOCUMENTS[2:], [d.id for d in DOCUMENTS[2:]], ["kvkk.pdf::00001"])
+        expected = KeywordIndex.from_documents([DOCUMENTS[0]] + DOCUMENTS[2:])
+        same = all(
+            [(d.id, round(s, 6)) for d, s in expected.search(q)] ==
+            [(d.id, round(s, 6)) for d, s in segmented.search(q)]
+            for q in ["kişisel veri", "silinmesi imha", "madde 11"]
+        )
+        results.append(check("Artımlı ekleme/silme tam kurulumla aynı sonuçları verir", same and segmented.num_docs == 3))
+
+        segmented.compact()
+        results.append(check("Compaction sonrası tek segment", segmented.num_segments == 1 and segmented.num_docs == 3))
+
+        reader = SegmentedKeywordIndex(tmp)
+        segmented.apply([], [], ["kvkk.pdf::00000"])
+        reader.refresh()
+        results.append(check("Okuyucu süreç güncellemeyi görür", reader.num_docs == 2))
+        # Arka plan compaction'ı geçici klasör silinmeden bitmeli
+        segmented.wait_for_compaction()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = SegmentedKeywordIndex(tmp)
+        writer.rebuild(DOCUMENTS[:2])
+        old_segment = writer._view[0][0].name
+        writer.rebuild(DOCUMENTS)
+        results.append(check("Çıkan segment dosyası hemen silinmez",
+                             os.path.exists(os.path.join(tmp, old_segment))))
+
+        # Okuyucu açamadığı segment için durumu kaydetmez; dosya gelince tekrar dener
+        current = os.path.join(tmp, writer._view[0][0].name)
+        os.rename(current, current + ".moved")
+        reader = SegmentedKeywordIndex(tmp)
+        failed = reader.needs_rebuild
+        os.rename(current + ".moved", current)
+        reader.refresh()
+        results.append(check("Açılamayan segment sonraki refresh'te tekrar denenir",
+                             failed and not reader.needs_rebuild and reader.num_docs == 4))
+
+        retention = keyword_index.SEGMENT_RETENTION_SECONDS
+        keyword_index.SEGMENT_RETENTION_SECONDS = 0
+        try:
+            writer.apply([], [], ["kvkk.pdf::00000"])
+            writer.apply([], [], ["kvkk.pdf::00001"])
+        finally:
+            keyword_index.SEGMENT_RETENTION_SECONDS = retention
+        results.append(check("Süresi dolan emekli segment silinir",
+                             not os.path.exists(os.path.join(tmp, old_segment))))
+        writer.wait_for_compaction()
+
+    return all(results)
+
+def run_benchmark(num_docs=100000, queries=50):
+    print("\n⏱️  BENCHMARK: sorgu gecikmesi")
+    print("-" * 60)
+    random.seed(0)
+    words = [f"kelime{i}" for i in range(30000)] + ["kişisel", "veri", "madde", "ilgili"] * 500
+    sources = [f"kaynak{i}.pdf" for i in range(100)]
+    documents = [
+        Document(id=str(i), page_content=" ".join(random.choices(words, k=80)),
+                 metadata={"source": sources[i % len(sources)], "madde_no": f"MADDE {i % 40}"})
+        for i in range(num_docs)
+    ]
+    start = time.time()
+    index = KeywordIndex.from_documents(documents)
+    print(f"Kurulum: {time.time() - start:.2f} sn ({num_docs} doküman)")
+
+    for source in [None, "kaynak7.pdf"]:
+        start = time.perf_counter()
+        for _ in range(queries):
+            index.search("kişisel veri madde kelime42", k=10, source=source)
+        print(f"source={source}: {(time.perf_counter() - start) / queries * 1000:.2f} ms/sorgu")
+
+if __name__ == "__main__":
+    passed = run_tests()
+    run_benchmark()
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,101 @@
+import sys
+import os
+import time
+import threading
+import numpy as np
+
+# Proje ana dizinini path'e ekleyelim ki 'src' modülünü bulabilsin
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from sentence_transformers import CrossEncoder
+    from src.tools.rerank_service import OnnxCrossEncoder, RerankService, RERANKER_MODEL_NAME
+except ImportError as e:
+    print("❌ HATA: Modül bulunamadı. Lütfen bu dosyayı projenin ana dizininde çalıştırın.")
+    print(f"Detay: {e}")
+    sys.exit(1)
+
+# ONNX modelinin önceden aktarılmış olması gerekir:
+#   python -m src.tools.rerank_service --export-onnx
+
+MAX_SCORE_DIFF = 0.05  # int8 kuantizasyonun skorlarda izin verilen en büyük sapması
+
+QUERY = "Kişisel veriler hangi şartlarda yurt dışına aktarılabilir?"
+PASSAGES = [
+    "Kişisel veriler, ilgili kişinin açık rızası olmaksızın yurt dışına aktarılamaz.",
+    "Yeterli korumanın bulunduğu ülkeler Kurulca belirlenir ve ilan edilir.",
+    "Veri sorumlusu, kişisel verilerin hukuka aykırı olarak işlenmesini önlemekle yükümlüdür.",
+    "Kurul, yedi üyeden oluşur ve kararlarını salt çoğunlukla alır.",
+    "Kişisel verilerin silinmesi, yok edilmesi veya anonim hale getirilmesi.",
+    "İdari para cezaları Kurul tarafından verilir.",
+]
+
+def run_parity_test(torch_model, onnx_model):
+    print("🧪 PARİTE TESTİ: PyTorch vs ONNX int8 (cross-encoder)")
+    print("-" * 60)
+    pairs = [[QUERY, passage] for passage in PASSAGES]
+    torch_scores = np.asarray(torch_model.predict(pairs))
+    onnx_scores = np.asarray(onnx_model.predict(pairs))
+    diff = np.abs(torch_scores - onnx_scores).max()
+    same_top = int(np.argmax(torch_scores)) == int(np.argmax(onnx_scores))
+    print(f"En büyük skor farkı: {diff:.4f} (sınır: {MAX_SCORE_DIFF}) | en iyi pasaj aynı: {same_top}")
+    passed = diff <= MAX_SCORE_DIFF and same_top
+    print("✅ PARİTE TESTİ GEÇTİ" if passed else "❌ PARİTE TESTİ BAŞARISIZ")
+    return passed
+
+def run_service_benchmark(model, concurrency=8, rounds=3):
+    print("\n⏱️  SERVİS: önbellek + micro-batching")
+    print("-" * 60)
+    service = RerankService(model)
+
+    def request(i):
+        service.score(f"{QUERY} {i % 2}", PASSAGES)
+
+    for round_no in range(rounds):
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(concurrency)]
+        start = time.time()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        print(f"Tur {round_no + 1}: {concurrency} eşzamanlı istek {(time.time() - start) * 1000:.1f} ms")
+    print(f"İstatistik: {service.stats()}")
+
+def run_cascade_comparison(queries=None, candidates=20):
+    """full vs cascade: ilk 3 sonuç örtüşmesi ve gecikme (dolu bir Chroma veritabanı gerektirir)."""
+    from src.tools.utils import rerank_documents
+    from src.tools.rerank_service import get_rerank_service
+    from src.vectordb.vectorize import get_chroma_client
+
+    print("\n🪜 CASCADE KARŞILAŞTIRMASI: full vs cascade")
+    print("-" * 60)
+    queries = queries or [
+        "Açık rıza nedir?",
+        "Kişisel veriler yurt dışına nasıl aktarılır?",
+        "Veri sorumlusunun yükümlülükleri nelerdir?",
+        "İlgili kişinin hakları nelerdir?",
+    ]
+    overlaps = []
+    for query in queries:
+        docs = get_chroma_client().similarity_search(query, k=candidates)
+        timings = {}
+        results = {}
+        for mode in ["full", "cascade"]:
+            get_rerank_service().cache.entries.clear()  # Skor önbelleği karşılaştırmayı bozmasın
+            start = time.time()
+            results[mode] = rerank_documents(query, docs, top_k=3, mode=mode)
+            timings[mode] = (time.time() - start) * 1000
+        full_ids = [d.page_content for d in results["full"]]
+        overlap = len(set(full_ids) & {d.page_content for d in results["cascade"]}) / max(len(full_ids), 1)
+        overlaps.append(overlap)
+        print(f"{query[:45]:<45} | full {timings['full']:7.1f} ms | cascade {timings['cascade']:7.1f} ms | top-3 örtüşme {overlap:.2f}")
+    print(f"Ortalama top-3 örtüşme: {np.mean(overlaps):.2f}")
+
+if __name__ == "__main__":
+    torch_model = CrossEncoder(RERANKER_MODEL_NAME)
+    onnx_model = OnnxCrossEncoder()
+    passed = run_parity_test(torch_model, onnx_model)
+    run_service_benchmark(onnx_model)
+    if "--cascade" in sys.argv:
+        run_cascade_comparison()
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,84 @@
+import sys
+import os
+import time
+import tempfile
+
+# Proje ana dizinini path'e ekleyelim ki 'src' modülünü bulabilsin
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from src.cache.response_cache import ResponseCache, MemoryBackend, SqliteBackend
+except ImportError as e:
+    print("❌ HATA: Modül bulunamadı. Lütfen bu dosyayı projenin ana dizininde çalıştırın.")
+    print(f"Detay: {e}")
+    sys.exit(1)
+
+def check(name, condition):
+    print(f"{'✅' if condition else '❌'} {name}")
+    return condition
+
+def run_backend_tests(name, make_backend):
+    results = []
+    version = ["v1"]
+    cache = ResponseCache(make_backend(), ttl=60, version=lambda: version[0])
+    calls = []
+
+    def search(query, target_source):
+        calls.append(query)
+        return f"sonuç: {query} @ {target_source}"
+
+    first = cache.get_or_compute("point_search", search, "Açık rıza nedir?", "kvkk.pdf")
+    second = cache.get_or_compute("point_search", search, "açık  rıza nedir", "kvkk.pdf")
+    results.append(check(f"[{name}] Normalize aynı çağrı önbellekten", first == second and len(calls) == 1))
+    cache.get_or_compute("point_search", search, "açık rıza nedir", None)
+    cache.get_or_compute("broad_search", search, "açık rıza nedir", "kvkk.pdf")
+    results.append(check(f"[{name}] Kaynak ve ad alanı anahtara dahil", len(calls) == 3))
+
+    cache.put("chat", {"response": "A", "route": "RAG"}, "soru 1")
+    results.append(check(f"[{name}] Sözlük değerler", cache.get("chat", "soru 1") == {"response": "A", "route": "RAG"}))
+
+    for i in range(5):
+        cache.put("chat", {"response": str(i)}, f"doldur {i}")
+    stats = cache.stats()
+    results.append(check(f"[{name}] Kapasite aşılınca tahliye", stats["entries"] == 4 and stats["evictions"] == 5))
+    results.append(check(f"[{name}] Sayaçlar", stats["hits"] == 2 and stats["misses"] == 3))
+
+    partial = cache.get_or_compute("point_search", lambda q, t: {"context": "kısmi", "degraded": True}, "yavaş soru", None,
+                                   cacheable=lambda value: not value["degraded"])
+    results.append(check(f"[{name}] Kısmi sonuç yazılmaz", partial["context"] == "kısmi" and cache.get("point_search", "yavaş soru", None) is None))
+
+    version[0] = "v2"
+    results.append(check(f"[{name}] İndeks sürümü değişince kaçırır", cache.get("chat", "doldur 4") is None and cache.stats()["entries"] == 0))
+
+    short = ResponseCache(make_backend(), ttl=0.01, version=lambda: "v1")
+    short.put("chat", "x", "soru")
+    time.sleep(0.02)
+    results.append(check(f"[{name}] TTL dolunca kaçırır", short.get("chat", "soru") is None))
+    return results
+
+def run_tests():
+    print("🧪 TAM EŞLEŞME ÖNBELLEĞİ TESTİ")
+    print("-" * 60)
+    results = run_backend_tests("memory", lambda: MemoryBackend(max_size=4))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        results += run_backend_tests("sqlite", lambda: SqliteBackend(path, max_size=4))
+        # İkinci bir "worker" aynı dosyayı açar ve kaydı görür
+        writer = ResponseCache(SqliteBackend(path), version=lambda: "v9")
+        reader = ResponseCache(SqliteBackend(path), version=lambda: "v9")
+        writer.put("chat", "paylaşılan", "soru")
+        results.append(check("[sqlite] Süreçler arası paylaşım", reader.get("chat", "soru") == "paylaşılan"))
+
+        # Okumalar yazma yapmaz: sayaçlar ve LRU dokunuşları toplu yazılır
+        batched = SqliteBackend(path, flush_every=1000, flush_interval=3600)
+        lazy = ResponseCache(batched, version=lambda: "v9")
+        stored_hits = lambda: dict(batched._connect().execute("SELECT name, value FROM counters").fetchall())["hits"]
+        before = stored_hits()
+        for _ in range(10):
+            lazy.get("chat", "soru")
+        unflushed = stored_hits()
+        results.append(check("[sqlite] Okumalar toplu yazılır", unflushed == before and lazy.stats()["hits"] == before + 10))
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if run_tests() else 1)
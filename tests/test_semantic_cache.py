@@ -0,0 +1,73 @@
+import sys
+import os
+import time
+import numpy as np
+
+# Proje ana dizinini path'e ekleyelim ki 'src' modülünü bulabilsin
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from src.cache.semantic_cache import SemanticCache
+    from src.tools.article_lookup import SourceAliases, alias_text
+except ImportError as e:
+    print("❌ HATA: Modül bulunamadı. Lütfen bu dosyayı projenin ana dizininde çalıştırın.")
+    print(f"Detay: {e}")
+    sys.exit(1)
+
+# Modele gerek kalmadan: aynı "konu" kelimesini içeren sorular neredeyse aynı vektöre düşer
+TOPICS = ["rıza", "silme", "aktarım", "başvuru", "ceza"]
+
+def fake_embed(text):
+    vector = np.full(len(TOPICS) + 1, 0.01, dtype=np.float32)
+    for i, topic in enumerate(TOPICS):
+        if topic in text:
+            vector[i] = 1.0
+    vector[-1] = len(text) / 1000  # küçük ifade farkı
+    return vector.tolist()
+
+ALIASES = SourceAliases(["kvkk.pdf", "kisisel-verilerin-silinmesi.pdf"])
+
+def fake_sources(text):
+    return ALIASES.match_all(alias_text(text))
+
+def check(name, condition):
+    print(f"{'✅' if condition else '❌'} {name}")
+    return condition
+
+def run_tests():
+    print("🧪 SEMANTİK CEVAP ÖNBELLEĞİ TESTİ")
+    print("-" * 60)
+    results = []
+    version = ["v1"]
+    cache = SemanticCache(embed=fake_embed, sources=fake_sources, threshold=0.95, ttl=60, max_size=2, version=lambda: version[0])
+
+    cache.store("açık rıza nedir", {"response": "A"})
+    hit = cache.lookup("açık rıza ne demek")
+    results.append(check("Benzer ifade önbellekten döner", hit is not None and hit["response"] == "A"))
+    results.append(check("Farklı konu kaçırır", cache.lookup("silme süresi nedir") is None))
+
+    cache.store("madde 5 rıza", {"response": "M5"})
+    results.append(check("Sayısı farklı soru kaçırır", cache.lookup("madde 6 rıza") is None))
+
+    cache.store("KVKK'da silme süresi", {"response": "K"})
+    results.append(check("Farklı kaynağa atıf kaçırır", cache.lookup("silme yönetmeliğinde silme süresi") is None))
+    results.append(check("Aynı kaynağa atıf isabet", (cache.lookup("KVKK'ya göre silme süresi") or {}).get("response") == "K"))
+
+    cache = SemanticCache(embed=fake_embed, sources=fake_sources, threshold=0.95, ttl=60, max_size=2, version=lambda: version[0])
+    cache.store("açık rıza nedir", {"response": "A"})
+    cache.store("madde 5 rıza", {"response": "M5"})
+    cache.lookup("açık rıza ne demek")               # "açık rıza nedir" en son kullanılan olur
+    cache.store("idari para ceza", {"response": "C"})  # kapasite 2 -> "madde 5 rıza" atılır
+    results.append(check("LRU tahliyesi", cache.lookup("madde 5 rıza") is None and cache.stats()["evictions"] == 1))
+
+    version[0] = "v2"
+    results.append(check("İndeks sürümü değişince geçersiz", cache.lookup("açık rıza nedir") is None and cache.stats()["entries"] == 0))
+
+    short = SemanticCache(embed=fake_embed, sources=fake_sources, threshold=0.95, ttl=0.01, version=lambda: "v1")
+    short.store("açık rıza nedir", {"response": "A"})
+    time.sleep(0.02)
+    results.append(check("TTL dolunca kaçırır", short.lookup("açık rıza nedir") is None))
+    return all(results)
+
+if __name__ == "__main__":
+    sys.exit(0 if run_tests() else 1)